@@ -7,6 +7,9 @@ This module contains of:-
 """
 
 #Import needed modules
+import time
+started = time.time() #the start of the application, for the startup-time report
+
 import Tkinter as tk
 import ttk
 import Pmw
@@ -14,7 +17,7 @@ import Pmw
 #from ttk import Frame, Button, Style, Notebook
 from ttk import *
 from tkFileDialog import askopenfilename
-from tkMessageBox import showinfo, showerror, INFO, ERROR
+from tkMessageBox import showinfo, showerror, askyesno, INFO, ERROR
 
 import sys
 import os
@@ -23,6 +26,26 @@ from comtypes import COMError
 from comtypes.client import CreateObject, GetModule, GetActiveObject
 
 import array
+import multiprocessing
+
+from xrecords import readAllXRecords, XRecordReader
+from dxfreader import DxfDrawing
+from extract import extractDocument, extractDxf
+from cache import ExtractionCache, evict
+from snapshot import snapshotPath, drawingStamp, saveSnapshot, loadSnapshot
+from validate import validateModel, formatIssues, writeIssues, issuesPath
+from geomqa import checkGeometry, fixGeometry, geometryPath, WARNINGS
+from intersect import splitFrames
+from panelize import panelizeWalls
+from emit import emitDefinitions, emitObjects, MODIFIER_TYPES
+from textmodel import modelFilePath, writeModelFile
+from stories import assignStories, defineStories
+from dbtables import emitTables, TABLE_PROGRAMS
+from delta import stateFile, loadState, saveState, stateFromModel, emitDelta, missingStories
+from backends import Backends, BackendError, StartupReport, XL_VALUE
+from acadreplay import AcadRecorder, recordingPath
+from instrument import startProfile, stopProfile, stage, current, counted
+from pipeline import geometryModel, streamImport, connectDocument, connectSapModel, hasStiffLines, PipelineError
 
 #test part
 
@@ -56,20 +79,21 @@ GetModule("C:\Program Files\Common Files\Autodesk Shared\AcETransmit19.tlb")
 import comtypes.gen.TRANSMITTALLib as AcETrans
 print "AcETransmit19 successfully loaded"
 '''
-try:
-    acad = CreateObject("AutoCAD.Application.20",dynamic=True)
-except:
-    showerror(title="CAD2ETABSnSAP 1.0.0",message="Can't load AutoCAD, reboot windows and try again")
-    sys.exit(-1)
-print "AutoCAD successfully loaded"
+#AutoCAD, Excel (with the facilitator workbook), ETABS and SAP2000 are connected on their first use, running instances are reused
+startup = StartupReport(started)
 xlpath = os.getcwd()
 xlpath += '\\facilitate.xlsm'
-xl = CreateObject("Excel.Application")
-from comtypes.gen.Excel import xlRangeValueDefault
-xlwb = xl.Workbooks.Open(Filename=xlpath,ReadOnly=0)
-print "Facilitator workbook successfully loaded"
+backends = Backends(xlpath,startup)
+xlRangeValueDefault = XL_VALUE
+startup.mark("import")
+lisppath = os.getcwd() + '\\geomdump.lsp' #writes the geometry of the drawing at once
+recorddir = os.environ.get('CAD2ETABSNSAP_RECORD','') #if it's set, the AutoCAD side of every import is recorded to this directory [acadreplay.py]
+profiledir = os.environ.get('CAD2ETABSNSAP_PROFILE','') #if it's set, every import is profiled to this directory [instrument.py]
+profilememory = os.environ.get('CAD2ETABSNSAP_TRACEMALLOC','') == '1' #the profile also traces the peak memory
 
 progname = "CAD2ETABSnSAP 1.0.0" #Program's Name
+EMISSIONS = ['API objects','Model file','Database tables','Changes only','Pipelined objects'] #Ways of writing the model to ETABS or SAP2000
+ETABS_EMISSIONS = [e for e in EMISSIONS if e != 'Database tables'] #the database tables are SAP2000's [dbtables.py]
 
 #The GUI
 class MYWINDOW(Frame):
@@ -82,13 +106,7 @@ class MYWINDOW(Frame):
         #Sadly, initialize some "global mechanism" variables [policy is not separated from mechanism at Class's Scope for AutoCAD only]
         self.filepath =  tk.StringVar(value="") #the autocad's document file path
         self.oldfilepath = "" #the file name of the previously opened document, that needs to be closed to let the space to the newly requested one
-        try:
-            self.acad = acad #the AutoCAD instance
-        except:
-            self.master.destroy
-            sys.exit(-1)
-        self.xl = xl #the Excel instance
-        self.xlwb = xlwb #the specific needed workbook
+        self.backends = backends #AutoCAD and Excel are started (or reused) when they are first needed
         self.acadoc = None #Initialize the autocad's document
         self.modelspace = None #initialize the autocad file's model space
         
@@ -141,7 +159,7 @@ class MYWINDOW(Frame):
         etabs_elemdlbl = tk.Label(gfetabs,text='Elements Section Property Modifiers')
         etabs_elemdlbl.grid(row=2,column=1,padx=5,pady=5)
         self.elemdetabs=tk.StringVar(value='All set to 1')
-        etabs_elemdcmbox=ttk.Combobox(gfetabs,state='readonly',textvariable=self.elemdetabs,values=['All set to 1','As Per ACI M318 11','Torsional Modifiers Only','Egyptian Standard'],width=25)
+        etabs_elemdcmbox=ttk.Combobox(gfetabs,state='readonly',textvariable=self.elemdetabs,values=MODIFIER_TYPES,width=25)
         etabs_elemdcmbox.grid(row=2,column=2,padx=5,pady=5)
 
         gtacadetabs=Pmw.Group(fetabs,tag_text='AutoCAD Import Options')
@@ -175,6 +193,13 @@ class MYWINDOW(Frame):
         etabs_slab2d.grid(row=1,column=1,padx=5,pady=5)
         etabs_slab3d=tk.Radiobutton(gfetabs_slab,text='3D model',value='3D',variable=self.etabs_slabdim)
         etabs_slab3d.grid(row=2,column=1,padx=5,pady=5)
+
+        #write the model object by object, or as a whole .e2k file that ETABS opens in one step [database tables are SAP2000's only]
+        etabs_emissionlbl=tk.Label(gfetabs,text='Write the model through')
+        etabs_emissionlbl.grid(row=3,column=1,padx=5,pady=5)
+        self.etabsemission=tk.StringVar(value=EMISSIONS[0])
+        etabs_emissioncmbox=ttk.Combobox(gfetabs,state='readonly',textvariable=self.etabsemission,values=ETABS_EMISSIONS,width=25)
+        etabs_emissioncmbox.grid(row=3,column=2,padx=5,pady=5)
         
         
         #Construct tab SAP2000
@@ -198,7 +223,7 @@ class MYWINDOW(Frame):
         sap_elemdlbl = tk.Label(gfsap,text='Elements Section Property Modifiers')
         sap_elemdlbl.grid(row=2,column=1,padx=5,pady=5)
         self.sapelemd = tk.StringVar(value='All set to 1')
-        sap_elemdcmbox = ttk.Combobox(gfsap,state='readonly',textvariable=self.sapelemd,values=['All set to 1','As Per ACI M318 11','Torsional Modifiers Only','Egyptian Standard'],width=25)
+        sap_elemdcmbox = ttk.Combobox(gfsap,state='readonly',textvariable=self.sapelemd,values=MODIFIER_TYPES,width=25)
         sap_elemdcmbox.grid(row=2,column=2,padx=5,pady=5)
 
         #add wall crack mode options
@@ -222,6 +247,13 @@ class MYWINDOW(Frame):
         sap_slab2d.grid(row=1,column=1,padx=5,pady=5)
         sap_slab3d=tk.Radiobutton(gfsap_slab,text='3D model',value='3D',variable=self.sap_slabdim)
         sap_slab3d.grid(row=2,column=1,padx=5,pady=5)
+
+        #write the model object by object, as a whole .$2k file that SAP2000 opens in one step, or as database tables into the open model
+        sap_emissionlbl=tk.Label(gfsap,text='Write the model through')
+        sap_emissionlbl.grid(row=3,column=1,padx=5,pady=5)
+        self.sapemission=tk.StringVar(value=EMISSIONS[0])
+        sap_emissioncmbox=ttk.Combobox(gfsap,state='readonly',textvariable=self.sapemission,values=EMISSIONS,width=25)
+        sap_emissioncmbox.grid(row=3,column=2,padx=5,pady=5)
         
         ##__##
         
@@ -242,6 +274,8 @@ class MYWINDOW(Frame):
     def updLayers(self):
         if self.acadoc == None:
             self.acadetabscolcmbox['values'] = ['None','0']
+        elif isinstance(self.acadoc,DxfDrawing):
+            vals = ['None'] + self.acadoc.layers
         else:
             i = self.acadoc.Layers.Count #get number of layers
             vals = ['None']
@@ -258,14 +292,28 @@ class MYWINDOW(Frame):
         self.oldfilepath = self.filepath.get()
         if self.oldfilepath != "":
             #print "Old Path: ", self.oldfilepath #debug line
-            self.acadoc.Close()
+            if not isinstance(self.acadoc,DxfDrawing):
+                self.acadoc.Close()
             self.acadoc = None
             self.modelspace = None
             
         self.filepath.set(getDwgPath())
         a = self.filepath.get()
-        if a:
-            self.acadoc=self.acad.Documents.Open(a)
+        if a.lower().endswith('.dxf'):
+            #.dxf files are read directly, without AutoCAD
+            try:
+                self.acadoc = DxfDrawing(a)
+                self.modelspace = self.acadoc
+                showinfo(title=progname,message="File Loaded Successfully")
+            except(IOError, ValueError) as e:
+                showerror(title=progname,message=str(e))
+        elif a:
+            try:
+                acad = self.backends.acad.get()
+            except BackendError as e:
+                showerror(title=progname,message="Can't load AutoCAD, reboot windows and try again\n%s" % e)
+                return
+            self.acadoc=acad.Documents.Open(a)
             type(self.acadoc)
             try:
                 self.modelspace = self.acadoc.ModelSpace
@@ -275,14 +323,14 @@ class MYWINDOW(Frame):
     #The method that imports to ETABS
     def Imp_Etabs(self):
         if self.modelspace != None:
-            EtabsImport(self.acadoc,"ETABS",self.swmetabs.get(),self.elemdetabs.get(),self.etabsiscracked.get(),self.etabs_slabdim.get(),self.acadetabscollyr.get())
+            EtabsImport(self.acadoc,"ETABS",self.swmetabs.get(),self.elemdetabs.get(),self.etabsiscracked.get(),self.etabs_slabdim.get(),self.acadetabscollyr.get(),self.etabsemission.get())
         else:
             showerror(title=progname,message="AutoCAD drawing isn't loaded yet")
 
     #The method that imports to SAP2000
     def Imp_SAP(self):
         if self.modelspace != None:
-            EtabsImport(self.acadoc,"SAP2000",self.sapselfwtmdf.get(),self.sapelemd.get(),self.sapiscracked.get(),self.sap_slabdim.get(),'')
+            EtabsImport(self.acadoc,"SAP2000",self.sapselfwtmdf.get(),self.sapelemd.get(),self.sapiscracked.get(),self.sap_slabdim.get(),'',self.sapemission.get())
         else:
             showerror(title=progname,message="AutoCAD drawing isn't loaded yet!",icon=ERROR)
     
@@ -301,22 +349,14 @@ class MYWINDOW(Frame):
         showinfo(title="About",message=mes,icon=INFO)
 
     def on_exit(self):
-        if self.acad:
-            self.modelspace = None
-            try:
+        self.modelspace = None
+        try:
+            if self.acadoc != None and not isinstance(self.acadoc,DxfDrawing):
                 self.acadoc.Close()
-                self.acad.Quit()
-            except:
-                try:
-                    self.acad.Quit()
-                except:
-                    pass
-        try:    
-            self.xlwb.Close(SaveChanges=0)
         except:
             pass
-        self.xl.Application.Quit()
-        #del self.xl
+        #close the workbook, Excel and AutoCAD if they were started here [reused ones are left running]
+        self.backends.closeAll()
         self.master.destroy()
 
 #Get the Path of .dwg file
@@ -326,538 +366,281 @@ def getDwgPath():
     return askopenfilename(**opts)
 
 #The function that imports from ETABS
-def EtabsImport(doc,program,swm,modtypes,wallcrk,slabmode,colyr='None'):
+#If CAD2ETABSNSAP_PROFILE is set, the stages of the import and its remote calls are profiled, and the report is written there
+def EtabsImport(doc,program,swm,modtypes,wallcrk,slabmode,colyr='None',emission='API objects'):
+    if not profiledir:
+        return runImport(doc,program,swm,modtypes,wallcrk,slabmode,colyr,emission)
+    if isinstance(doc,DxfDrawing):
+        docname = doc.path
+    else:
+        docname = doc.FullName
+    prof = startProfile(os.path.splitext(os.path.basename(docname))[0] + '_' + program,profilememory)
+    try:
+        with stage("import"):
+            runImport(doc,program,swm,modtypes,wallcrk,slabmode,colyr,emission)
+    finally:
+        stopProfile()
+        print prof.summary()
+        print "Profile written to %s" % ', '.join(prof.save(profiledir))
+
+#The import itself, from reading the drawing to refreshing the view
+def runImport(doc,program,swm,modtypes,wallcrk,slabmode,colyr='None',emission='API objects'):
     #Get Etabs or SAP2000 instance, assign it at EtabsObj variable
     try:
-        if program == "ETABS":
-            EtabsObj = GetActiveObject("CSI.ETABS.API.ETABSObject")
-        elif program == "SAP2000":
-            EtabsObj = GetActiveObject("CSI.SAP2000.API.SAPObject")
-    except(OSError, COMError):
+        EtabsObj = backends.program(program)
+    except BackendError:
         if program == "ETABS":
             showerror(title=progname,message="ETABS is not running\nPlease open ETABS and try again",icon=ERROR)
         elif program == "SAP2000":
             showerror(title=progname,message="SAP2000 is not running\nPlease open ETABS and try again",icon=ERROR)
         return
-    #get model's instance, and initilaize the model
-    myModel = EtabsObj.SapModel
-    myUnit = 6 #kN_m_C
-    myModel.InitializeNewModel(myUnit)
-    ret = myModel.File.NewBlank()
-
-    #Define Concrete Materials
-    MAT_CONC = 2 #concrete enumeration
-    matprop = myModel.PropMaterial
-
-    matdict = doc.Dictionaries.Item("ConcMaterial")
-    '''
-    Typical values of the material's XRecord, respectively
-    Val[0]=label, Val[1]=Fc, Val[2]=E, Val[3]=StrainAtFc, Val[4]=UltimateStrain
-    Val[5]=PoisonRatio, Val[6]=ThermalCoeff, Val[7]=UnitWeight
-    '''
-    i = matdict.Count
-    docname = doc.FullName
-    for j in range(0,i):
-        matXRecord = matdict.Item(j)
-        mathandle = matXRecord.ObjectID
-        dxfgrcd, val = XRecord_return_1(docname,mathandle,8) #size = 8
-        
-        ret = matprop.SetMaterial(str(val[0]),MAT_CONC)
-        if program == "ETABS":
-            ret = matprop.SetOConcrete_1(str(val[0]),val[1],False,0,2,4,val[3],val[4],-0.1)
-        elif program == "SAP2000":
-            ret = matprop.SetOConcrete_1(str(val[0]),val[1],False,0,2,2,val[3],val[4],-0.1)
-        ret = matprop.SetWeightAndMass(str(val[0]),1,val[7])
-        ret = matprop.SetMPIsotropic(str(val[0]),val[2],val[5],val[6])
-        mes = "Go and see " + str(val[0]) + " material definition"
-        showinfo(title="User Debug Work",message=mes,icon=INFO)
-
-    #Define Load Patterns
-    DEAD = 1
-    LIVE = 3
-    OTHER = 8
-
-    if program == "SAP2000":
-        ret = myModel.LoadPatterns.ADD("LIVE",LIVE) #SAP2000 doesn't create "LIVE" by default
-
-    loadpatdict = doc.Dictionaries.Item("LoadPatterns")
-    icount = loadpatdict.Count
-    for i in range(0,icount):
-        loadpatXRecord = loadpatdict.Item(i)
-        loadpathandle = loadpatXRecord.ObjectID
-        dxfgrcd, val = XRecord_return_1(docname,loadpathandle,2)
-
-        #Set the Dead self weight multiplier, and add the rest of the load patterns
-        if str(val[0]) == "Dead":
-            if program == "ETABS":
-                ret = myModel.LoadPatterns.SetSelfWTMultiplier("Dead",float(swm))
-            elif program == "SAP2000":
-                ret = myModel.LoadPatterns.SetSelfWTMultiplier("DEAD",float(swm))
-        elif str(val[0]) == "Live":
-            continue
-        else:
-            if str(val[1]) == "Dead":
-                ret = myModel.LoadPatterns.Add(str(val[0]),DEAD)
-            elif str(val[1]) == "Live":
-                ret = myModel.LoadPatterns.Add(str(val[0]),LIVE)
-            elif str(val[1]) == "Other":
-                ret = myModel.LoadPatterns.Add(str(val[0]),OTHER)
-
-    #Get modifiers of section properties for frames and slabs
-    if modtypes == 'All set to 1':
-        beammod = [1,1,1,1,1,1,1,1]
-        colmod = [1,1,1,1,1,1,1,1]
-        slabmod = [1,1,1,1,1,1,1,1,1,1]
-        wallmod = [1,1,1,1,1,1,1,1,1,1]
-    elif modtypes == 'As Per ACI M318 11':
-        beammod = [1,1,1,0.01,0.35,0.35,1,1]
-        colmod = [1,1,1,0.1,0.7,0.7,1,1]
-        if slabmode == '2D':
-            slabmod = [1,1,1,1,1,1,1,1,1,1]
-        elif slabmode == '3D':
-            slabmod = [1,1,1,0.25,0.25,1,1,1,1,1]
-        if wallcrk == 'cracked':
-            wallmod = [1,1,1,0.35,0.35,1,1,1,1,1]
-        elif wallcrk == 'uncracked':
-            wallmod = [1,1,1,0.7,0.7,1,1,1,1,1]
-    elif modtypes == 'Torsional Modifiers Only':
-        beammod = [1,1,1,0.01,1,1,1,1]
-        colmod = [1,1,1,0.1,1,1,1,1]
-        slabmod = [1,1,1,1,1,1,1,1,1,1]
-        wallmod = [1,1,1,1,1,1,1,1,1,1]
-    elif modtypes == 'Egyptian Standard':
-        beammod = [1,1,1,0.01,1,1,1,1]
-        colmod = [1,1,1,1,1,1,1,1]
-        if slabmode == '2D':
-            slabmod = [1,1,1,1,1,1,1,1,1,1]
-        elif slabmode == '3D':
-            slabmod = [1,1,1,1,0.2,0.2,1,1,1,1]
-        if wallcrk == 'cracked':
-            wallmod = [1,1,1,0.35,0.35,1,1,1,1,1]
-        elif wallcrk == 'uncracked':
-            wallmod = [1,1,1,0.7,0.7,1,1,1,1,1]
-
-    #Get frame section properties
-    frsecdict = doc.Dictionaries.Item("FrSecProp")
-    icount = frsecdict.Count
-
-    '''
-    Typical Values
-    val[0]=label, val[1]=section shape, val[2]=material, val[3]=section type, val[4]=depth or diameter
-    val[5]=breadth or radius, val[6]=unit weight
-    '''
-    for i in range(0,icount):
-        frsecXRecord = frsecdict.Item(i)
-        frsecHandle = frsecXRecord.ObjectID
-        dxfgrcd, val = XRecord_return_1(docname,frsecHandle,7)
-        propfr = myModel.PropFrame
-
-        if str(val[1]) == "Rec":
-            ret = propfr.SetRectangle(str(val[0]),str(val[2]),val[4],val[5])
-            if str(val[3]) == "Beam":
-                ret = propfr.SetRebarBeam(str(val[0]),"A615Gr60","A615Gr60",0.06,0.06,0,0,0,0)
-                ret = propfr.SetModifiers(str(val[0]),beammod)
-            elif str(val[3]) == "Column":
-                ret = propfr.SetRebarColumn(str(val[0]),"A615Gr60","A615Gr60",1,1,0.04,0,3,5,"#20","#10",0.015,0,0,False)
-                ret = propfr.SetModifiers(str(val[0]),colmod)
-        if str(val[1]) == "Circular":
-            ret = propfr.SetCircle(str(val[0]),str(val[2]),str(val[4]))
-            if str(val[3]) == "Beam":
-                ret = propfr.SetRebarBeam(str(val[0]),"A615Gr60","A615Gr60",0.06,0.06,0,0,0,0)
-                ret = propfr.SetModifiers(str(val[0]),beammod)
-            elif str(val[3]) == "Column":
-                ret = propfr.SetRebarColumn(str(val[0]),"A615Gr60","A615Gr60",1,1,0.04,0,3,5,"#20","#10",0.015,0,0,False)
-                ret = propfr.SetModifiers(str(val[0]),colmod)
-
-    #Get slab section properties
-    propslab = myModel.PropArea
-    slabsecpropdict = doc.Dictionaries.Item("SlabSecProp")
-    icount = slabsecpropdict.Count
-
-    SLAB = 0
-    DROP = 1
-    SHELLTHIN = 1
-    SHELLTHICK = 2
-    MEMBRANE_ETABS = 3
-    MEMBRANE_SAP = 5
-
-    '''
-    Typical values:-
-    val[0]=label, val[1]=material, val[2]=Etabs thickness, val[3]=SAP2000 thickness, val[4]=unit weight
-    '''
-    for i in range(0,icount):
-        slabsecXRecord = slabsecpropdict.Item(i)
-        slabsecHandle = slabsecXRecord.ObjectID
-        dxfgrcd, val = XRecord_return_1(docname,slabsecHandle,5)
-
-        if modtypes == 'Egyptian Standard' and program == "SAP2000" and swm == '0':
-            thk = val[3]
+
+    #Pipelined objects overlap AutoCAD's reading of the elements with their drawing, a .dxf file or a recording is read at once
+    pipelined = emission == 'Pipelined objects' and not isinstance(doc,DxfDrawing) and not recorddir
+    if emission == 'Pipelined objects' and not pipelined:
+        emission = 'API objects'
+
+    #A drawing that is unchanged since its last import is opened from its snapshot [snapshot.py] instead of being read again,
+    #an AutoCAD document is unchanged only if it's saved [its file is the drawing]
+    docname = doc.path if isinstance(doc,DxfDrawing) else doc.FullName
+    snappath = snapshotPath(docname)
+    model = stamp = None
+    if not pipelined and not recorddir and (isinstance(doc,DxfDrawing) or doc.Saved):
+        stamp = drawingStamp(docname)
+    if stamp != None:
+        with stage("snapshot"):
+            model = loadSnapshot(snappath,stamp)
+    snapshotted = model != None
+
+    #Read the whole drawing into the import model, before anything is written to the model
+    with stage("extraction"):
+        if model != None:
+            print "The drawing is unchanged since its last import, it's opened from its snapshot"
+        elif isinstance(doc,DxfDrawing):
+            model = extractDxf(doc,None) #AutoCAD isn't needed for .dxf files, large ones are read by all CPUs
         else:
-            thk = val[2]
+            try:
+                with stage("xrecords"):
+                    xrecs = XRecord_readall(docname) #all the needed XRecords, keyed by their Object IDs
+            except BackendError as e:
+                showerror(title=progname,message="Can't load Excel's facilitator workbook\n%s" % e)
+                return
+            if recorddir:
+                #record every access to the document, the cache is skipped so every element is read through AutoCAD
+                recorder = AcadRecorder(lisppath)
+                recorder.xrecs = getattr(xrecs,'records',xrecs) #the ones read one by one are kept while they're read
+                model = extractDocument(recorder.wrap(doc),xrecs,lisppath)
+                path = recorder.save(recordingPath(recorddir,docname))
+                print "%d AutoCAD accesses recorded at %s" % (recorder.naccesses(),path)
+            else:
+                if pipelined and isinstance(xrecs,XRecordReader):
+                    #the XRecords read one by one are read through Excel at this thread only
+                    print "The XRecords are read one by one, the drawing is imported as API objects instead of pipelined objects"
+                    pipelined = False
+                    emission = 'API objects'
+                if pipelined:
+                    #only the definitions and the geometry are read now, the elements' extension dictionaries are read while drawing
+                    geometry = geometryModel(current().wrap(doc,'AutoCAD'),xrecs,lisppath)
+                    if geometry == None:
+                        showerror(title=progname,message="AutoCAD didn't dump the drawing's geometry\nImport it in another way and try again")
+                        return
+                    model, dump = geometry
+                    if hasStiffLines(dump):
+                        #the walls' panels are made with the whole model, so the drawing is read at once and imported as API objects
+                        print "The drawing has walls' stiff lines, it's imported as API objects instead of pipelined objects"
+                        pipelined = False
+                        emission = 'API objects'
+                if not pipelined:
+                    cache = ExtractionCache(docname) #elements of the last import of this drawing, only changed ones are read again
+                    model = extractDocument(current().wrap(doc,'AutoCAD'),xrecs,lisppath,cache)
+                    try:
+                        cache.save()
+                    except (IOError, OSError):
+                        pass #the import doesn't need the cache
+                    print cache.report()
+    if stamp != None and not snapshotted:
+        try:
+            with stage("snapshot"):
+                saveSnapshot(model,snappath,stamp)
+            evict(os.path.dirname(snappath))
+        except (IOError, OSError):
+            pass #the import doesn't need the snapshot
+    if pipelined:
+        return runPipelined(doc,docname,xrecs,model,dump,EtabsObj,program,swm,modtypes,wallcrk,slabmode,colyr)
+    #Collect every problem of the drawing before anything is written, all of them are written next to the drawing
+    with stage("validation"):
+        issues = validateModel(model,colyr)
+    if issues:
+        message = formatIssues(issues)
+        try:
+            message += "\nAll of them are at %s" % writeIssues(issues,issuesPath(docname))
+        except (IOError, OSError):
+            pass
+        showerror(title=progname,message=message + "\nCheck your AutoCAD drawing and try again")
+        return
 
+    #Divide the walls drawn by their stiff lines into panels
+    with stage("walls"):
+        nwalls, npanels = panelizeWalls(model)
+    if nwalls:
+        print "%d walls divided into %d panels" % (nwalls,npanels)
+
+    #Check the geometry: near-miss ends, zero-length, degenerate and duplicate elements are fixed only if the user agrees,
+    #non-planar 3dfaces are only reported
+    with stage("geometry"):
+        defects = checkGeometry(model)
+    if defects.count():
+        issues = defects.issues()
+        try:
+            where = "\nAll of them are at %s" % writeIssues(issues,geometryPath(docname))
+        except (IOError, OSError):
+            where = ""
+        if defects.fixable():
+            if not askyesno(title=progname,message=formatIssues(issues) + where + "\nFix them and continue?"):
+                return
+            with stage("geometry fix"):
+                nsnapped, nremoved = fixGeometry(model)
+            print "Geometry: %d ends snapped, %d elements removed" % (nsnapped,nremoved)
+        warnings = [issue for issue in issues if issue.kind in WARNINGS]
+        if warnings:
+            print "Geometry warning: " + formatIssues(warnings,3).replace('\n','; ') + where.replace('\n','; ')
+
+    #Split the lines where they meet other lines or the edges of 3dfaces, every segment becomes a member
+    with stage("splitting"):
+        nlines, nsegments = splitFrames(model)
+    if nlines:
+        print "%d lines split into %d members" % (nlines,nsegments)
+
+    #Find the stories from the levels of all vertices, and tag every element with its story
+    with stage("stories"):
+        assignStories(model)
+
+    myModel = current().wrap(EtabsObj.SapModel,'SapModel') #its calls are counted if the import is profiled
+    statepath = stateFile(docname,program) #names of the elements of the last import, by their handles
+    state = None
+    if emission == 'Model file':
+        #Write the whole model to a text model file next to the drawing, then open it in one step
+        with stage("model file"):
+            modelpath = writeModelFile(model,modelFilePath(docname,program),program,swm,modtypes,wallcrk,slabmode)
+        with stage("open model file"):
+            ret = myModel.File.OpenFile(modelpath)
+    elif emission == 'API objects':
+        #initilaize the model
+        with stage("new model"):
+            myUnit = 6 #kN_m_C
+            myModel.InitializeNewModel(myUnit)
+            ret = myModel.File.NewBlank()
+
+        #Define materials, load patterns, section properties, piers and spandrels
+        emitDefinitions(model,myModel,program,swm,modtypes,wallcrk,slabmode)
         if program == "ETABS":
-            ret = propslab.SetSlab(str(val[0]),SLAB,SHELLTHIN,str(val[1]),thk)
-        elif program == "SAP2000":
-            ret = propslab.SetShell_1(str(val[0]),SHELLTHIN,True,str(val[1]),0,thk,thk)
-        ret = propslab.SetModifiers(str(val[0]),slabmod)
-
-    #Get wall section properties [at SAP2000 they will be defined as slab sections]
-    wallsecpropdict = doc.Dictionaries.Item("WallSecProps")
-    icount = wallsecpropdict.Count
-
-    '''
-    Typical values:-
-    val[0]=label, val[1]=thickness, val[2]=material
-    '''
-    for i in range(0,icount):
-        wallsecXRecord = wallsecpropdict.Item(i)
-        wallsecHandle = wallsecXRecord.ObjectID
-        dxfgrcd, val = XRecord_return_1(docname,wallsecHandle,3)
-
+            with stage("base level"):
+                defineStories(model,myModel) #all stories at once, the lowest level is the base
+
+        #Draw lines, 3DFaces and points, the columns' layer first
+        with stage("objects"):
+            emitObjects(model,myModel,program,swm,colyr)
+    elif emission == 'Changes only':
+        #Keep the open model, and only send the lines, 3DFaces and points that changed since the last import
+        state = loadState(statepath)
+        if state == None:
+            showerror(title=progname,message="This drawing wasn't imported to %s before\nImport it once in another way and try again" % program)
+            return
         if program == "ETABS":
-            ret = propslab.SetWall(str(val[0]),1,SHELLTHIN,str(val[2]),val[1])
-        elif program == "SAP2000":
-            ret = propslab.SetShell_1(str(val[0]),MEMBRANE_SAP,True,str(val[2]),0,val[1],val[1])
-        ret = propslab.SetModifiers(str(val[0]),wallmod)
-
-    #Get Pier IDs
-    if program == "ETABS":
-        pieriddict = doc.Dictionaries.Item("PierIDs")
-        icount = pieriddict.Count
-
-        for i in range(0,icount):
-            pieridXRecord = pieriddict.Item(i)
-            pieridHandle = pieridXRecord.ObjectID
-            dxfgrcd, val = XRecord_return_1(docname,pieridHandle,1)
-
-            ret = myModel.PierLabel.SetPier(str(val[0]))
-
-    #Get Spandrel IDs
-        spandiddict = doc.Dictionaries.Item("SpandralIDs")
-        icount = spandiddict.Count
-
-        for i in range(0,icount):
-            spandidXRecord = spandiddict.Item(i)
-            spandidHandle = spandidXRecord.ObjectID
-            dxfgrcd, val = XRecord_return_1(docname,spandidHandle,1)
+            missing = missingStories(model,myModel)
+            if missing:
+                showerror(title=progname,message="The drawing has levels that aren't stories of the open model: %s\nImport it in another way and try again" % ', '.join('%g' % z for z in missing))
+                return
+        emitDefinitions(model,myModel,program,swm,modtypes,wallcrk,slabmode)
+        with stage("changes"):
+            state, counts = emitDelta(model,myModel,program,swm,state)
+        for kind in ['frame','area','point']:
+            print "%s: %d added, %d deleted, %d modified" % ((kind,) + counts[kind])
+    else:
+        #Keep the open model, add the definitions then send joints, lines, 3DFaces, points, groups and loads as database tables
+        #[SAP2000 only, see TABLE_PROGRAMS]
+        emitDefinitions(model,myModel,program,swm,modtypes,wallcrk,slabmode)
+        with stage("database tables"):
+            failed, nfatal, nerror, log = emitTables(model,myModel,program,swm)
+        if failed or nfatal:
+            showerror(title=progname,message="%s couldn't apply the model's tables\n%s" % (program,'\n'.join(failed) or log))
+            return
 
-            ret = myModel.SpandrelLabel.SetSpandrel(str(val[0]),False)
+    #Keep the names of the elements for the next import of changes only [ETABS renames the elements of .e2k files]
+    if emission != 'Model file' or program == "SAP2000":
+        with stage("import state"):
+            if state == None:
+                state = stateFromModel(model,program,swm)
+            try:
+                saveState(state,statepath)
+            except (IOError, OSError):
+                pass
 
-    #From the columns' layer, get base level, then draw the columns (frames and walls)
-    if colyr != 'None' and program == "ETABS":
-        collayer = doc.Layers.Item(colyr)
-        try:
-            sscolyr = doc.SelectionSets.Add("ColumnsLayer")
-            sshlyr = doc.SelectionSets.Add("ShWallLayer")
-        except:
-            sscolyr = doc.SelectionSets.Item("ColumnsLayer")
-            sshlyr = doc.SelectionSets.Item("ShWallLayer")
-        SELECT_ALL = 5
-        ftype = array.array('h',[0,8]) #DXF of layers
-        fdata = ['LINE',colyr] #columns' layer
-
-        sscolyr.Select(SELECT_ALL,(0,0,0),(0,0,0),ftype,fdata)
-        icount = sscolyr.Count
-        for i in range(0,icount):
-            elem = sscolyr.Item(i)
-            
-            sp = elem.StartPoint
-            ep = elem.EndPoint
-            if i == 0:
-                baselevel = sp[2] #initialize baselevel from a valid (not hypothetical) value
-            baselevel = min(sp[2],ep[2],baselevel)
+    with stage("view refresh"):
+        ret = myModel.View.RefreshView(0,True)
+    showinfo(title=progname,message="Work is Done!") #importing is successful
 
+#The pipelined import of an AutoCAD document: model is its geometry, its elements are read and drawn at the same time
+#The whole drawing is validated before its first element is drawn; the lines aren't split where they meet, and defects of
+#the geometry stop the import as the pipeline draws the elements as they are
+def runPipelined(doc,docname,xrecs,model,dump,EtabsObj,program,swm,modtypes,wallcrk,slabmode,colyr):
+    with stage("geometry"):
+        defects = checkGeometry(model)
+    if defects.count():
+        issues = defects.issues()
         try:
-            if baselevel == None:
-                pass
-        except:
-            baselevel = None
-            
-        #get baselevel from Faces (if exist), it's user's responsibility to choose a layer of walls
-        #sscolyr.Clear()
-        fdata = ['3DFACE',colyr]
-        sshlyr.Select(SELECT_ALL,(0,0,0),(0,0,0),ftype,fdata)
-        icount = sshlyr.Count
-        for i in range(0,icount):
-            elem = sshlyr.Item(i)
-
-            V1 = elem.Coordinate(0)
-            V2 = elem.Coordinate(1)
-            V3 = elem.Coordinate(2)
-            V4 = elem.Coordinate(3)
-
-            if i == 0 and baselevel == None:
-                baselevel = V1[2]
-            baselevel = min(V1[2],V2[2],V3[2],V4[2],baselevel)
-        try:
-            myModel.Story.SetElevation("Base",baselevel)
-        except:
-            showerror(title=progname,message="Columns Layer has no column!\nClose the generated model and try again")
-            return
-        
-        retprog = drawlines(docname,sscolyr,colyr,myModel,program,swm,False) #draw the currently selected lines
-        if retprog == 0:
+            where = "\nAll of them are at %s" % writeIssues(issues,geometryPath(docname))
+        except (IOError, OSError):
+            where = ""
+        if defects.fixable():
+            showerror(title=progname,message=formatIssues([issue for issue in issues if issue.kind not in WARNINGS]) + where + "\nPipelined objects can't fix them, fix the drawing or import it as API objects")
             return
-        retprog = drawFaces(doc,docname,sshlyr,colyr,myModel,program,swm,False) #draw the currently selected Faces
-        if retprog == 0:
-            return
-        sscolyr.Delete()
-        sshlyr.Delete()
+        print "Geometry warning: " + formatIssues(issues,3).replace('\n','; ') + where.replace('\n','; ')
 
-    #Draw the rest of lines and 3DFaces
-    try:
-        lines = doc.SelectionSets.Add("Frames")
-        Faces = doc.SelectionSets.Add("Shells")
-        Points = doc.SelectionSets.Add("Points")
-    except:
-        #the "try .. except" is to insure using the same selection set among multiple sessions without error
-        lines = doc.SelectionSets.Item("Frames")
-        Faces = doc.SelectionSets.Item("Shells")
-        Points = doc.SelectionSets.Item("Points")
-    icount = doc.Layers.Count
-    for i in range(0,icount):
-        layer = doc.Layers.Item(i)
-        layername = layer.Name
-
-        if layername != colyr:
-            retprog = drawlines(docname,lines,layername,myModel,program,swm,True)
-            if retprog == 0:
-                return
-            retprog = drawFaces(doc,docname,Faces,layername,myModel,program,swm,True)
-            if retprog == 0:
-                return
-            drawPoints(docname,Points,layername,myModel,True)
+    with stage("stories"):
+        assignStories(model)
 
-    ret = myModel.View.RefreshView(0,True)
-    showinfo(title=progname,message="Work is Done!") #importing is successful
+    myModel = current().wrap(EtabsObj.SapModel,'SapModel')
+    with stage("new model"):
+        myUnit = 6 #kN_m_C
+        myModel.InitializeNewModel(myUnit)
+        ret = myModel.File.NewBlank()
+    emitDefinitions(model,myModel,program,swm,modtypes,wallcrk,slabmode)
+    if program == "ETABS":
+        with stage("base level"):
+            defineStories(model,myModel)
 
-#A utility function to draw lines from a given layer and a selection set to be used
-#Specify if the selection set must be cleared or not
-def drawlines(docname,sslines,layer,sapmodel,program,swm,clear=True):
-    grname = layer + '_' + 'LINES'
-
-    ret = sapmodel.GroupDef.SetGroup(grname,-1,True,True,True,True,True,True,True,True,False,False,True) #create a group for this layer
-    ftype = array.array('h',[0,8])
-    fdata = ['LINE',layer]
-    SELECT_ALL = 5
-    if clear:
-        sslines.Clear()
-        sslines.Select(SELECT_ALL,(0,0,0),(0,0,0),ftype,fdata)
-    icount = sslines.Count
-    for i in range(0,icount):
-        elem = sslines.Item(i)
-        elemname = layer + '_Fr ' + str(i)
-        sp = elem.StartPoint
-        ep = elem.EndPoint
-
-        elemxdict = elem.GetExtensionDictionary()
-        try:
-            elemdistloads = elemxdict.Item("DistLoads") #this is a dictionary of all assigned loads
-            jcount = elemdistloads.Count
-        except:
-            pass #assignment of distributed loads is not mandatory any more 
-        try:
-            elemsecprop = elemxdict.Item("SecProp") #this is an XRecord of the section property
-        except:
-            showerror(title=progname,message="There exist line(s) with no assigned section property\nCheck your AutoCAD drawing,\nClose the generated model and try again")
-            return 0 #failed
-        secpropHandle = elemsecprop.ObjectID
-        dxfgrcd,valprop = XRecord_return_1(docname,secpropHandle,1)
-        '''
-        Typical values:-
-        valprop[0]=section property name
-        '''
-        ret = sapmodel.FrameObj.AddByCoord(sp[0],sp[1],sp[2],ep[0],ep[1],ep[2],elemname,valprop[0],elemname,"Global") #add by coordinate
-        ret = sapmodel.FrameObj.SetGroupAssign(elemname,grname,False,0) #assign to its special group
-        
-        #assign distributed load, but consider that it's not mandatory to be assigned at the drawing
-        try:
-            for j in range(0,jcount):
-                elemload = elemdistloads.Item(j)
-                elemloadHandle = elemload.ObjectID
-                dxfgrcd,vaload = XRecord_return_1(docname,elemloadHandle,4)
-                if int(vaload[2]) in [1,2,3]:
-                    cs = "Local"
-                else:
-                    cs = "Global"
-                '''
-                Typical values:-
-                vaload[0]=start value, vaload[1]=end value, vaload[2]=direction, vaload[3]=load pattern
-                '''
-                if str(vaload[3]) == "Dead":
-                    if swm == '0':
-                        if program == "ETABS":
-                            ret = sapmodel.FrameObj.SetLoadDistributed(elemname,"Dead",1,int(vaload[2]),0,1,vaload[0],vaload[1],cs,True,True,0)
-                        elif program == "SAP2000":
-                            if vaload[2] == 6:
-                                ret = sapmodel.FrameObj.SetLoadDistributed(elemname,"DEAD",1,10,0,1,vaload[0],vaload[1],cs,True,True,0)
-                            elif vaload[2] == 9:
-                                ret = sapmodel.FrameObj.SetLoadDistributed(elemname,"DEAD",1,11,0,1,vaload[0],vaload[1],cs,True,True,0)
-                            else:
-                                ret = sapmodel.FrameObj.SetLoadDistributed(elemname,"DEAD",1,int(vaload[2]),0,1,vaload[0],vaload[1],cs,True,True,0)
-                    elif swm == '1':
-                        continue
-                elif str(vaload[3]) == "Live":
-                    if program == "ETABS":
-                        ret = sapmodel.SetLoadDistributed(elemname,"Live",int(vaload[2]),0,1,vaload[0],vaload[1],cs,True,True,0)
-                    elif program == "SAP2000":
-                        if vaload[2] == 6:
-                            ret = sapmodel.FrameObj.SetLoadDistributed(elemname,"LIVE",1,10,0,1,vaload[0],vaload[1],cs,True,True,0)
-                        elif vaload[2] == 9:
-                            ret = sapmodel.FrameObj.SetLoadDistributed(elemname,"LIVE",1,11,0,1,vaload[0],vaload[1],cs,True,True,0)
-                        else:
-                            ret = sapmodel.FrameObj.SetLoadDistributed(elemname,"LIVE",1,int(vaload[2]),0,1,vaload[0],vaload[1],cs,True,True,0)
-                else:
-                    if program == "ETABS":
-                        ret = sapmodel.FrameObj.SetLoadDistributed(elemname,str(vaload[3]),1,int(vaload[2]),0,1,vaload[0],vaload[1],cs,True,True,0)
-                    elif program == "SAP2000" and str(vaload[3]) != "DEAD":
-                        if vaload[2] == 6:
-                            ret = sapmodel.FrameObj.SetLoadDistributed(elemname,str(vaload[3]),1,10,0,1,vaload[0],vaload[1],cs,True,True,0)
-                        elif vaload[2] == 9:
-                            ret = sapmodel.FrameObj.SetLoadDistributed(elemname,str(vaload[3]),1,11,0,1,vaload[0],vaload[1],cs,True,True,0)
-                        else:
-                            ret = sapmodel.FrameObj.SetLoadDistributed(elemname,str(vaload[3]),1,int(vaload[2]),0,1,vaload[0],vaload[1],cs,True,True,0)
-                
-        except:
-            pass
-    return 1 #passed
-
-#A utility function to draw 3Faces from a given layer and a selection set to be used
-def drawFaces(doc,docname,sslines,layer,sapmodel,program,swm,clear=True):
-    grname = layer + '_' + 'Shells'
-
-    ret = sapmodel.GroupDef.SetGroup(grname,-1,True,True,True,True,True,True,True,True,False,False,True) #create a group for this layer
-    ftype = array.array('h',[0,8])
-    fdata = ['3DFACE',layer]
-    SELECT_ALL = 5
-    if clear:
-        sslines.Clear()
-        sslines.Select(SELECT_ALL,(0,0,0),(0,0,0),ftype,fdata)
-    icount = sslines.Count
-    for i in range(0,icount):
-        elem = sslines.Item(i)
-        elemname = layer + '_Sh ' + str(i)
-        V1 = elem.Coordinate(0)
-        V2 = elem.Coordinate(1)
-        V3 = elem.Coordinate(2)
-        V4 = elem.Coordinate(3)
-
-        elemX = [V1[0],V2[0],V3[0],V4[0]]
-        elemY = [V1[1],V2[1],V3[1],V4[1]]
-        elemZ = [V1[2],V2[2],V3[2],V4[2]]
-
-        elemxdict = elem.GetExtensionDictionary()
-        try:
-            elemdistload = elemxdict.Item("DistLoads") #this is a dictionary of distributed loads
-        except:
-            try:
-                elemdistload = elemxdict.Item("WallDistLoads")
-            except:
-                pass #assignment of distributed load is not mandatory any more
-        
-        try:
-            elemsecprop = elemxdict.GetObject("SecProp") #this is an XRecord of slab's section property [make AutoCAD assigns them to walls of in-draw-shw then return to here]
-            elemtype = "slab"
-        except:
+    #AutoCAD and ETABS/SAP2000 are reached again at the pipeline's threads, every thread has its own COM apartment
+    cache = ExtractionCache(docname)
+    try:
+        with stage("pipelined objects"):
+            model, pipeline = streamImport(model,dump,xrecs,program,swm,lambda: connectDocument(docname),
+                                           lambda: current().wrap(connectSapModel(program),'SapModel'),colyr,cache)
+    except PipelineError as e:
+        message = str(e)
+        if e.issues:
             try:
-                elemsecprop = elemxdict.GetObject("WallProp")
-                elemtype = "wall"
-            except:
-                showerror(title=progname,message="There exist shell(s) with no assigned section property\nCheck your AutoCAD drawing,\nClose the generated model and try again")
-                return 0 #failed
-        
-        #secpropHandle = elemsecprop.Handle
-        secpropobjid = elemsecprop.ObjectID #debugging trial
-        
-        #dxfgrcd, valprop = XRecord_return(docname,secpropHandle,1) #produces error unknown handle, it seems that HandleToObject AutoCAD's method contains a bug
-        dxfgrcd, valprop = XRecord_return_1(docname,secpropobjid,1) #debugging trial
-        
-        '''
-        Typical values:-
-        val[0] = section property
-        '''
-        ret = sapmodel.AreaObj.AddByCoord(4,elemX,elemY,elemZ,elemname,str(valprop[0]),elemname) #add by coordinates
-        ret = sapmodel.AreaObj.SetGroupAssign(elemname,grname,False,0)
-        #Assign distributed loads
-        #elemtype = slabORwall(str(valprop[0]),doc)
-        try:
-            jcount = elemdistload.Count
-            for j in range(0,jcount):
-                distload = elemdistload.Item(j)
-                #distloadHandle = distload.Handle
-                distloadobjid = distload.ObjectID
-                #dxfgrcd, vaload = XRecord_return(docname,str(distloadHandle),3)
-                dxfgrcd, vaload = XRecord_return_1(docname,distloadobjid,3) #debugging trial
-                if int(vaload[1]) in [1,2,3]:
-                    cs = "Local"
-                else:
-                    cs = "Global"
-                '''
-                Typical values:-
-                vaload[0]=load value, vaload[1]=direction, vaload[2]=load pattern
-                '''
-                if str(vaload[2]) == "Dead":
-                    if swm == '0':
-                        if program == "ETABS" and elemtype == "slab":
-                            ret = sapmodel.AreaObj.SetLoadUniform(elemname,"Dead",vaload[0],int(vaload[1]),True,cs,0)
-                        elif program == "SAP2000" and elemtype == "slab":
-                            if vaload[1] == 6:
-                                ret = sapmodel.AreaObj.SetLoadUniform(elemname,"DEAD",vaload[0],10,True,cs,0)
-                            elif vaload[1] == 9:
-                                ret = sapmodel.AreaObj.SetLoadUniform(elemname,"DEAD",vaload[0],11,True,cs,0)
-                            else:
-                                ret = sapmodel.AreaObj.SetLoadUniform(elemname,"DEAD",vaload[0],int(vaload[1]),True,cs,0)
-                        elif elemtype == "wall":
-                            continue
-                    elif swm == '1':
-                        continue
-                if str(vaload[2]) == "Live":
-                    if program == "ETABS":
-                        ret = sapmodel.AreaObj.SetLoadUniform(elemname,"Live",vaload[0],int(vaload[1]),True,cs,0)
-                    elif program == "SAP2000":
-                        if vaload[1] == 6:
-                            ret = sapmodel.AreaObj.SetLoadUniform(elemname,"LIVE",vaload[0],10,True,cs,0)
-                        elif vaload[1] == 9:
-                            ret = sapmodel.AreaObj.SetLoadUniform(elemname,"LIVE",vaload[0],11,True,cs,0)
-                        else:
-                            ret = sapmodel.AreaObj.SetLoadUniform(elemname,"LIVE",vaload[0],int(vaload[1]),True,cs,0)
-                else:
-                    if program == "ETABS":
-                        ret = sapmodel.AreaObj.SetLoadUniform(elemname,str(vaload[2]),vaload[0],int(vaload[1]),True,cs,0)
-                    elif program == "SAP2000":
-                        if vaload[1] == 6:
-                            ret = sapmodel.AreaObj.SetLoadUniform(elemname,str(vaload[2]),vaload[0],10,True,cs,0)
-                        elif vaload[1] == 9:
-                            ret = sapmodel.AreaObj.SetLoadUniform(elemname,str(vaload[2]),vaload[0],11,True,cs,0)
-                        else:
-                            ret = sapmodel.AreaObj.SetLoadUniform(elemname,str(vaload[2]),vaload[0],int(vaload[1]),True,cs,0)
-        except:
-            pass #assignment of distributed load is not mandatory any more
-        #Assign Pier ID
-        try:
-            elempierid = elemxdict.Item("PierID")
-            #pieridHandle = elempierid.Handle
-            pieridobjid = elempierid.ObjectID
-            #dxfgrcd, val = XRecord_return(docname,pieridHandle,1)
-            dxfgrcd, val = XRecord_return_1(docname,pieridobjid,1) #debugging trial
-            if str(val[0]) != "None":
-                ret = sapmodel.AreaObj.SetPier(elemname,str(val[0]),0)
-        except:
-            pass
+                message += "\nAll of them are at %s" % writeIssues(e.issues,issuesPath(docname))
+            except (IOError, OSError):
+                pass
+        showerror(title=progname,message=message + "\nCheck your AutoCAD drawing and try again")
+        return
+    print pipeline.report()
+    try:
+        cache.save()
+    except (IOError, OSError):
+        pass
+    print cache.report()
 
-        #Assign Spandrel ID
+    with stage("import state"):
         try:
-            elemspandid = elemxdict.Item("SpandralID")
-            #spandidHandle = elemspandid.Handle
-            spandidobjid = elemspandid.ObjectID
-            #dxfgrcd, val = XRecord_return(docname,spandidHandle,1)
-            dxfgrcd, val = XRecord_return_1(docname,spandidobjid,1) #debugging trial
-            if str(val[0]) != "None":
-                ret = sapmodel.AreaObj.SetSpandrel(elemname,str(val[0]),0)
-        except:
+            saveState(stateFromModel(model,program,swm),stateFile(docname,program))
+        except (IOError, OSError):
             pass
 
-    return 1 #passed     
+    with stage("view refresh"):
+        ret = myModel.View.RefreshView(0,True)
+    showinfo(title=progname,message="Work is Done!")
 
 #A utility function that determines if the shell element belongs to a slab or a wall
 def slabORwall(secprop,doc):
@@ -871,38 +654,6 @@ def slabORwall(secprop,doc):
         except:
             return "slab"
 
-#A utility function to draw points and assign their restrains
-def drawPoints(docname,sslines,layer,sapmodel,clear=True):
-    grname = layer + '_' + 'POINTS'
-
-    ret = sapmodel.GroupDef.SetGroup(grname,-1,True,True,True,True,True,True,True,True,False,False,True) #create a group for this layer
-    ftype = array.array('h',[0,8])
-    fdata = ['POINT',layer]
-    SELECT_ALL = 5
-    if clear:
-        sslines.Clear()
-        sslines.Select(SELECT_ALL,(0,0,0),(0,0,0),ftype,fdata)
-    icount = sslines.Count
-    for i in range(0,icount):
-        elem = sslines.Item(i)
-        elemname = layer + '_Po ' + str(i)
-        coord = elem.Coordinates
-
-        try:
-            elemxdict = elem.GetExtensionDictionary()
-            xrestrain = elemxdict.Item("Restrain")
-            ret = sapmodel.PointObj.AddCartesian(coord[0],coord[1],coord[2],elemname,elemname,"Global",False,0)
-            ret = sapmodel.PointObj.SetGroupAssign(elemname,grname,False,0)
-            xrestrainHandle = xrestrain.ObjectID
-            dxfgrcd, val = XRecord_return_1(docname,xrestrainHandle,1)
-            if val[0] == 'Hinged':
-                restrain = [True,True,True,False,False,False]
-            elif val[0] == 'Fixed':
-                restrain = [True,True,True,True,True,True]
-            ret = sapmodel.PointObj.SetRestraint(elemname,restrain,0)
-        except:
-            pass #assignment of restrain type is not mandatory anymore
-
 #The function that imports from SAP2000
 
 #def SAPImport(doc):
@@ -918,24 +669,10 @@ def drawPoints(docname,sslines,layer,sapmodel,clear=True):
 #    print "Vals[1]= ", str(vals[0])
 #    print "__________"
     
-#A utility function that takes the handle of an XRecord and its data size, and return its data and dxf group codes
-def XRecord_return(namefile,handle,size):
-    xl.Range["A1"].Value[xlRangeValueDefault] = namefile
-    xl.Range["A2"].Value[xlRangeValueDefault] = handle
-    xl.Application.Run("facilitate.xlsm!import_sap_etabs.text")
-
-    dxfgrcd = []
-    vals = []
-    for i in range(0,size):
-        CellB = 'B' + str(i+1)
-        CellC = 'C' + str(i+1)
-        dxfgrcd.append(xl.Range[CellB].Value[xlRangeValueDefault])
-        vals.append(xl.Range[CellC].Value[xlRangeValueDefault])
-
-    return dxfgrcd,vals
-
 #A utility function that takes the Object ID of an XRecord and its data size, and return its data and dxf group codes
+@counted("Excel.XRecord_return_1")
 def XRecord_return_1(namefile,objid,size):
+    xl = backends.excel.get()
     xl.Range["A1"].Value[xlRangeValueDefault] = namefile
     xl.Range["A2"].Value[xlRangeValueDefault] = objid
     xl.Application.Run("facilitate.xlsm!import_sap_etabs.getfromid")
@@ -950,6 +687,21 @@ def XRecord_return_1(namefile,objid,size):
 
     return dxfgrcd,vals
 
+#A utility function that reads all the structural XRecords of a document in one Excel/VBA round trip, and returns them keyed by their Object IDs
+#A facilitate.xlsm without the "dumpxrecords" macro [see facilitate.txt] reads them one by one instead [XRecordReader]
+@counted("Excel.XRecord_readall")
+def XRecord_readall(namefile):
+    try:
+        return readAllXRecords(backends.excel.get(),xlRangeValueDefault,namefile)
+    except COMError:
+        print "facilitate.xlsm has no \"dumpxrecords\" macro, the XRecords are read one by one; update it from facilitate.txt"
+        return XRecordReader(lambda objid, size: XRecord_return_1(namefile,objid,size))
+
+#Print the startup-time report: import, backends' connections and GUI ready
+def reportStartup():
+    startup.mark("GUI ready")
+    print startup.report()
+
 #Construct the program itself
 def main():
     
@@ -958,8 +710,10 @@ def main():
     Pmw.initialise(root)
     #supply all buttons' functions to MYWINDOW
     app = MYWINDOW()
+    root.after_idle(reportStartup) #once the window is shown
     root.mainloop()
 
 #Execute the program
 if __name__ == '__main__':
+    multiprocessing.freeze_support() #the processes of large .dxf files
     main()
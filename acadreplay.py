@@ -0,0 +1,294 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- A recorder of the AutoCAD side of an import: every property read and method call made on the document, and the objects
+reached from it, with the returned values (or raised errors), the files written by geomdump.lsp and the document's XRecords
+2- A compact recording file [gzipped pickle]
+3- A replay of a recording that serves the same responses without AutoCAD, and a driver that runs the extraction on it
+
+Usage of the driver:-
+python acadreplay.py RECORDING [--repeat N] [--top N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import gzip
+import numbers
+import os
+import pickle
+import re
+import sys
+import time
+
+from extract import extractDocument, GEOM_TIMEOUT
+
+RECORDING_VERSION = 1
+RECORDING_EXT = '.acrec'
+DUMP_EXTS = ['.ids','.geo'] #files of "dump-geom" [geomdump.lsp], in the order they are written
+
+try:
+    STRING_TYPES = (str,unicode)
+except NameError:
+    STRING_TYPES = (str,bytes)
+
+class ReplayMiss(KeyError):
+    pass
+
+#An error that was raised by AutoCAD while recording, raised again by the replay
+class ReplayedError(Exception):
+    pass
+
+#A utility function that returns the recording file of a drawing in a directory
+def recordingPath(directory,drawingpath):
+    name = os.path.splitext(os.path.basename(drawingpath))[0]
+    return os.path.join(directory,name + RECORDING_EXT)
+
+def _isPrimitive(value):
+    if value is None or isinstance(value,STRING_TYPES + (numbers.Number,)):
+        return True
+    if isinstance(value,(tuple,list)):
+        return all(_isPrimitive(v) for v in value)
+    return False
+
+#A utility function that tells a method from a COM object [comtypes' dispatch objects are callable too]
+def _isMethod(value):
+    return callable(value) and not hasattr(value,'_comobj') and not isinstance(value,(RecordingProxy,ReplayProxy))
+
+#A utility function that converts arguments to hashable plain values
+def _plain(value):
+    if isinstance(value,(RecordingProxy,ReplayProxy)):
+        return ('obj',value._oid)
+    if isinstance(value,STRING_TYPES) or not hasattr(value,'__iter__'):
+        return value
+    return tuple(_plain(v) for v in value)
+
+#A utility function that returns the key of an access: the object, property or call, the name and the plain arguments
+#Quoted strings of commands are ignored, they have temporary paths
+def _key(oid,kind,name,args):
+    args = _plain(args)
+    if name == 'SendCommand':
+        args = tuple(re.sub(r'"[^"]*"','"*"',a) if isinstance(a,STRING_TYPES) else a for a in args)
+    return (oid,kind,name,args)
+
+#A utility function that returns the base path of the files of "dump-geom" in a command, or None
+def _dumpBase(args):
+    for a in args:
+        if isinstance(a,STRING_TYPES):
+            found = re.search(r'\(dump-geom "([^"]*)"\)',a)
+            if found:
+                return found.group(1)
+    return None
+
+#An AutoCAD object seen through the recorder
+class RecordingProxy(object):
+    def __init__(self,recorder,obj,oid):
+        self.__dict__['_recorder'] = recorder
+        self.__dict__['_obj'] = obj
+        self.__dict__['_oid'] = oid
+
+    def __getattr__(self,name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        obj = self._obj
+        return self._recorder._access(self._oid,'get',name,(),lambda: getattr(obj,name))
+
+    def __call__(self,*args):
+        obj = self._obj
+        return self._recorder._access(self._oid,'call','',args,lambda: obj(*args))
+
+class RecordingMethod(object):
+    def __init__(self,recorder,oid,name,method):
+        self.recorder = recorder
+        self.oid = oid
+        self.name = name
+        self.method = method
+
+    def __call__(self,*args):
+        method = self.method
+        return self.recorder._access(self.oid,'call',self.name,args,lambda: method(*args))
+
+#The recorder: objects are identified by the way they were reached [e.g. doc.Layers.Item(3)], so the replay works
+#whatever the order of the accesses is, the responses of the same access are kept in order
+class AcadRecorder(object):
+    def __init__(self,lisppath=None):
+        self.lisppath = lisppath
+        self.paths = {} #key of the access that reached an object -> its id [the document is 0]
+        self.responses = {} #key of an access -> [encoded results]
+        self.files = {} #key of a "dump-geom" command -> [(extension, data)]
+        self.counts = {} #name -> number of accesses [properties and calls]
+        self.xrecs = {}
+
+    def wrap(self,doc):
+        return RecordingProxy(self,doc,0)
+
+    def _encode(self,key,value):
+        if _isPrimitive(value):
+            return ('v',value), value
+        if _isMethod(value):
+            return ('m',None), RecordingMethod(self,key[0],key[2],value)
+        oid = self.paths.setdefault(key,len(self.paths) + 1)
+        return ('o',oid), RecordingProxy(self,value,oid)
+
+    def _access(self,oid,kind,name,args,fetch):
+        key = _key(oid,kind,name,args)
+        try:
+            value = fetch()
+        except Exception as err:
+            self.counts[name] = self.counts.get(name,0) + 1
+            self.responses.setdefault(key,[]).append(('e','%s: %s' % (type(err).__name__,err)))
+            raise
+        code, value = self._encode(key,value)
+        if code[0] != 'm':
+            self.counts[name] = self.counts.get(name,0) + 1
+        self.responses.setdefault(key,[]).append(code)
+        base = _dumpBase(args) if name == 'SendCommand' else None
+        if base is not None:
+            self._captureDump(key,base)
+        return value
+
+    #Keep the files of "dump-geom", the command runs asynchronously so they are waited for like extract.fetchGeometry does
+    def _captureDump(self,key,base):
+        deadline = time.time() + GEOM_TIMEOUT
+        while not os.path.exists(base + DUMP_EXTS[-1]):
+            if time.time() > deadline:
+                return
+            time.sleep(0.05)
+        files = []
+        for ext in DUMP_EXTS:
+            f = open(base + ext,'rb')
+            try:
+                files.append((ext,f.read()))
+            finally:
+                f.close()
+        self.files[key] = files
+
+    def naccesses(self):
+        return sum(self.counts.values())
+
+    def save(self,path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        f = gzip.open(path,'wb')
+        try:
+            pickle.dump({'version':RECORDING_VERSION,'lisppath':self.lisppath,'responses':self.responses,'files':self.files,
+                         'counts':self.counts,'xrecs':self.xrecs},f,2)
+        finally:
+            f.close()
+        return path
+
+#An AutoCAD object served by the replay
+class ReplayProxy(object):
+    def __init__(self,replay,oid):
+        self.__dict__['_replay'] = replay
+        self.__dict__['_oid'] = oid
+
+    def __getattr__(self,name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self._replay._access(self._oid,'get',name,())
+
+    def __call__(self,*args):
+        return self._replay._access(self._oid,'call','',args)
+
+class ReplayMethod(object):
+    def __init__(self,replay,oid,name):
+        self.replay = replay
+        self.oid = oid
+        self.name = name
+
+    def __call__(self,*args):
+        return self.replay._access(self.oid,'call',self.name,args)
+
+#The replay of a recording, an access that wasn't recorded raises ReplayMiss
+class AcadReplay(object):
+    def __init__(self,path):
+        f = gzip.open(path,'rb')
+        try:
+            data = pickle.load(f)
+        finally:
+            f.close()
+        if data.get('version') != RECORDING_VERSION:
+            raise ValueError("%s is a recording of another version" % path)
+        self.path = path
+        self.lisppath = data['lisppath']
+        self.responses = data['responses']
+        self.files = data['files']
+        self.counts = data['counts']
+        self.xrecs = data['xrecs']
+        self.rewind()
+
+    #Serve the responses from their start again
+    def rewind(self):
+        self.cursor = {}
+        self.served = 0
+        self.misses = 0
+
+    def document(self):
+        return ReplayProxy(self,0)
+
+    def _access(self,oid,kind,name,args):
+        key = _key(oid,kind,name,args)
+        results = self.responses.get(key)
+        if results is None:
+            self.misses += 1
+            raise ReplayMiss("%s%s of object %d wasn't recorded" % (name or '()',repr(key[3]) if kind == 'call' else '',oid))
+        k = self.cursor.get(key,0)
+        self.cursor[key] = k + 1
+        code, value = results[min(k,len(results) - 1)]
+        if code != 'm':
+            self.served += 1
+        if key in self.files:
+            self._writeDump(key,_dumpBase(args))
+        if code == 'v':
+            return value
+        elif code == 'o':
+            return ReplayProxy(self,value)
+        elif code == 'm':
+            return ReplayMethod(self,oid,name)
+        raise ReplayedError(value)
+
+    def _writeDump(self,key,base):
+        if base is None:
+            return
+        for ext, data in self.files[key]:
+            f = open(base + ext,'wb')
+            try:
+                f.write(data)
+            finally:
+                f.close()
+
+    #Run the extraction on the replayed document, returns the import model and the seconds it took
+    def extract(self,cache=None):
+        self.rewind()
+        start = time.time()
+        model = extractDocument(self.document(),self.xrecs,self.lisppath,cache)
+        return model, time.time() - start
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="Replay a recording of the AutoCAD side of an import, without AutoCAD")
+    parser.add_argument('recording',help="the %s file" % RECORDING_EXT)
+    parser.add_argument('--repeat',type=int,default=3,help="number of runs")
+    parser.add_argument('--top',type=int,default=10,help="number of the most recorded accesses to show")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parseArgs(sys.argv[1:] if argv is None else argv)
+    replay = AcadReplay(args.recording)
+    times = []
+    for run in range(0,args.repeat):
+        model, elapsed = replay.extract()
+        times.append(elapsed)
+        print("run %d: %.3f s, %d accesses served, %d missed" % (run + 1,elapsed,replay.served,replay.misses))
+    print("%d frames, %d areas, %d points, %d layers" % (model.nframes(),model.nareas(),model.npoints(),len(model.layers)))
+    print("best %.3f s, median %.3f s" % (min(times),sorted(times)[len(times)//2]))
+    print("Recorded accesses:")
+    for name, n in sorted(replay.counts.items(),key=lambda item: (-item[1],item[0]))[:args.top]:
+        print("  %-28s %8d" % (name or '()',n))
+    if replay.misses:
+        return 2
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The backends of the application (AutoCAD, Excel with facilitate.xlsm, ETABS and SAP2000), connected on their first use, not at startup
+2- The reuse of an already running instance, and the reliable closing of the instances (and the workbook) that were started here
+3- The startup-time report: import, backends' connections and GUI ready
+"""
+
+import atexit
+import os
+import time
+
+XL_VALUE = 10 #Excel's xlRangeValueDefault
+ACAD_PROGID = "AutoCAD.Application.20"
+CSI_PROGIDS = {"ETABS":"CSI.ETABS.API.ETABSObject","SAP2000":"CSI.SAP2000.API.SAPObject"}
+
+class BackendError(Exception):
+    pass
+
+#The startup-time report, the time of every stage since the application has started
+class StartupReport(object):
+    def __init__(self,started=None):
+        self.started = started or time.time()
+        self.stages = [] #(stage, seconds since the start, seconds of the stage)
+        self.last = self.started
+
+    def mark(self,stage,duration=None):
+        now = time.time()
+        if duration is None:
+            duration = now - self.last
+        self.stages.append((stage,now - self.started,duration))
+        self.last = now
+        return duration
+
+    def report(self):
+        lines = ["Startup times:"]
+        for stage, at, duration in self.stages:
+            lines.append("  %-28s %8.3f s  (at %.3f s)" % (stage,duration,at))
+        return '\n'.join(lines)
+
+#A COM application that is connected on its first use: a running instance is reused, otherwise a new one is started
+#probe is an attribute that is read to check that a kept instance is still alive [e.g. the user closed it]
+class Backend(object):
+    def __init__(self,name,progid,dynamic=False,create=True,probe='Name',startup=None):
+        self.name = name
+        self.progid = progid
+        self.dynamic = dynamic
+        self.create = create #False: only a running instance is used
+        self.probe = probe
+        self.startup = startup
+        self.app = None
+        self.started = False #this instance was started here, so it's closed here
+
+    def alive(self):
+        if self.app is None:
+            return False
+        try:
+            getattr(self.app,self.probe)
+            return True
+        except Exception:
+            return False
+
+    def get(self):
+        if not self.alive():
+            self.app = None
+            self.connect()
+        return self.app
+
+    def connect(self):
+        from comtypes.client import CreateObject, GetActiveObject
+        start = time.time()
+        try:
+            self.app = GetActiveObject(self.progid,dynamic=self.dynamic)
+            self.started = False
+            how = "reused"
+        except Exception:
+            if not self.create:
+                raise BackendError("%s is not running" % self.name)
+            try:
+                self.app = CreateObject(self.progid,dynamic=self.dynamic)
+            except Exception as err:
+                raise BackendError("Can't start %s: %s" % (self.name,err))
+            self.started = True
+            how = "started"
+        self.opened()
+        stage = "%s (%s)" % (self.name,how)
+        if self.startup is not None:
+            self.startup.mark(stage,time.time() - start) #the connection's time is only reported by the startup report
+        return self.app
+
+    #A hook that runs after every connection
+    def opened(self):
+        pass
+
+    def close(self):
+        app, self.app = self.app, None
+        if app is None or not self.started:
+            return
+        try:
+            app.Quit()
+        except Exception:
+            pass
+
+#Excel with facilitate.xlsm opened: an already opened workbook is reused, and only a workbook opened here is closed
+class ExcelBackend(Backend):
+    def __init__(self,workbookpath,startup=None):
+        Backend.__init__(self,"Excel","Excel.Application",startup=startup)
+        self.workbookpath = workbookpath
+        self.workbook = None
+        self.openedbook = False
+
+    def opened(self):
+        self.workbook = None
+        self.openedbook = False
+        target = os.path.normcase(os.path.abspath(self.workbookpath))
+        for k in range(1,self.app.Workbooks.Count + 1):
+            wb = self.app.Workbooks.Item(k)
+            if os.path.normcase(wb.FullName) == target:
+                self.workbook = wb
+        if self.workbook is None:
+            self.workbook = self.app.Workbooks.Open(Filename=self.workbookpath,ReadOnly=0)
+            self.openedbook = True
+
+    #The macros read and write the active sheet, so the workbook is activated first [a reused Excel may have others]
+    #If the user closed the workbook but not Excel, it's found or opened again
+    def get(self):
+        app = Backend.get(self)
+        try:
+            self.workbook.Activate()
+        except Exception:
+            self.opened()
+            self.workbook.Activate()
+        return app
+
+    def close(self):
+        wb, self.workbook = self.workbook, None
+        if wb is not None and self.openedbook:
+            try:
+                wb.Close(SaveChanges=0)
+            except Exception:
+                pass
+        Backend.close(self)
+
+#All the backends of the application, closed together at exit
+class Backends(object):
+    def __init__(self,workbookpath,startup=None):
+        self.startup = startup
+        self.acad = Backend("AutoCAD",ACAD_PROGID,dynamic=True,startup=startup)
+        self.excel = ExcelBackend(workbookpath,startup)
+        self.csi = dict((program,Backend(program,progid,create=False,probe='SapModel',startup=startup)) for program, progid in CSI_PROGIDS.items())
+        atexit.register(self.closeAll)
+
+    def program(self,program):
+        return self.csi[program].get()
+
+    #Close what was started here: the workbook, Excel and AutoCAD [ETABS and SAP2000 are always the user's]
+    def closeAll(self):
+        self.excel.close()
+        self.acad.close()
+        for backend in self.csi.values():
+            backend.app = None
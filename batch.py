@@ -0,0 +1,194 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- A command line entry point that converts a directory of .dxf drawings to ETABS (.e2k) or SAP2000 (.$2k) model files,
+with the same options of the application's window, and without AutoCAD, Excel, ETABS or SAP2000
+2- The conversion of one drawing, run for many drawings at once by a pool of processes
+3- The report of every drawing: its status, number of elements and the time of every stage
+4- With --snapshots, the drawings that are unchanged since their last conversion are opened from their snapshots [snapshot.py],
+e.g. to convert them again with other modifiers or to the other program
+
+Usage:-
+python batch.py DIRECTORY [--program ETABS] [--swm 0] [--modifiers "All set to 1"] [--walls cracked] [--slabs 2D]
+                [--columns LAYER] [--fix-geometry] [--no-split] [--snapshots] [--out DIRECTORY] [--workers N] [--report report.csv]
+"""
+
+from __future__ import print_function
+
+import argparse
+import csv
+import multiprocessing
+import os
+import sys
+import time
+
+from extract import extractDxf
+from cache import cacheDir, evict
+from snapshot import snapshotPath, drawingStamp, saveSnapshot, loadSnapshot
+from emit import MODIFIER_TYPES
+from validate import validateModel, formatIssues
+from geomqa import checkGeometry, fixGeometry, WARNINGS
+from intersect import splitFrames
+from panelize import panelizeWalls
+from stories import assignStories
+from textmodel import modelFilePath, writeModelFile
+
+REPORT_FIELDS = ['drawing','status','message','frames','areas','points','stories','read_s','check_s','split_s','stories_s','write_s','total_s','modelfile']
+
+#A utility function that returns the .dxf drawings of a directory, sorted by name
+def findDrawings(directory,recursive=False):
+    drawings = []
+    for root, dirs, files in os.walk(directory):
+        for name in files:
+            if name.lower().endswith('.dxf'):
+                drawings.append(os.path.join(root,name))
+        if not recursive:
+            break
+    return sorted(drawings)
+
+#Read a drawing into the import model, from its snapshot if snapshots are used and it's unchanged since it was saved
+def readDrawing(path,snapshots=False):
+    if not snapshots:
+        return extractDxf(path)
+    snappath = snapshotPath(path)
+    stamp = drawingStamp(path)
+    model = loadSnapshot(snappath,stamp)
+    if model is None:
+        model = extractDxf(path)
+        try:
+            saveSnapshot(model,snappath,stamp)
+        except (IOError, OSError):
+            pass #the conversion doesn't need the snapshot
+    return model
+
+#Convert one drawing to a model file, returns its row of the report [errors are reported, not raised]
+#job is (drawing's path, options), options are the ones of the application's window
+def convertDrawing(job):
+    path, opts = job
+    row = dict((field,'') for field in REPORT_FIELDS)
+    row['drawing'] = path
+    start = time.time()
+    try:
+        model = readDrawing(path,opts['snapshots'])
+        t1 = time.time()
+        row['read_s'] = '%.3f' % (t1-start)
+        row['frames'], row['areas'], row['points'] = model.nframes(), model.nareas(), model.npoints()
+        issues = validateModel(model,opts['columns'])
+        row['check_s'] = '%.3f' % (time.time()-t1)
+        if issues:
+            row['status'] = 'error'
+            row['message'] = formatIssues(issues,3).replace('\n','; ')
+            return row
+        panelizeWalls(model)
+        row['areas'] = model.nareas()
+        defects = checkGeometry(model)
+        if defects.fixable():
+            if not opts['fixgeometry']:
+                row['status'] = 'error'
+                row['message'] = formatIssues([issue for issue in defects.issues() if issue.kind not in WARNINGS],3).replace('\n','; ')
+                return row
+            nsnapped, nremoved = fixGeometry(model)
+            row['message'] = 'snapped %d ends, removed %d elements' % (nsnapped,nremoved)
+            row['frames'], row['areas'] = model.nframes(), model.nareas()
+        if len(defects.nonplanar):
+            row['message'] = '; '.join(part for part in [row['message'],'%d non-planar 3dface(s)' % len(defects.nonplanar)] if part)
+        t2 = time.time() #the validation, the walls' panels and the geometry's check
+        row['check_s'] = '%.3f' % (t2-t1)
+        if opts['split']:
+            nlines, nsegments = splitFrames(model)
+            row['frames'] = model.nframes()
+        t3 = time.time()
+        row['split_s'] = '%.3f' % (t3-t2)
+        assignStories(model)
+        t4 = time.time()
+        row['stories_s'] = '%.3f' % (t4-t3)
+        row['stories'] = len(model.levels)
+        modelpath = modelFilePath(path,opts['program'])
+        if opts['out']:
+            modelpath = os.path.join(opts['out'],os.path.basename(modelpath))
+        writeModelFile(model,modelpath,opts['program'],opts['swm'],opts['modifiers'],opts['walls'],opts['slabs'])
+        row['write_s'] = '%.3f' % (time.time()-t4)
+        row['modelfile'] = modelpath
+        row['status'] = 'ok'
+    except Exception as err:
+        row['status'] = 'error'
+        row['message'] = '%s: %s' % (type(err).__name__,err)
+    finally:
+        row['total_s'] = '%.3f' % (time.time()-start)
+    return row
+
+#Convert drawings with a pool of processes [workers = 1 converts them in this process], returns the rows of the report in order
+def convertAll(drawings,opts,workers=None):
+    jobs = [(path,opts) for path in drawings]
+    if workers == 1 or len(jobs) < 2:
+        return [convertDrawing(job) for job in jobs]
+    pool = multiprocessing.Pool(workers)
+    try:
+        rows = pool.map(convertDrawing,jobs,chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    return rows
+
+def writeReport(rows,path):
+    f = open(path,'w')
+    try:
+        writer = csv.DictWriter(f,REPORT_FIELDS,lineterminator='\n')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+    finally:
+        f.close()
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="Convert a directory of .dxf drawings to ETABS (.e2k) or SAP2000 (.$2k) model files")
+    parser.add_argument('directory',help="directory of the .dxf drawings")
+    parser.add_argument('--program',choices=['ETABS','SAP2000'],default='ETABS')
+    parser.add_argument('--swm',choices=['0','1'],default='0',help="Dead self weight multiplier")
+    parser.add_argument('--modifiers',choices=MODIFIER_TYPES,default=MODIFIER_TYPES[0],help="elements section property modifiers")
+    parser.add_argument('--walls',choices=['cracked','uncracked'],default='cracked',help="wall crack mode")
+    parser.add_argument('--slabs',choices=['2D','3D'],default='2D',help="slabs in 2D or 3D model")
+    parser.add_argument('--columns',default='None',help="columns' layer [ETABS], every drawing must have it")
+    parser.add_argument('--fix-geometry',dest='fixgeometry',action='store_true',
+                        help="snap the ends of lines that miss a joint and remove duplicate or degenerate elements, instead of an error")
+    parser.add_argument('--no-split',dest='split',action='store_false',
+                        help="don't split the lines where they meet other lines or the edges of 3dfaces")
+    parser.add_argument('--snapshots',action='store_true',
+                        help="open the drawings that are unchanged since their last conversion from their snapshots")
+    parser.add_argument('--out',default='',help="directory of the model files [the drawings' directory by default]")
+    parser.add_argument('--workers',type=int,default=None,help="number of processes [all cores by default]")
+    parser.add_argument('--recursive',action='store_true',help="also convert the drawings of subdirectories")
+    parser.add_argument('--report',default='',help="write the report to this .csv file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parseArgs(sys.argv[1:] if argv is None else argv)
+    drawings = findDrawings(args.directory,args.recursive)
+    if not drawings:
+        print("No .dxf drawings at %s" % args.directory)
+        return 1
+    if args.out and not os.path.isdir(args.out):
+        os.makedirs(args.out)
+    opts = {'program':args.program,'swm':args.swm,'modifiers':args.modifiers,'walls':args.walls,'slabs':args.slabs,
+            'columns':args.columns,'fixgeometry':args.fixgeometry,'split':args.split,'snapshots':args.snapshots,
+            'out':args.out}
+    start = time.time()
+    rows = convertAll(drawings,opts,args.workers)
+    elapsed = time.time() - start
+    if args.snapshots:
+        evict(cacheDir())
+
+    for row in rows:
+        print('%-6s %8s s  %6s frames  %6s areas  %s %s' % (row['status'],row['total_s'],row['frames'],row['areas'],
+                                                           os.path.basename(row['drawing']),row['message']))
+    nok = len([row for row in rows if row['status'] == 'ok'])
+    print('%d of %d drawings converted in %.1f s' % (nok,len(rows),elapsed))
+    if args.report:
+        writeReport(rows,args.report)
+    if nok == len(rows):
+        return 0
+    return 2
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- An end-to-end benchmark of the import on synthetic buildings [synth.py] of about 1k, 10k and 100k elements
+2- Its stages are those of EtabsImport: extraction, XRecord decoding, load translation, stories, and the emission
+(definitions, then lines, 3dfaces and points) to the recording stand-in of SapModel [sapstub.py], a model file and database tables
+3- The report of every stage: its time, elements per second and peak memory [of the allocations during the stage]
+
+Usage:-
+python bench.py [--sizes 1000 10000 100000] [--program ETABS] [--latency none] [--processes N] [--no-memory] [--json report.json]
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+try:
+    import tracemalloc #Python 3.4+
+except ImportError:
+    tracemalloc = None
+
+from synth import SyntheticBuilding, dumpRows
+from extract import extractDxf
+from xrecords import decodeDump
+from emit import emitDefinitions, emitObjects, translateLoad, MODIFIER_TYPES
+from model import WALL
+from stories import assignStories, defineStories
+from textmodel import writeModelFile
+from dbtables import emitTables, TABLE_PROGRAMS
+from sapstub import RecordingSapModel, LATENCIES
+
+SIZES = [1000,10000,100000]
+
+#A utility function that runs a stage, returns its result and its row of the report
+def runStage(stage,nitems,fn,memory=True):
+    memory = memory and tracemalloc is not None
+    if memory:
+        tracemalloc.start()
+    start = time.time()
+    try:
+        result = fn()
+        elapsed = time.time() - start
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+    row = {'stage':stage,'items':nitems,'seconds':elapsed,'per_second':nitems/elapsed if elapsed > 0 else None,
+           'peak_mb':peak/1048576.0 if peak is not None else None}
+    return result, row
+
+#A utility function that translates every load of the model, as the emission does
+def translateAll(model,program,swm):
+    n = 0
+    loads = model.frameloads
+    for j in range(0,len(loads)):
+        if translateLoad(program,swm,model.patterns[loads.pattern[j]],int(loads.direction[j]),"frame") is not None:
+            n += 1
+    loads = model.arealoads
+    for j in range(0,len(loads)):
+        elemtype = "wall" if model.areatype[loads.elem[j]] == WALL else "slab"
+        if translateLoad(program,swm,model.patterns[loads.pattern[j]],int(loads.direction[j]),elemtype) is not None:
+            n += 1
+    return n
+
+#Benchmark the stages on a building of about nelements elements, returns the rows of the report
+def benchSize(nelements,workdir,opts):
+    program, swm, memory = opts['program'], opts['swm'], opts['memory']
+    building = SyntheticBuilding.forElements(nelements)
+    path = os.path.join(workdir,'building_%d.dxf' % nelements)
+    start = time.time()
+    records = building.write(path)
+    generated = time.time() - start
+    nelem = building.nelements()
+    rows = []
+
+    def add(result_row):
+        result, row = result_row
+        row['size'] = nelements
+        row['elements'] = nelem
+        rows.append(row)
+        return result
+
+    model = add(runStage('extraction',nelem,lambda: extractDxf(path,opts['processes']),memory))
+    dumprows = dumpRows(records)
+    add(runStage('xrecord decoding',len(dumprows),lambda: decodeDump(dumprows),memory))
+    add(runStage('load translation',len(model.frameloads) + len(model.arealoads),lambda: translateAll(model,program,swm),memory))
+    add(runStage('stories',nelem,lambda: assignStories(model),memory))
+
+    sapmodel = RecordingSapModel(program,opts['latency'],record=False)
+    def definitions():
+        emitDefinitions(model,sapmodel,program,swm,MODIFIER_TYPES[0],'cracked','2D')
+        if program == "ETABS":
+            defineStories(model,sapmodel)
+    add(runStage('emission: definitions',nelem,definitions,memory))
+    ncalls = sum(sapmodel.counts.values())
+    simulated = sapmodel.simulated
+    add(runStage('emission: objects',nelem,lambda: emitObjects(model,sapmodel,program,swm,'Columns'),memory))
+    rows[-1]['calls'] = sum(sapmodel.counts.values()) - ncalls
+    rows[-1]['simulated_s'] = sapmodel.simulated - simulated
+
+    modelpath = os.path.join(workdir,'building_%d.%s' % (nelements,'e2k' if program == "ETABS" else '$2k'))
+    add(runStage('model file',nelem,lambda: writeModelFile(model,modelpath,program,swm,MODIFIER_TYPES[0],'cracked','2D'),memory))
+    if program in TABLE_PROGRAMS:
+        tables = RecordingSapModel(program,opts['latency'],record=False)
+        add(runStage('database tables',nelem,lambda: emitTables(model,tables,program,swm),memory))
+        rows[-1]['simulated_s'] = tables.simulated
+
+    print("%d elements (%d stories, %dx%d bays) generated in %.2f s" % (nelem,building.stories,building.baysx,building.baysy,generated))
+    for row in rows:
+        printRow(row)
+    return rows
+
+def printRow(row):
+    persec = '%12.0f/s' % row['per_second'] if row['per_second'] else '%14s' % '-'
+    peak = '%9.1f MB' % row['peak_mb'] if row['peak_mb'] is not None else '%12s' % '-'
+    extra = ''
+    if 'calls' in row:
+        extra += '  %d calls' % row['calls']
+    if row.get('simulated_s'):
+        extra += '  +%.2f s simulated latency' % row['simulated_s']
+    print("  %-24s %9.3f s %s %s%s" % (row['stage'],row['seconds'],persec,peak,extra))
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the import's stages on synthetic buildings")
+    parser.add_argument('--sizes',type=int,nargs='+',default=SIZES,help="numbers of elements")
+    parser.add_argument('--program',choices=['ETABS','SAP2000'],default='ETABS')
+    parser.add_argument('--swm',choices=['0','1'],default='0',help="Dead self weight multiplier")
+    parser.add_argument('--latency',choices=sorted(LATENCIES),default='none',help="latency model of the SapModel calls [added up, not slept]")
+    parser.add_argument('--processes',type=int,default=1,help="processes of the extraction [large drawings are read in shards]")
+    parser.add_argument('--no-memory',dest='memory',action='store_false',help="don't trace the peak memory [it slows the stages]")
+    parser.add_argument('--keep',default='',help="keep the drawings and model files at this directory")
+    parser.add_argument('--json',default='',help="write the report to this .json file")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parseArgs(sys.argv[1:] if argv is None else argv)
+    opts = {'program':args.program,'swm':args.swm,'latency':args.latency,'memory':args.memory,'processes':args.processes}
+    workdir = args.keep or tempfile.mkdtemp()
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+    rows = []
+    try:
+        for size in args.sizes:
+            rows.extend(benchSize(size,workdir,opts))
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir,ignore_errors=True)
+    if args.json:
+        f = open(args.json,'w')
+        try:
+            json.dump({'program':args.program,'latency':args.latency,'python':sys.version.split()[0],'rows':rows},f,indent=1)
+        finally:
+            f.close()
+    return 0
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
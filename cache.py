@@ -0,0 +1,110 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- A persistent cache of the extracted elements of a drawing, so re-importing it only reads the new or changed elements
+2- The content hash of an element: its handle, type, layer, coordinates and the data of its extension dictionary
+3- The size-bounded eviction of the cache's files [the least recently used drawings are removed first]
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+CACHE_VERSION = 1 #a cache of another version is ignored
+CACHE_LIMIT = 200*1024*1024 #the maximum size of all cache files [bytes]
+
+#A utility function that returns the directory of the cache files
+def cacheDir():
+    base = os.environ.get('LOCALAPPDATA') or tempfile.gettempdir()
+    return os.path.join(base,'CAD2ETABSnSAP','cache')
+
+#A utility function that returns the content hash of an element, coords is its row of the geometry array
+def contentHash(handle,enttype,layer,coords,signature):
+    h = hashlib.sha1()
+    for part in [handle,enttype,layer,signature]:
+        h.update(part.encode('utf-8'))
+        h.update(b'\t')
+    h.update(coords.tobytes())
+    return h.hexdigest()
+
+#Remove the least recently used cache files [and snapshots, see snapshot.py] until all of them are within limit bytes
+def evict(directory,limit=CACHE_LIMIT):
+    if not os.path.isdir(directory):
+        return 0
+    files = []
+    for name in os.listdir(directory):
+        if name.endswith(('.cache','.snapshot')):
+            path = os.path.join(directory,name)
+            files.append((os.path.getmtime(path),os.path.getsize(path),path))
+    files.sort()
+    total = sum(size for mtime, size, path in files)
+    removed = 0
+    for mtime, size, path in files:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+#The cache of one drawing: handle -> (content hash, type, layer, coordinates, extension dictionary's typed records)
+class ExtractionCache(object):
+    def __init__(self,drawingpath,directory=None,limit=CACHE_LIMIT):
+        self.directory = directory or cacheDir()
+        self.limit = limit
+        key = os.path.normcase(os.path.abspath(drawingpath)).encode('utf-8')
+        self.path = os.path.join(self.directory,hashlib.sha1(key).hexdigest() + '.cache')
+        self.entries = {} #of the last import
+        self.fresh = {} #of this import, the deleted elements are dropped when it's saved
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        try:
+            f = open(self.path,'rb')
+        except IOError:
+            return
+        try:
+            version, entries = pickle.load(f)
+            if version == CACHE_VERSION:
+                self.entries = entries
+        except Exception:
+            pass #a damaged cache is like no cache
+        finally:
+            f.close()
+
+    #Get the cached element of a handle if its content hash is unchanged, None otherwise
+    def get(self,handle,chash):
+        entry = self.entries.get(handle)
+        if entry is not None and entry[0] == chash:
+            self.hits += 1
+            self.fresh[handle] = entry
+            return entry
+        self.misses += 1
+        return None
+
+    def put(self,handle,chash,enttype,layer,coords,xdata):
+        self.fresh[handle] = (chash,enttype,layer,coords,xdata)
+
+    #Write the elements of this import, then evict the least recently used drawings if the cache is too large
+    def save(self):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        f = open(self.path,'wb')
+        try:
+            pickle.dump((CACHE_VERSION,self.fresh),f,pickle.HIGHEST_PROTOCOL)
+        finally:
+            f.close()
+        self.entries = self.fresh
+        self.fresh = {}
+        evict(self.directory,self.limit)
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = 100.0*self.hits/total if total else 0.0
+        return "Extraction cache: %d hits, %d misses (%.0f%% hit rate)" % (self.hits,self.misses,rate)
@@ -0,0 +1,96 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- A writer of the import model's objects to a running ETABS or SAP2000 through the database-table editing API
+(DatabaseTables.SetTableForEditingArray and ApplyEditedTables), every table goes in one array instead of object by object calls
+2- The merge of the new rows with the rows that already exist in the open model, so its existing objects are kept
+3- The tables are SAP2000's: ETABS's database tables have other keys and fields [story-based objects], so this way of writing
+the model is offered for SAP2000 only
+"""
+
+from textmodel import objectTables, num
+
+TABLE_PROGRAMS = ["SAP2000"] #the programs whose database tables are written
+
+#Joints get this prefix, so they don't overwrite the joints of the open model
+JOINT_PREFIX = 'CAD'
+
+#The fields that identify a row of a table [the first field if the table isn't listed]
+KEY_FIELDS = {'Groups 2 - Assignments':['GroupName','ObjectType','ObjectLabel'],
+              'Frame Loads - Distributed':['Frame','LoadPat'],
+              'Area Loads - Uniform':['Area','LoadPat']}
+
+#A utility function that formats a value of a database table [all values are sent as strings, None is an empty field]
+def dbval(x):
+    if x is None:
+        return ''
+    if isinstance(x,float):
+        return num(x)
+    return str(x)
+
+#A utility function that returns the return code of an API call [calls with ByRef arguments return a list that ends with it]
+def _ret(result):
+    if isinstance(result,(list,tuple)):
+        return result[-1]
+    return result
+
+#A utility function that gets the fields and the rows of a table of the open model, None if it can't be edited
+def getTable(dbtables,key):
+    result = dbtables.GetTableForEditingArray(key,"",0,[],0,[])
+    if _ret(result) != 0:
+        return None
+    version, fields, nrec, data = result[:4]
+    fields = list(fields)
+    n = len(fields)
+    data = list(data)
+    return fields, [data[k*n:(k+1)*n] for k in range(0,nrec)]
+
+#A utility function that appends new rows to the rows of the open model, returns the fields, the number of records and the flat data
+#An existing row with the same key fields as a new row is replaced by it [loads are replaced per object and load pattern]
+def mergeRows(key,fields,rows,existing):
+    if existing is None or not existing[0]:
+        data = []
+        for row in rows:
+            data.extend(dbval(v) for v in row)
+        return list(fields), len(rows), data
+    oldfields, oldrows = existing
+    allfields = oldfields + [name for name in fields if name not in oldfields]
+    width = len(allfields)
+    pos = [allfields.index(name) for name in fields]
+    keyfields = [name for name in KEY_FIELDS.get(key,fields[:1]) if name in oldfields]
+    oldkey = [oldfields.index(name) for name in keyfields]
+    newkey = [fields.index(name) for name in keyfields]
+    newkeys = set(tuple(dbval(row[k]) for k in newkey) for row in rows)
+    data = []
+    nrec = 0
+    for old in oldrows:
+        if keyfields and tuple(old[k] for k in oldkey) in newkeys:
+            continue
+        data.extend(old + ['']*(width-len(old)))
+        nrec += 1
+    for row in rows:
+        rec = ['']*width
+        for p, v in zip(pos,row):
+            rec[p] = dbval(v)
+        data.extend(rec)
+        nrec += 1
+    return allfields, nrec, data
+
+#Write the objects of the import model as database tables, then apply them all at once
+#Returns the keys of the tables that couldn't be set, and the fatal errors, errors and log of applying them
+def emitTables(model,sapmodel,program,swm,jointprefix=JOINT_PREFIX):
+    if program not in TABLE_PROGRAMS:
+        raise ValueError("%s's database tables aren't written, its tables have other keys and fields" % program)
+    dbtables = sapmodel.DatabaseTables
+    failed = []
+    for key, fields, rows in objectTables(model,program,swm,jointprefix):
+        rows = list(rows)
+        if not rows:
+            continue
+        allfields, nrec, data = mergeRows(key,fields,rows,getTable(dbtables,key))
+        ret = _ret(dbtables.SetTableForEditingArray(key,0,allfields,nrec,data))
+        if ret != 0:
+            failed.append(key)
+    result = dbtables.ApplyEditedTables(True,0,0,0,0,"")
+    nfatal, nerror, nwarn, ninfo, log = result[:5]
+    return failed, nfatal, nerror, log
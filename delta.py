@@ -0,0 +1,273 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The import state: the ETABS/SAP2000 names and the signatures of the elements of the last import, kept by their AutoCAD handles
+2- The difference between the drawing and the last import: added, deleted and modified lines, 3dfaces and points
+3- A writer that only sends this difference to the open model through the API, instead of rebuilding the whole model
+4- The check of the open ETABS model's stories: changes are only sent if every level of the drawing is already a story
+"""
+
+import hashlib
+import os
+import pickle
+
+from cache import cacheDir
+from emit import setGroup, apiName, assignFrameLoads, assignAreaData, translateLoad, RESTRAINT_DOFS
+from joints import modelJoints, faceJoints, JOINT_TOL, NEIGHBOURS
+from model import NORESTRAINT, NOREF, WALL
+from stories import STORY_TOL
+
+STATE_VERSION = 1 #a state of another version is ignored
+
+KINDS = ['frame','area','point']
+TAGS = {'frame':'_Fr ','area':'_Sh '} #as in ImportModel.elementNames
+GROUPS = {'frame':'_LINES','area':'_Shells','point':'_POINTS'} #suffixes of the layers' groups
+
+#A utility function that returns the file of the import state of a drawing at ETABS or SAP2000
+def stateFile(drawingpath,program):
+    key = (os.path.normcase(os.path.abspath(drawingpath)) + '|' + program).encode('utf-8')
+    return os.path.join(cacheDir(),hashlib.sha1(key).hexdigest() + '.state')
+
+#Read the import state of a file, None if there's none [or of another version]
+def loadState(path):
+    try:
+        f = open(path,'rb')
+    except IOError:
+        return None
+    try:
+        state = pickle.load(f)
+    except Exception:
+        return None
+    finally:
+        f.close()
+    if state.get('version') != STATE_VERSION:
+        return None
+    return state
+
+def saveState(state,path):
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    f = open(path,'wb')
+    try:
+        pickle.dump(state,f,pickle.HIGHEST_PROTOCOL)
+    finally:
+        f.close()
+
+#A utility function that hashes the parts of an element's signature, numbers are rounded to 1e-6
+def _signature(parts):
+    text = '|'.join(('%.6f' % p) if isinstance(p,float) else str(p) for p in parts)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+#A utility function that returns the translated loads of an element as a flat list, for its signature
+def _loadParts(model,loads,lstart,lend,e,program,swm,elemtype,values):
+    parts = []
+    for j in range(lstart[e],lend[e]):
+        load = translateLoad(program,swm,model.patterns[loads.pattern[j]],int(loads.direction[j]),elemtype)
+        if load is not None:
+            parts.extend(list(load) + [float(getattr(loads,v)[j]) for v in values])
+    return parts
+
+#Get the signature and layer of every element: {kind: {handle: (signature, layer, index)}}
+#A signature covers everything that is sent for the element: coordinates, section, layer, loads, labels and restraint
+def elementSignatures(model,program,swm):
+    sigs = dict((kind,{}) for kind in KINDS)
+    loads = model.frameloads
+    lstart, lend = loads.ranges(model.nframes())
+    for e in range(0,model.nframes()):
+        parts = model.framexyz[e].tolist() + [model.sections[model.framesec[e]],model.layers[model.framelayer[e]]]
+        parts += _loadParts(model,loads,lstart,lend,e,program,swm,"frame",['start','end'])
+        sigs['frame'][model.framehandles[e]] = (_signature(parts),model.layers[model.framelayer[e]],e)
+    loads = model.arealoads
+    lstart, lend = loads.ranges(model.nareas())
+    for e in range(0,model.nareas()):
+        elemtype = "wall" if model.areatype[e] == WALL else "slab"
+        parts = model.areaxyz[e].ravel().tolist() + [model.sections[model.areasec[e]],elemtype,model.layers[model.arealayer[e]]]
+        parts += [model.labels[r] if r != NOREF else '' for r in [model.areapier[e],model.areaspand[e]]]
+        parts += _loadParts(model,loads,lstart,lend,e,program,swm,elemtype,['value'])
+        sigs['area'][model.areahandles[e]] = (_signature(parts),model.layers[model.arealayer[e]],e)
+    for e in range(0,model.npoints()):
+        if model.pointrestraint[e] == NORESTRAINT:
+            continue #points are only drawn to carry restraints
+        parts = model.pointxyz[e].tolist() + [int(model.pointrestraint[e]),model.layers[model.pointlayer[e]]]
+        sigs['point'][model.pointhandles[e]] = (_signature(parts),model.layers[model.pointlayer[e]],e)
+    return sigs
+
+#Get the import state of a whole import: {kind: {handle: (name, signature, layer, coordinates)}}
+#Lines and 3dfaces are named by ImportModel.elementNames, points are found at the model by their coordinates
+def stateFromModel(model,program,swm):
+    state = {'version':STATE_VERSION,'program':program}
+    names = {'frame':model.elementNames('frame'),'area':model.elementNames('area')}
+    for kind, elems in elementSignatures(model,program,swm).items():
+        entries = {}
+        for handle, (sig, layer, e) in elems.items():
+            if kind == 'point':
+                entries[handle] = (None,sig,layer,tuple(model.pointxyz[e].tolist()))
+            else:
+                entries[handle] = (names[kind][e],sig,layer,None)
+        state[kind] = entries
+    return state
+
+#Get the added, deleted and modified handles of every kind between the last import state and the drawing
+def diffState(state,sigs):
+    diff = {}
+    for kind in KINDS:
+        old = state.get(kind,{})
+        new = sigs[kind]
+        added = [h for h in new if h not in old]
+        deleted = [h for h in old if h not in new]
+        modified = [h for h in new if h in old and old[h][1] != new[h][0]]
+        diff[kind] = (added,deleted,modified)
+    return diff
+
+#A utility function that returns a new element name for a layer, after the largest number used at the layer
+def _newName(used,layer,tag):
+    prefix = layer + tag
+    n = used.get(prefix)
+    if n is None:
+        n = -1
+    used[prefix] = n + 1
+    return prefix + str(n + 1)
+
+#A utility function that returns the largest number of the names of every layer's prefix
+def _usedNumbers(entries,tag):
+    used = {}
+    for name, sig, layer, xyz in entries.values():
+        prefix = layer + tag
+        if name is None or not name.startswith(prefix):
+            continue
+        try:
+            n = int(name[len(prefix):])
+        except ValueError:
+            continue
+        used[prefix] = max(n,used.get(prefix,-1))
+    return used
+
+#A utility function that returns the return code of an API call [calls with ByRef arguments return a list that ends with it]
+def _ret(result):
+    if isinstance(result,(list,tuple)):
+        return result[-1]
+    return result
+
+#A utility function that returns the name of the joint of the open model at a location [it's created if there's none]
+def _jointAt(sapmodel,xyz):
+    x, y, z = xyz
+    result = sapmodel.PointObj.AddCartesian(x,y,z,"","","Global",False,0) #merged with an existing joint
+    return apiName(result,"")
+
+#The joints of the open model by their locations, read once when a joint has to be found without creating it
+class JointIndex(object):
+    def __init__(self,sapmodel,tol=JOINT_TOL):
+        self.tol = tol
+        self.grid = {} #cell -> [(x, y, z, name)]
+        result = sapmodel.PointObj.GetNameList(0,[])
+        if _ret(result) != 0:
+            return
+        for name in result[1]:
+            coords = sapmodel.PointObj.GetCoordCartesian(name,0.0,0.0,0.0,"Global")
+            if _ret(coords) != 0:
+                continue
+            x, y, z = coords[:3]
+            self.grid.setdefault(self._cell(x,y,z),[]).append((x,y,z,name))
+
+    def _cell(self,x,y,z):
+        return int(x//self.tol), int(y//self.tol), int(z//self.tol)
+
+    #The name of the joint within tol of a location, None if there's none
+    def find(self,xyz):
+        x, y, z = xyz
+        cx, cy, cz = self._cell(x,y,z)
+        for dx, dy, dz in NEIGHBOURS:
+            for px, py, pz, name in self.grid.get((cx+dx,cy+dy,cz+dz),()):
+                if (px-x)**2 + (py-y)**2 + (pz-z)**2 <= self.tol*self.tol:
+                    return name
+        return None
+
+#Get the levels of the model that aren't stories of the open ETABS model [all of them if its stories can't be read]
+#Elements at a level without a story would be drawn at the stories that are there, so changes aren't sent then
+def missingStories(model,sapmodel,tol=STORY_TOL):
+    result = sapmodel.Story.GetStories(0,[],[],[],[],[],[],[])
+    if _ret(result) != 0 or not isinstance(result,(list,tuple)):
+        return model.levels.tolist()
+    elevations = [float(z) for z in result[2]]
+    return [z for z in model.levels.tolist() if not any(abs(z - elev) <= tol for elev in elevations)]
+
+#Send the difference between the drawing and the last import to the open model, everything else is left as it is
+#Modified lines and 3dfaces are deleted then drawn again with the same name, returns the new state and the counts of changes
+def emitDelta(model,sapmodel,program,swm,state,tol=JOINT_TOL):
+    sigs = elementSignatures(model,program,swm)
+    diff = diffState(state,sigs)
+    xyz, frj, arj, restrained, poj = modelJoints(model,tol)
+    pointjoint = dict(zip(restrained,poj))
+    newstate = {'version':STATE_VERSION,'program':program}
+    groups = set()
+    joints = [] #the open model's joints [JointIndex], read at the first deleted restraint
+
+    def group(layer,kind):
+        grname = layer + GROUPS[kind]
+        if grname not in groups:
+            ret = setGroup(sapmodel,grname)
+            groups.add(grname)
+        return grname
+
+    #remove the deleted and modified elements
+    for kind in KINDS:
+        added, deleted, modified = diff[kind]
+        old = state.get(kind,{})
+        for h in deleted + modified:
+            name, sig, layer, pxyz = old[h]
+            if kind == 'frame':
+                ret = sapmodel.FrameObj.Delete(name,0)
+            elif kind == 'area':
+                ret = sapmodel.AreaObj.Delete(name,0)
+            else:
+                #the point's joint may have been removed from the model, it isn't created again
+                if not joints:
+                    joints.append(JointIndex(sapmodel,tol))
+                jname = joints[0].find(pxyz)
+                if jname is None:
+                    continue
+                ret = sapmodel.PointObj.DeleteRestraint(jname,0)
+                ret = sapmodel.PointObj.SetGroupAssign(jname,layer + GROUPS[kind],True,0)
+
+    #draw the added and modified elements
+    frloads = model.frameloads.ranges(model.nframes())
+    arloads = model.arealoads.ranges(model.nareas())
+    for kind in KINDS:
+        added, deleted, modified = diff[kind]
+        old = state.get(kind,{})
+        entries = dict((h,old[h]) for h in old if h in sigs[kind])
+        used = _usedNumbers(entries,TAGS.get(kind,''))
+        for h in added + modified:
+            sig, layer, e = sigs[kind][h]
+            grname = group(layer,kind)
+            if kind == 'frame':
+                name = old[h][0] if h in old else _newName(used,layer,TAGS[kind])
+                x1, y1, z1 = xyz[frj[e,0]].tolist()
+                x2, y2, z2 = xyz[frj[e,1]].tolist()
+                name = apiName(sapmodel.FrameObj.AddByCoord(x1,y1,z1,x2,y2,z2,name,model.sections[model.framesec[e]],name,"Global"),name)
+                ret = sapmodel.FrameObj.SetGroupAssign(name,grname,False,0)
+                assignFrameLoads(model,e,name,sapmodel,program,swm,frloads[0],frloads[1])
+                entries[h] = (name,sig,layer,None)
+            elif kind == 'area':
+                name = old[h][0] if h in old else _newName(used,layer,TAGS[kind])
+                fj, nj = faceJoints(arj[e])
+                n = int(nj[0])
+                elemX, elemY, elemZ = xyz[fj[0,:n]].T.tolist() #a triangle by its 3 joints
+                name = apiName(sapmodel.AreaObj.AddByCoord(n,elemX,elemY,elemZ,name,model.sections[model.areasec[e]],name),name)
+                ret = sapmodel.AreaObj.SetGroupAssign(name,grname,False,0)
+                assignAreaData(model,e,name,sapmodel,program,swm,arloads[0],arloads[1])
+                entries[h] = (name,sig,layer,None)
+            else:
+                jname = _jointAt(sapmodel,xyz[pointjoint[e]].tolist())
+                ret = sapmodel.PointObj.SetGroupAssign(jname,grname,False,0)
+                if model.pointrestraint[e] in RESTRAINT_DOFS:
+                    ret = sapmodel.PointObj.SetRestraint(jname,RESTRAINT_DOFS[model.pointrestraint[e]],0)
+                entries[h] = (None,sig,layer,tuple(model.pointxyz[e].tolist()))
+        newstate[kind] = entries
+
+    counts = {}
+    for kind in KINDS:
+        added, deleted, modified = diff[kind]
+        counts[kind] = (len(added),len(deleted),len(modified))
+    return newstate, counts
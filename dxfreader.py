@@ -0,0 +1,295 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- A streaming reader of ASCII .dxf files that doesn't need a running AutoCAD
+2- The structural data of the drawing: the named dictionaries used by EtabsImport,
+and the lines, 3dfaces and points with the XRecords of their extension dictionaries
+3- The shards of the ENTITIES section of large drawings, split at the entities' boundaries through a memory map,
+every shard is read on its own with the dictionaries and XRecords indexed once [extract.extractDxf reads them in parallel]
+"""
+
+import mmap
+import os
+import re
+from collections import namedtuple
+
+from xrecords import NAMED_DICTS, XDICT_KEYS, decodeXRecord, recordKind
+
+#A drawing element, coords are (x,y,z) of every vertex one after another [LINE: 2 vertices, 3DFACE: 4, POINT: 1]
+#xdata maps the keys of the extension dictionary to a typed record, or to a list of typed records for loads
+DxfEntity = namedtuple('DxfEntity','handle type layer coords xdata')
+
+ENTITY_TYPES = {'LINE':2,'3DFACE':4,'POINT':1}
+
+#Keys of the extension dictionary that hold a dictionary of XRecords (one per load pattern) instead of an XRecord
+LOAD_KEYS = ['DistLoads','WallDistLoads']
+
+SHARD_BYTES = 4*1024*1024 #the smallest shard of the ENTITIES section, smaller drawings are read in one process
+
+#The group code 0 of an entity or the end of a section: a "0" line followed by a name [a "0" value is followed by a group code]
+ENTITY_START = re.compile(br'\n[ \t]*0\r?\n([^\r\n]*)\r?\n')
+SECTION_END = re.compile(br'\n[ \t]*0\r?\nENDSEC\r?\n')
+
+#A utility function that yields every (group code, value) pair of a dxf file, values are kept as raw bytes
+def iterGroups(f):
+    readline = f.readline
+    while True:
+        code = readline()
+        if not code:
+            return
+        value = readline()
+        yield int(code), value.rstrip(b'\r\n')
+
+#A utility function that opens a dxf file for streaming, refusing binary dxf files
+def _opendxf(path):
+    f = open(path,'rb')
+    if f.read(18) == b'AutoCAD Binary DXF':
+        f.close()
+        raise ValueError("%s is a binary DXF file, save it as ASCII DXF and try again" % path)
+    f.seek(0)
+    return f
+
+#A utility function that tells a group code's line from a name's line
+def _isCode(line):
+    try:
+        int(line)
+        return True
+    except ValueError:
+        return False
+
+#A utility function that finds the first group code 0 of an entity at or after pos [before end]
+def _entityStart(mm,pos,end):
+    while True:
+        found = ENTITY_START.search(mm,pos - 1,end)
+        if found is None:
+            return end
+        if not _isCode(found.group(1)):
+            return found.start() + 1
+        pos = found.start() + 2 #the "0" was a value, its next line is a group code
+
+#A file-like reader of the lines of a memory map between 2 offsets
+class _RangeReader(object):
+    def __init__(self,mm,start,end):
+        self.mm = mm
+        self.end = end
+        mm.seek(start)
+
+    def readline(self):
+        if self.mm.tell() >= self.end:
+            return b''
+        return self.mm.readline()
+
+#The class that reads the structural data of a dxf file
+class DxfDrawing(object):
+    def __init__(self,path):
+        self.path = path
+        self.encoding = 'cp1252' #drawings before AutoCAD 2007 [AC1021]
+        self.layers = [] #layer names in the order of the layers' table
+        self.xrecords = {} #handle -> (dxf group codes, values) of every XRecord
+        self.dicts = {} #handle -> list of (key, handle) of every dictionary
+        self.rootdict = None #handle of the named objects dictionary
+        self.entityrange = None #(start, end) offsets of the ENTITIES section's entities
+        self._index()
+
+    #Read everything except the entities: header, layers, dictionaries and XRecords [1st pass]
+    #The ENTITIES section is skipped, only its range is kept
+    def _index(self):
+        f = _opendxf(self.path)
+        try:
+            section = None
+            objtype = None
+            handle = None
+            entries = None
+            key = None
+            codes = None
+            vals = None
+            indata = flagread = False
+            lastvar = None
+            for code, value in iterGroups(f):
+                if code == 0:
+                    #close the previous object
+                    if objtype == b'DICTIONARY' and handle is not None:
+                        self.dicts[handle] = entries
+                        if self.rootdict is None:
+                            self.rootdict = handle
+                    elif objtype == b'XRECORD' and handle is not None:
+                        self.xrecords[handle] = (codes,vals)
+                    objtype = value.strip()
+                    handle = None
+                    key = None #every dictionary has its own keys
+                    entries = []
+                    codes = []
+                    vals = []
+                    indata = False
+                    if objtype == b'ENDSEC':
+                        section = None
+                    continue
+                if objtype == b'SECTION' and code == 2:
+                    section = value.strip()
+                    if section == b'ENTITIES' and self.entityrange is None:
+                        start = f.tell()
+                        end = self._sectionEnd(f,start)
+                        self.entityrange = (start,end)
+                        f.seek(end) #at the group code 0 of ENDSEC
+                    continue
+                if section == b'HEADER':
+                    if code == 9:
+                        lastvar = value.strip()
+                    elif code == 1 and lastvar == b'$ACADVER' and value.strip() >= b'AC1021':
+                        self.encoding = 'utf-8'
+                elif section == b'TABLES':
+                    if objtype == b'LAYER' and code == 2:
+                        self.layers.append(self._text(value))
+                elif section == b'OBJECTS':
+                    if objtype == b'DICTIONARY':
+                        if code == 5:
+                            handle = value.strip()
+                        elif code == 3:
+                            key = self._text(value)
+                        elif code == 350 or code == 360:
+                            entries.append((key,value.strip()))
+                    elif objtype == b'XRECORD':
+                        if indata:
+                            #the duplicate record cloning flag [280] precedes the data
+                            if code == 280 and not codes and not flagread:
+                                flagread = True
+                                continue
+                            codes.append(code)
+                            vals.append(self._text(value))
+                        elif code == 5:
+                            handle = value.strip()
+                        elif code == 100 and value.strip() == b'AcDbXrecord':
+                            indata = True
+                            flagread = False
+        finally:
+            f.close()
+
+    #A utility function that finds the offset of the group code 0 that ends the section starting at start
+    def _sectionEnd(self,f,start):
+        mm = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+        try:
+            found = SECTION_END.search(mm,start - 1)
+            if found is None:
+                return os.path.getsize(self.path)
+            return found.start() + 1
+        finally:
+            mm.close()
+
+    def _text(self,value):
+        return value.decode(self.encoding,'replace')
+
+    #Get the typed record of an XRecord from its handle
+    def record(self,handle,key,owner=''):
+        codes, vals = self.xrecords[handle]
+        return decodeXRecord(recordKind(key,owner),codes,vals)
+
+    #Get the typed records of a named dictionary (e.g. "ConcMaterial"), an empty list if it doesn't exist
+    def dictionary(self,name):
+        root = dict(self.dicts.get(self.rootdict,[]))
+        if name not in root:
+            return []
+        return [self.record(h,name) for k, h in self.dicts.get(root[name],[]) if h in self.xrecords]
+
+    #Get the typed records of all the named dictionaries used by the import
+    def dictionaries(self):
+        result = {}
+        for name in NAMED_DICTS:
+            result[name] = self.dictionary(name)
+        return result
+
+    #Resolve the extension dictionary of an element into its typed records
+    def _xdata(self,xdicthandle,enttype):
+        xdata = {}
+        for key, h in self.dicts.get(xdicthandle,[]):
+            if key not in XDICT_KEYS:
+                continue
+            if key in LOAD_KEYS:
+                xdata[key] = [self.record(h2,key,enttype) for k2, h2 in self.dicts.get(h,[]) if h2 in self.xrecords]
+            elif h in self.xrecords:
+                xdata[key] = self.record(h,key,enttype)
+        return xdata
+
+    #A generator of the model space's lines, 3dfaces and points in the order of the file [2nd pass]
+    #Only one element is held in memory at a time, start and end limit them to a shard of the ENTITIES section
+    def entities(self,types=None,start=None,end=None):
+        if types is None:
+            types = ENTITY_TYPES
+        wanted = {}
+        for t in types:
+            wanted[t.encode('ascii')] = t
+        if self.entityrange is None:
+            return
+        if start is None:
+            start, end = self.entityrange
+        f = _opendxf(self.path)
+        try:
+            mm = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+            try:
+                for ent in self._parseEntities(_RangeReader(mm,start,end),wanted):
+                    yield ent
+            finally:
+                mm.close()
+        finally:
+            f.close()
+
+    #A generator of the wanted entities of groups that start at a group code 0
+    def _parseEntities(self,reader,wanted):
+        enttype = None
+        handle = layer = xdict = None
+        coords = None
+        paper = inxdict = False
+        for code, value in iterGroups(reader):
+            if code == 0:
+                if enttype is not None and not paper:
+                    xdata = self._xdata(xdict,enttype) if xdict is not None else {}
+                    yield DxfEntity(handle,enttype,layer,tuple(coords),xdata)
+                value = value.strip()
+                enttype = None
+                if value in wanted:
+                    enttype = wanted[value]
+                    handle = xdict = None
+                    layer = '0'
+                    coords = [0.0]*(3*ENTITY_TYPES[enttype])
+                    paper = inxdict = False
+                continue
+            if enttype is None:
+                continue
+            if 10 <= code <= 33 and code % 10 < ENTITY_TYPES[enttype]:
+                coords[3*(code%10)+(code//10-1)] = float(value)
+            elif code == 8:
+                layer = self._text(value)
+            elif code == 5:
+                handle = value.strip().decode('ascii')
+            elif code == 67:
+                paper = int(value) == 1
+            elif code == 102:
+                inxdict = value.strip() == b'{ACAD_XDICTIONARY'
+            elif code == 360 and inxdict:
+                xdict = value.strip()
+        if enttype is not None and not paper:
+            xdata = self._xdata(xdict,enttype) if xdict is not None else {}
+            yield DxfEntity(handle,enttype,layer,tuple(coords),xdata) #the last entity of a shard
+
+    #Split the ENTITIES section into n shards [or fewer, at least SHARD_BYTES each] at the entities' boundaries
+    def shards(self,n,minbytes=SHARD_BYTES):
+        if self.entityrange is None:
+            return []
+        start, end = self.entityrange
+        n = max(1,min(n,(end - start)//minbytes))
+        if n == 1:
+            return [(start,end)]
+        f = _opendxf(self.path)
+        try:
+            mm = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+            try:
+                bounds = [start]
+                for k in range(1,n):
+                    pos = _entityStart(mm,max(start + (end - start)*k//n,bounds[-1] + 1),end)
+                    if pos < end:
+                        bounds.append(pos)
+                bounds.append(end)
+            finally:
+                mm.close()
+        finally:
+            f.close()
+        return list(zip(bounds[:-1],bounds[1:]))
@@ -0,0 +1,419 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Functions that write the import model to ETABS 2016 or SAP2000 v18 through their API (SapModel), object by object
+(every joint is created once, then lines and 3dfaces are created by their joints)
+2- The translation rules of modifiers and loads between the drawing and ETABS/SAP2000
+3- An assignment planner: loads, restraints, pier and spandrel labels shared by the elements of a group are assigned once
+to the group [ItemType = Group] instead of element by element
+"""
+
+from collections import OrderedDict
+
+from model import SLAB, WALL, HINGED, FIXED, NORESTRAINT, NOREF
+from joints import modelJoints, faceJoints, JOINT_TOL
+from instrument import stage
+
+#Material and load pattern enumerations
+MAT_CONC = 2
+DEAD = 1
+LIVE = 3
+OTHER = 8
+PATTERN_TYPES = {'Dead':DEAD,'Live':LIVE,'Other':OTHER}
+
+#Area section enumerations
+SLAB_TYPE = 0
+SHELLTHIN = 1
+MEMBRANE_SAP = 5
+
+#Sets of section property modifiers
+MODIFIER_TYPES = ['All set to 1','As Per ACI M318 11','Torsional Modifiers Only','Egyptian Standard']
+
+RESTRAINT_DOFS = {HINGED:[True,True,True,False,False,False],FIXED:[True,True,True,True,True,True]}
+
+#ItemType of the assignments
+OBJECT = 0
+GROUP = 1
+
+ASSIGN_GROUP = "Assign %d" #temporary groups of elements with the same assignments [the model's groups are skipped]
+
+#A utility function that returns the section property modifiers of beams, columns, slabs and walls
+def getModifiers(modtypes,wallcrk,slabmode):
+    beammod = [1,1,1,1,1,1,1,1]
+    colmod = [1,1,1,1,1,1,1,1]
+    slabmod = [1,1,1,1,1,1,1,1,1,1]
+    wallmod = [1,1,1,1,1,1,1,1,1,1]
+    if modtypes == 'As Per ACI M318 11':
+        beammod = [1,1,1,0.01,0.35,0.35,1,1]
+        colmod = [1,1,1,0.1,0.7,0.7,1,1]
+        if slabmode == '3D':
+            slabmod = [1,1,1,0.25,0.25,1,1,1,1,1]
+        if wallcrk == 'cracked':
+            wallmod = [1,1,1,0.35,0.35,1,1,1,1,1]
+        elif wallcrk == 'uncracked':
+            wallmod = [1,1,1,0.7,0.7,1,1,1,1,1]
+    elif modtypes == 'Torsional Modifiers Only':
+        beammod = [1,1,1,0.01,1,1,1,1]
+        colmod = [1,1,1,0.1,1,1,1,1]
+    elif modtypes == 'Egyptian Standard':
+        beammod = [1,1,1,0.01,1,1,1,1]
+        if slabmode == '3D':
+            slabmod = [1,1,1,1,0.2,0.2,1,1,1,1]
+        if wallcrk == 'cracked':
+            wallmod = [1,1,1,0.35,0.35,1,1,1,1,1]
+        elif wallcrk == 'uncracked':
+            wallmod = [1,1,1,0.7,0.7,1,1,1,1,1]
+    return beammod, colmod, slabmod, wallmod
+
+#A utility function that returns the thickness of a slab section as it must be defined
+def slabThickness(rec,program,swm,modtypes):
+    if modtypes == 'Egyptian Standard' and program == "SAP2000" and swm == '0':
+        return rec.sapthk
+    return rec.etabsthk
+
+#A utility function that translates a load of the drawing to its load pattern, direction and coordinate system at ETABS/SAP2000
+#elemtype is "frame", "slab" or "wall", returns None if the load must not be assigned
+def translateLoad(program,swm,pattern,direction,elemtype):
+    '''
+    Rules:-
+    "Dead" loads are only assigned if the self weight multiplier is 0, and never on walls
+    SAP2000 names its default patterns "DEAD" and "LIVE", and numbers Gravity [6] as 10 and GravityProj [9] as 11
+    '''
+    if direction in [1,2,3]:
+        cs = "Local"
+    else:
+        cs = "Global"
+    if pattern == "Dead":
+        if swm != '0' or elemtype == "wall":
+            return None
+    if program == "SAP2000":
+        if pattern == "Dead":
+            pattern = "DEAD"
+        elif pattern == "Live":
+            pattern = "LIVE"
+        elif pattern == "DEAD" and elemtype == "frame":
+            return None
+        if direction == 6:
+            direction = 10
+        elif direction == 9:
+            direction = 11
+    return pattern, direction, cs
+
+#Define concrete materials
+def defineMaterials(model,sapmodel,program):
+    matprop = sapmodel.PropMaterial
+    '''
+    Typical values of the material's record, respectively
+    label, fc, E, strainatfc, ultstrain, poisson, thermal, unitweight
+    '''
+    for val in model.definitions.get('ConcMaterial',[]):
+        ret = matprop.SetMaterial(val.label,MAT_CONC)
+        if program == "ETABS":
+            ret = matprop.SetOConcrete_1(val.label,val.fc,False,0,2,4,val.strainatfc,val.ultstrain,-0.1)
+        elif program == "SAP2000":
+            ret = matprop.SetOConcrete_1(val.label,val.fc,False,0,2,2,val.strainatfc,val.ultstrain,-0.1)
+        ret = matprop.SetWeightAndMass(val.label,1,val.unitweight)
+        ret = matprop.SetMPIsotropic(val.label,val.E,val.poisson,val.thermal)
+
+#Define load patterns, and set the "Dead" self weight multiplier
+def defineLoadPatterns(model,sapmodel,program,swm):
+    if program == "SAP2000":
+        ret = sapmodel.LoadPatterns.Add("LIVE",LIVE) #SAP2000 doesn't create "LIVE" by default
+    for val in model.definitions.get('LoadPatterns',[]):
+        if val.label == "Dead":
+            if program == "ETABS":
+                ret = sapmodel.LoadPatterns.SetSelfWTMultiplier("Dead",float(swm))
+            elif program == "SAP2000":
+                ret = sapmodel.LoadPatterns.SetSelfWTMultiplier("DEAD",float(swm))
+        elif val.label == "Live":
+            continue
+        elif val.type in PATTERN_TYPES:
+            ret = sapmodel.LoadPatterns.Add(val.label,PATTERN_TYPES[val.type])
+
+#Define frame, slab and wall section properties with their modifiers [at SAP2000 walls are defined as shell sections]
+def defineSections(model,sapmodel,program,swm,modtypes,wallcrk,slabmode):
+    beammod, colmod, slabmod, wallmod = getModifiers(modtypes,wallcrk,slabmode)
+    propfr = sapmodel.PropFrame
+    for val in model.definitions.get('FrSecProp',[]):
+        if val.shape == "Rec":
+            ret = propfr.SetRectangle(val.label,val.material,val.dim1,val.dim2)
+        elif val.shape == "Circular":
+            ret = propfr.SetCircle(val.label,val.material,val.dim1)
+        else:
+            continue
+        if val.sectype == "Beam":
+            ret = propfr.SetRebarBeam(val.label,"A615Gr60","A615Gr60",0.06,0.06,0,0,0,0)
+            ret = propfr.SetModifiers(val.label,beammod)
+        elif val.sectype == "Column":
+            ret = propfr.SetRebarColumn(val.label,"A615Gr60","A615Gr60",1,1,0.04,0,3,5,"#20","#10",0.015,0,0,False)
+            ret = propfr.SetModifiers(val.label,colmod)
+
+    propslab = sapmodel.PropArea
+    for val in model.definitions.get('SlabSecProp',[]):
+        thk = slabThickness(val,program,swm,modtypes)
+        if program == "ETABS":
+            ret = propslab.SetSlab(val.label,SLAB_TYPE,SHELLTHIN,val.material,thk)
+        elif program == "SAP2000":
+            ret = propslab.SetShell_1(val.label,SHELLTHIN,True,val.material,0,thk,thk)
+        ret = propslab.SetModifiers(val.label,slabmod)
+
+    for val in model.definitions.get('WallSecProps',[]):
+        if program == "ETABS":
+            ret = propslab.SetWall(val.label,1,SHELLTHIN,val.material,val.thickness)
+        elif program == "SAP2000":
+            ret = propslab.SetShell_1(val.label,MEMBRANE_SAP,True,val.material,0,val.thickness,val.thickness)
+        ret = propslab.SetModifiers(val.label,wallmod)
+
+#Define pier and spandrel labels [ETABS only]
+def defineLabels(model,sapmodel,program):
+    if program != "ETABS":
+        return
+    for val in model.definitions.get('PierIDs',[]):
+        ret = sapmodel.PierLabel.SetPier(val.label)
+    for val in model.definitions.get('SpandralIDs',[]):
+        ret = sapmodel.SpandrelLabel.SetSpandrel(val.label,False)
+
+#Define everything that elements refer to
+def emitDefinitions(model,sapmodel,program,swm,modtypes,wallcrk,slabmode):
+    with stage("materials"):
+        defineMaterials(model,sapmodel,program)
+    with stage("load patterns"):
+        defineLoadPatterns(model,sapmodel,program,swm)
+    with stage("sections"):
+        defineSections(model,sapmodel,program,swm,modtypes,wallcrk,slabmode)
+    with stage("piers/spandrels"):
+        defineLabels(model,sapmodel,program)
+
+#A utility function that creates the group of a layer's lines, shells or points
+def setGroup(sapmodel,grname):
+    return sapmodel.GroupDef.SetGroup(grname,-1,True,True,True,True,True,True,True,True,False,False,True)
+
+#A utility function that returns the name given by an API call that returns a name [ByRef] and a return code
+#The name is the last ByRef argument [AreaObj.AddByCoord returns X, Y, Z, Name then the return code]
+def apiName(result,default):
+    if isinstance(result,(list,tuple)) and len(result) > 1 and result[-2]:
+        return result[-2]
+    return default
+
+#Create every joint once, named by its number, returns the names given to them
+def drawJoints(xyz,sapmodel):
+    jnames = []
+    for k, (x, y, z) in enumerate(xyz.tolist()):
+        name = str(k+1)
+        result = sapmodel.PointObj.AddCartesian(x,y,z,name,name,"Global",True,0) #joints are already merged
+        jnames.append(apiName(result,name))
+    return jnames
+
+#A utility function that returns a method of the SapModel by its path [e.g. "FrameObj.SetLoadDistributed"]
+def _method(sapmodel,path):
+    obj = sapmodel
+    for name in path.split('.'):
+        obj = getattr(obj,name)
+    return obj
+
+#A utility function that makes an assignment [its arguments after the element's name and before ItemType] to an element,
+#or keeps it at the plan to be made later; slot is what it replaces [e.g. the loads of a pattern]
+def _assign(sapmodel,plan,kind,elemname,slot,path,args):
+    if plan is None:
+        return _method(sapmodel,path)(elemname,*(_callArgs(args) + [OBJECT]))
+    plan.assign(kind,elemname,slot,path,args)
+
+#A utility function that returns the names of the groups of the model
+def groupNames(sapmodel):
+    result = sapmodel.GroupDef.GetNameList(0,[])
+    if not isinstance(result,(list,tuple)) or result[-1] != 0:
+        return set()
+    return set(result[1])
+
+#A utility function that converts the kept arguments [tuples are hashable] to those of the call [lists are arrays]
+def _callArgs(args):
+    return [list(arg) if isinstance(arg,tuple) else arg for arg in args]
+
+#The plan of the assignments of elements: every element's last assignment of every slot is kept [as it would replace the
+#previous ones], then an assignment shared by all the members of a group is made once to the group, and the elements with
+#the same remaining assignments are put in a temporary group when it takes fewer calls than assigning them one by one
+class AssignmentPlan(object):
+    def __init__(self):
+        self.targets = {} #(kind, name) -> {slot: (path, arguments)} in the order they're assigned
+        self.order = [] #(kind, name) in the order they're met
+        self.groups = [] #(group, [(kind, name) of its members])
+        self.members = {}
+        self.calls = 0 #calls made by apply
+
+    #Keep the membership of an element at a group that already exists [e.g. the group of a layer]
+    def member(self,group,kind,elemname):
+        members = self.members.get(group)
+        if members is None:
+            members = self.members[group] = []
+            self.groups.append((group,members))
+        members.append((kind,elemname))
+
+    def assign(self,kind,elemname,slot,path,args):
+        key = (kind,elemname)
+        items = self.targets.get(key)
+        if items is None:
+            items = self.targets[key] = OrderedDict()
+            self.order.append(key)
+        items[slot] = (path,args)
+
+    def _call(self,sapmodel,path,name,args,itemtype):
+        self.calls += 1
+        return _method(sapmodel,path)(name,*(_callArgs(args) + [itemtype]))
+
+    #Make all the assignments, returns the number of calls
+    def apply(self,sapmodel):
+        remaining = dict((key,OrderedDict(items)) for key, items in self.targets.items())
+        #the assignments shared by every member of an existing group
+        for group, members in self.groups:
+            if not all(key in self.targets for key in members):
+                continue
+            shared = list(self.targets[members[0]].items())
+            for key in members[1:]:
+                items = self.targets[key]
+                shared = [(slot,item) for slot, item in shared if items.get(slot) == item]
+            for slot, (path, args) in shared:
+                self._call(sapmodel,path,group,args,GROUP)
+                for key in members:
+                    remaining[key].pop(slot,None)
+
+        #the elements with the same remaining assignments
+        buckets = {}
+        border = []
+        for key in self.order:
+            items = remaining[key]
+            if not items:
+                continue
+            signature = (key[0],tuple(items.items()))
+            if signature not in buckets:
+                buckets[signature] = []
+                border.append(signature)
+            buckets[signature].append(key[1])
+        ngroups = 0
+        existing = None #the groups of the model, read before the first temporary group
+        for signature in border:
+            kind, items = signature
+            names = buckets[signature]
+            if len(names)*len(items) <= len(names) + len(items) + 2: #SetGroup, the memberships, the assignments and Delete
+                for name in names:
+                    for slot, (path, args) in items:
+                        self._call(sapmodel,path,name,args,OBJECT)
+                continue
+            if existing is None:
+                existing = groupNames(sapmodel)
+                self.calls += 1
+            ngroups += 1
+            while ASSIGN_GROUP % ngroups in existing: #a group of the user isn't used, nor deleted
+                ngroups += 1
+            grname = ASSIGN_GROUP % ngroups
+            setGroup(sapmodel,grname)
+            assignpath = {'frame':'FrameObj.SetGroupAssign','area':'AreaObj.SetGroupAssign','point':'PointObj.SetGroupAssign'}[kind]
+            for name in names:
+                self._call(sapmodel,assignpath,name,(grname,False),OBJECT)
+            for slot, (path, args) in items:
+                self._call(sapmodel,path,grname,args,GROUP)
+            ret = sapmodel.GroupDef.Delete(grname) #the assignments stay
+            self.calls += 2
+        return self.calls
+
+#Assign the distributed loads of a line [lstart, lend are the ranges of the loads of every line]
+def assignFrameLoads(model,e,elemname,sapmodel,program,swm,lstart,lend,plan=None):
+    loads = model.frameloads
+    for j in range(lstart[e],lend[e]):
+        load = translateLoad(program,swm,model.patterns[loads.pattern[j]],int(loads.direction[j]),"frame")
+        if load is None:
+            continue
+        pattern, direction, cs = load
+        ret = _assign(sapmodel,plan,'frame',elemname,('load',pattern),'FrameObj.SetLoadDistributed',
+                      (pattern,1,direction,0,1,float(loads.start[j]),float(loads.end[j]),cs,True,True))
+
+#Assign the uniform loads, pier and spandrel labels of a 3dface
+def assignAreaData(model,e,elemname,sapmodel,program,swm,lstart,lend,plan=None):
+    loads = model.arealoads
+    elemtype = "wall" if model.areatype[e] == WALL else "slab"
+    for j in range(lstart[e],lend[e]):
+        load = translateLoad(program,swm,model.patterns[loads.pattern[j]],int(loads.direction[j]),elemtype)
+        if load is None:
+            continue
+        pattern, direction, cs = load
+        ret = _assign(sapmodel,plan,'area',elemname,('load',pattern),'AreaObj.SetLoadUniform',(pattern,float(loads.value[j]),direction,True,cs))
+    if model.areapier[e] != NOREF:
+        ret = _assign(sapmodel,plan,'area',elemname,'pier','AreaObj.SetPier',(model.labels[model.areapier[e]],))
+    if model.areaspand[e] != NOREF:
+        ret = _assign(sapmodel,plan,'area',elemname,'spandrel','AreaObj.SetSpandrel',(model.labels[model.areaspand[e]],))
+
+#Draw the lines of a layer between their joints with their distributed loads, idx are their indices in the import model
+#With a plan [AssignmentPlan], the loads are kept at it with the lines' group
+def drawlines(model,names,idx,layer,sapmodel,program,swm,frj,jnames,plan=None):
+    grname = layer + '_' + 'LINES'
+    ret = setGroup(sapmodel,grname) #create a group for this layer
+    loads = model.frameloads
+    lstart, lend = loads.ranges(model.nframes())
+    for e in idx:
+        elemname = names[e]
+        ret = sapmodel.FrameObj.AddByPoint(jnames[frj[e,0]],jnames[frj[e,1]],elemname,model.sections[model.framesec[e]],elemname)
+        ret = sapmodel.FrameObj.SetGroupAssign(elemname,grname,False,0) #assign to its special group
+        if plan is not None:
+            plan.member(grname,'frame',elemname)
+        assignFrameLoads(model,e,elemname,sapmodel,program,swm,lstart,lend,plan)
+
+#Draw the 3dfaces of a layer by their joints with their uniform loads, pier and spandrel labels [triangles by 3 joints]
+def drawFaces(model,names,idx,layer,sapmodel,program,swm,arj,jnames,plan=None):
+    grname = layer + '_' + 'Shells'
+    ret = setGroup(sapmodel,grname) #create a group for this layer
+    loads = model.arealoads
+    lstart, lend = loads.ranges(model.nareas())
+    fj, nj = faceJoints(arj[idx])
+    for k, e in enumerate(idx):
+        elemname = names[e]
+        n = int(nj[k])
+        ret = sapmodel.AreaObj.AddByPoint(n,[jnames[j] for j in fj[k,:n]],elemname,model.sections[model.areasec[e]],elemname)
+        ret = sapmodel.AreaObj.SetGroupAssign(elemname,grname,False,0)
+        if plan is not None:
+            plan.member(grname,'area',elemname)
+        assignAreaData(model,e,elemname,sapmodel,program,swm,lstart,lend,plan)
+
+#Assign the restraints of a layer's points to their joints, and add these joints to the layer's group
+def drawPoints(model,idx,layer,sapmodel,pointjoint,jnames,plan=None):
+    grname = layer + '_' + 'POINTS'
+    ret = setGroup(sapmodel,grname) #create a group for this layer
+    for e in idx:
+        restraint = model.pointrestraint[e]
+        if restraint == NORESTRAINT:
+            continue #points are only drawn to carry restraints
+        jname = jnames[pointjoint[e]]
+        ret = sapmodel.PointObj.SetGroupAssign(jname,grname,False,0)
+        if plan is not None:
+            plan.member(grname,'point',jname)
+        if restraint in RESTRAINT_DOFS:
+            ret = _assign(sapmodel,plan,'point',jname,'restraint','PointObj.SetRestraint',(tuple(RESTRAINT_DOFS[restraint]),))
+
+#Draw all elements: the merged joints first, then lines and 3dfaces by their joints, the columns' layer first
+#If grouped, the loads, restraints and labels are assigned at the end by an AssignmentPlan
+def emitObjects(model,sapmodel,program,swm,colyr='None',tol=JOINT_TOL,grouped=True):
+    with stage("joints"):
+        xyz, frj, arj, restrained, poj = modelJoints(model,tol)
+        pointjoint = dict(zip(restrained,poj))
+        jnames = drawJoints(xyz,sapmodel)
+    frnames = model.elementNames('frame')
+    shnames = model.elementNames('area')
+    frbylayer = model.byLayer(model.framelayer)
+    shbylayer = model.byLayer(model.arealayer)
+    pobylayer = model.byLayer(model.pointlayer)
+    plan = AssignmentPlan() if grouped else None
+
+    order = list(range(0,len(model.layers)))
+    ci = model.layers.get(colyr)
+    if ci != NOREF:
+        order.remove(ci)
+        order.insert(0,ci)
+    for li in order:
+        layername = model.layers[li]
+        with stage("lines: " + layername,"layer"):
+            drawlines(model,frnames,frbylayer[li],layername,sapmodel,program,swm,frj,jnames,plan)
+        with stage("faces: " + layername,"layer"):
+            drawFaces(model,shnames,shbylayer[li],layername,sapmodel,program,swm,arj,jnames,plan)
+        with stage("points: " + layername,"layer"):
+            drawPoints(model,pobylayer[li],layername,sapmodel,pointjoint,jnames,plan)
+    if plan is not None:
+        with stage("assignments"):
+            plan.apply(sapmodel)
@@ -0,0 +1,215 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Functions that read an AutoCAD document (through COM) into the import model
+2- A bulk fetch of the geometry of a document in one step, through geomdump.lsp
+3- Functions that read a .dxf file (without AutoCAD) into the import model, large ones in parallel shards
+"""
+
+import array
+import io
+import locale
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+
+from xrecords import NAMED_DICTS, XDICT_KEYS, BadXRecord, XRecordReader, recordKind
+from dxfreader import DxfDrawing, LOAD_KEYS
+from model import ModelBuilder, mergeModels
+from cache import contentHash
+
+SELECT_ALL = 5
+ENTITY_TYPES = ['LINE','3DFACE','POINT']
+MODEL_SPACE = 'Model' #the layout [group code 410] of the elements of model space, the ones the "dumpxrecords" macro reads
+OBJECT_TYPES = {'AcDbLine':'LINE','AcDbFace':'3DFACE','AcDbPoint':'POINT'} #ObjectName -> DXF type
+GEOM_TYPES = {1:'LINE',2:'3DFACE',3:'POINT'} #type codes of "dump-geom" [geomdump.lsp]
+GEOM_TIMEOUT = 120 #seconds to wait for "dump-geom"
+
+#A utility function that gets the typed record of an XRecord by its Object ID
+#xrecs are the dump of "dumpxrecords" keyed by Object ID, or an XRecordReader that reads them one by one
+#An XRecord that the "dumpxrecords" macro didn't read is a BadXRecord, so validate.py reports it instead of failing here
+def _xrecord(xrecs,objid,kind):
+    if isinstance(xrecs,XRecordReader):
+        return xrecs.record(objid,kind)
+    rec = xrecs.get(objid)
+    if rec is None:
+        return BadXRecord(kind,(),(),"XRecord %s wasn't read from the drawing" % objid)
+    return rec
+
+#A utility function that reads the named dictionaries of a document as typed records
+def documentDictionaries(doc,xrecs):
+    dicts = {}
+    for name in NAMED_DICTS:
+        records = []
+        try:
+            mydict = doc.Dictionaries.Item(name)
+        except Exception:
+            dicts[name] = records #the dictionary wasn't created by insert_struct_prop.lsp
+            continue
+        for j in range(0,mydict.Count):
+            records.append(_xrecord(xrecs,mydict.Item(j).ObjectID,name))
+        dicts[name] = records
+    return dicts
+
+#A utility function that gets the coordinates of a line, 3dface or point as (x,y,z) of every vertex one after another
+def entityCoords(elem,enttype):
+    if enttype == 'LINE':
+        return tuple(elem.StartPoint) + tuple(elem.EndPoint)
+    elif enttype == '3DFACE':
+        return tuple(elem.Coordinate(0)) + tuple(elem.Coordinate(1)) + tuple(elem.Coordinate(2)) + tuple(elem.Coordinate(3))
+    return tuple(elem.Coordinates)
+
+#A utility function that gets the typed records of an element's extension dictionary
+def entityXData(elem,xrecs):
+    xdata = {}
+    if not elem.HasExtensionDictionary:
+        return xdata
+    elemxdict = elem.GetExtensionDictionary()
+    for j in range(0,elemxdict.Count):
+        obj = elemxdict.Item(j)
+        key = obj.Name
+        if key not in XDICT_KEYS:
+            continue
+        if key in LOAD_KEYS:
+            kind = recordKind(key,elem.ObjectName)
+            xdata[key] = [_xrecord(xrecs,obj.Item(k).ObjectID,kind) for k in range(0,obj.Count)] #a dictionary of loads, one per load pattern
+        else:
+            xdata[key] = _xrecord(xrecs,obj.ObjectID,key)
+    return xdata
+
+#Get the geometry of all lines, 3dfaces and points of a document at once, with "dump-geom" of geomdump.lsp
+#Returns handles, whether they have extension dictionaries, layers, signatures (the data of their extension dictionaries)
+#and one array (n,13) of [type code, 4 vertices' x y z]
+#Returns None if AutoCAD refused the command [e.g. the document is busy, or geomdump.lsp can't be loaded] or didn't write the
+#geometry within timeout seconds, the elements are read one by one then
+def fetchGeometry(doc,lisppath,timeout=GEOM_TIMEOUT):
+    tmpdir = tempfile.mkdtemp()
+    base = os.path.join(tmpdir,'geom').replace('\\','/')
+    try:
+        try:
+            doc.SendCommand('(load "%s")\n(dump-geom "%s")\n' % (lisppath.replace('\\','/'),base))
+        except Exception:
+            return None
+        deadline = time.time() + timeout
+        while not os.path.exists(base + '.geo'):
+            if time.time() > deadline:
+                return None
+            time.sleep(0.05)
+        geo = np.fromfile(base + '.geo',sep=' ').reshape(-1,13)
+        handles = []
+        hasxdict = []
+        layers = []
+        signatures = []
+        f = io.open(base + '.ids',encoding=locale.getpreferredencoding())
+        try:
+            for line in f:
+                handle, xd, layer, signature = line.rstrip('\r\n').split('\t',3)
+                handles.append(handle)
+                hasxdict.append(xd == '1')
+                layers.append(layer)
+                signatures.append(signature)
+        finally:
+            f.close()
+        if len(handles) != len(geo):
+            return None
+        return handles, hasxdict, layers, signatures, geo
+    finally:
+        shutil.rmtree(tmpdir,ignore_errors=True)
+
+#A utility function that adds all lines, 3dfaces and points of a document's model space with one selection, reading them
+#element by element [the elements of paper space and layouts aren't imported]
+def _addSelected(builder,doc,xrecs):
+    try:
+        ss = doc.SelectionSets.Add("Import")
+    except Exception:
+        ss = doc.SelectionSets.Item("Import") #left by a previous session
+    ss.Clear()
+    ftype = array.array('h',[0,410]) #DXF of type and of layout
+    ss.Select(SELECT_ALL,(0,0,0),(0,0,0),ftype,[','.join(ENTITY_TYPES),MODEL_SPACE])
+    for j in range(0,ss.Count):
+        elem = ss.Item(j)
+        enttype = OBJECT_TYPES.get(elem.ObjectName)
+        if enttype is None:
+            continue
+        builder.addEntity(elem.Handle,enttype,elem.Layer,entityCoords(elem,enttype),entityXData(elem,xrecs))
+    ss.Delete()
+
+#Read an AutoCAD document into the import model, xrecs are the document's XRecords keyed by Object ID
+#All lines, 3dfaces and points are got at once, then the import model buckets them by layer
+#The geometry is read in one step with geomdump.lsp [at lisppath], or element by element if it isn't given or fails
+#With the geometry's dump, a cache [cache.ExtractionCache] keeps the elements, and only the new or changed ones are read again
+def extractDocument(doc,xrecs,lisppath=None,cache=None):
+    builder = ModelBuilder()
+    builder.setDefinitions(documentDictionaries(doc,xrecs))
+    for i in range(0,doc.Layers.Count):
+        builder.addLayer(doc.Layers.Item(i).Name) #keep the order of the layers' table
+
+    dump = None
+    if lisppath is not None:
+        dump = fetchGeometry(doc,lisppath)
+    if dump is None:
+        _addSelected(builder,doc,xrecs)
+        return builder.finish()
+
+    handles, hasxdict, layers, signatures, geo = dump
+    coords = geo[:,1:].tolist()
+    for k in range(0,len(handles)):
+        handle = handles[k]
+        enttype = GEOM_TYPES[int(geo[k,0])]
+        if cache is not None:
+            chash = contentHash(handle,enttype,layers[k],geo[k],signatures[k])
+            entry = cache.get(handle,chash)
+            if entry is not None:
+                builder.addEntity(handle,enttype,layers[k],entry[3],entry[4])
+                continue
+        xdata = {}
+        if hasxdict[k]:
+            xdata = entityXData(doc.HandleToObject(handle),xrecs) #only the extension dictionary is read through COM
+        if cache is not None:
+            cache.put(handle,chash,enttype,layers[k],coords[k],xdata)
+        builder.addEntity(handle,enttype,layers[k],coords[k],xdata)
+    return builder.finish()
+
+#A utility function that reads entities of a drawing into an import model, the layers keep the order of the layers' table
+def _buildEntities(drawing,entities,definitions):
+    builder = ModelBuilder()
+    builder.setDefinitions(definitions)
+    for layername in drawing.layers:
+        builder.addLayer(layername)
+    for ent in entities:
+        builder.addEntity(ent.handle,ent.type,ent.layer,ent.coords,ent.xdata)
+    return builder.finish()
+
+#The drawing of a pool's process, indexed once by the parent and sent once to every process
+_shared = None
+
+def _initShard(drawing):
+    global _shared
+    _shared = drawing
+
+#Read a shard of the ENTITIES section into an import model without definitions [its arrays are sent back at once]
+def _readShard(shard):
+    start, end = shard
+    return _buildEntities(_shared,_shared.entities(None,start,end),{})
+
+#Read a .dxf file (a path or an already indexed DxfDrawing) into the import model
+#With processes other than 1, a large drawing is split into shards read by a pool of processes [None: one per CPU],
+#their models are merged in order into the same model as that of one process
+def extractDxf(drawing,processes=1):
+    if not isinstance(drawing,DxfDrawing):
+        drawing = DxfDrawing(drawing)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    shards = drawing.shards(4*processes) if processes > 1 else [] #more shards than processes, so they're balanced
+    if len(shards) < 2:
+        return _buildEntities(drawing,drawing.entities(),drawing.dictionaries())
+    pool = multiprocessing.Pool(min(processes,len(shards)),_initShard,(drawing,))
+    try:
+        models = pool.map(_readShard,shards,chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+    return mergeModels(models,drawing.dictionaries())
@@ -0,0 +1,73 @@
+;Author: Serag Hassouna
+;************
+;Purpose of this lisp file:-
+;It's loaded by CAD2ETABSnSAP into the drawing being imported, it writes the geometry of all lines, 3dfaces and points
+;at once, so the application reads all coordinates in one step instead of reading them element by element.
+;It's kept apart from "insert_struct_prop.lsp", because loading that file initializes the drawing's definitions.
+;***********************
+;List of functions:-
+;1- dump-geom: writes the geometry of all lines, 3dfaces and points to 2 text files
+;2- obj-sig: a utility function that returns the data of an XRecord, or of all XRecords of a dictionary, as one string
+;3- xdict-sig: a utility function that returns the data of an element's extension dictionary as one string
+;***********************
+
+;obj-sig
+(defun obj-sig (ename / ed)
+  (setq ed (entget ename))
+  (if (= (cdr (assoc 0 ed)) "DICTIONARY")
+    (apply 'strcat (mapcar '(lambda (item)
+			      (cond
+				((= (car item) 3) (strcat ";" (cdr item))) ;key
+				((member (car item) '(350 360)) (obj-sig (cdr item))) ;entry
+				(T "")
+				);End cond
+			      )
+			   ed))
+    (vl-prin1-to-string (cdr (member '(100 . "AcDbXrecord") ed))) ;data of the XRecord
+    );End if
+  );End defun
+
+;****
+
+;xdict-sig
+(defun xdict-sig (ed / xdict)
+  (setq xdict (cdr (assoc 360 (member '(102 . "{ACAD_XDICTIONARY") ed))))
+  (if xdict (obj-sig xdict) "")
+  );End defun
+
+;****
+
+;dump-geom
+;fname.geo: a row for every element of: its type [1 line, 2 3dface, 3 point] and 4 vertices' x y z, unused vertices are 0 0 0
+;fname.ids: a row for every element of: its handle, 1 if it has an extension dictionary or 0, its layer
+;and the data of its extension dictionary [separated by tabs], the application uses it to know the changed elements
+;the files are written with temporary names then renamed, so the application knows when they are complete
+(defun dump-geom (fname / ss len i ed typ code pts fgeo fids)
+  (setq ss (ssget "_X" '((0 . "LINE,3DFACE,POINT") (410 . "Model")))) ;model space only, as the XRecords' dump
+  (setq fgeo (open (strcat fname ".geo.tmp") "w"))
+  (setq fids (open (strcat fname ".ids.tmp") "w"))
+  (if ss (setq len (sslength ss)) (setq len 0))
+  (setq i 0)
+  (repeat len
+    (progn
+      (setq ed (entget (ssname ss i)))
+      (setq typ (cdr (assoc 0 ed)))
+      (cond
+	((= typ "LINE") (setq code 1 pts (list (cdr (assoc 10 ed)) (cdr (assoc 11 ed)))))
+	((= typ "3DFACE") (setq code 2 pts (list (cdr (assoc 10 ed)) (cdr (assoc 11 ed)) (cdr (assoc 12 ed)) (cdr (assoc 13 ed)))))
+	(T (setq code 3 pts (list (cdr (assoc 10 ed)))))
+	);End cond
+      (repeat (- 4 (length pts)) (setq pts (append pts (list '(0.0 0.0 0.0))))) ;unused vertices
+      (write-line (strcat (itoa code)
+			  (apply 'strcat (mapcar '(lambda (pt) (strcat " " (rtos (car pt) 2 12) " " (rtos (cadr pt) 2 12) " " (rtos (caddr pt) 2 12))) pts)))
+	fgeo)
+      (write-line (strcat (cdr (assoc 5 ed)) "\t" (if (member '(102 . "{ACAD_XDICTIONARY") ed) "1" "0") "\t" (cdr (assoc 8 ed)) "\t" (xdict-sig ed)) fids)
+      (setq i (1+ i))
+      );End progn [of repeat]
+    );End repeat
+  (close fgeo)
+  (close fids)
+  (vl-file-rename (strcat fname ".ids.tmp") (strcat fname ".ids"))
+  (vl-file-rename (strcat fname ".geo.tmp") (strcat fname ".geo")) ;the last one, the application waits for it
+  (princ) ;clean end
+  );End defun
@@ -0,0 +1,172 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The geometry check of the import model, before anything is sent to ETABS/SAP2000: zero-length and duplicate lines,
+degenerate, non-planar and duplicate 3dfaces, and the free ends of lines that miss a joint by a little [e.g. a beam's end
+a few millimetres from its column]
+2- The fix of these defects: near-miss ends are snapped to their joints, then zero-length lines, degenerate 3dfaces and
+duplicates are removed [the first element of duplicates is kept], non-planar 3dfaces are only reported
+3- Vertices are merged into joints by the spatial hash of joints.py, and near-miss ends are found by a grid of cells
+as large as the snapping distance, so the check takes O(n log n) [the sorting of the duplicates' keys]
+"""
+
+import os
+
+import numpy as np
+
+from joints import mergePoints, faceJoints, JOINT_TOL, NEIGHBOURS
+from validate import Issue
+
+SNAP_TOL = 0.05 #free ends of lines closer than this to a joint are snapped to it [m]
+PLANAR_TOL = 0.01 #the largest distance of a 3dface's vertex from its plane [m]
+
+#Kinds of defects
+ZERO_LENGTH = 'zero-length line'
+DUPLICATE_LINE = 'duplicate line'
+DEGENERATE_FACE = 'degenerate 3dface'
+NONPLANAR_FACE = 'non-planar 3dface'
+DUPLICATE_FACE = 'duplicate 3dface'
+NEAR_MISS = 'near-miss end'
+WARNINGS = [NONPLANAR_FACE] #they're reported, fixGeometry doesn't fix them and they don't stop the import
+
+GEOMETRY_EXT = '.geometry.csv'
+
+#A utility function that returns the first element of every key [rows], and for every element its first one
+def _firsts(keys):
+    if len(keys) == 0:
+        return np.zeros(0,dtype=np.intp)
+    uniq, first, inv = np.unique(keys,axis=0,return_index=True,return_inverse=True)
+    return first[inv.ravel()]
+
+#The defects of the model's geometry, as indices of its elements
+class GeometryDefects(object):
+    def __init__(self,model,tol=JOINT_TOL,snap=SNAP_TOL,planar=PLANAR_TOL):
+        self.model = model
+        nfr = model.nframes()
+        nar = model.nareas()
+        self.xyz, inv = mergePoints(np.concatenate([model.framexyz.reshape(-1,3),model.areaxyz.reshape(-1,3)]),tol)
+        frj = inv[:2*nfr].reshape(-1,2)
+        arj = inv[2*nfr:].reshape(-1,4)
+
+        #lines
+        self.zerolength = np.nonzero(frj[:,0] == frj[:,1])[0]
+        valid = frj[:,0] != frj[:,1]
+        first = _firsts(np.sort(frj,axis=1)[valid])
+        lines = np.nonzero(valid)[0]
+        dup = first != np.arange(len(lines))
+        self.duplines = lines[dup]
+        self.duplineof = lines[first[dup]]
+
+        #3dfaces: distinct vertices [3 of a triangle], area, and the distances of the vertices from the face's plane
+        v = model.areaxyz
+        fj, ndistinct = faceJoints(arj)
+        srt = np.sort(np.where(np.arange(4) < ndistinct[:,None],fj,-1),axis=1) #a triangle's repeated corner is -1
+        p = self.xyz[fj] #a triangle's normal is of its 3 distinct corners, a quad's of its diagonals
+        normal = np.where((ndistinct == 3)[:,None],np.cross(p[:,1] - p[:,0],p[:,2] - p[:,0]),np.cross(v[:,2] - v[:,0],v[:,3] - v[:,1]))
+        norm = np.sqrt((normal**2).sum(axis=1))
+        degenerate = (ndistinct < 3) | (0.5*norm <= tol*tol)
+        self.degenerate = np.nonzero(degenerate)[0]
+        unit = normal/np.where(norm > 0,norm,1.0)[:,None]
+        centre = v.mean(axis=1)
+        offplane = np.abs(((v - centre[:,None,:])*unit[:,None,:]).sum(axis=2)).max(axis=1)
+        self.nonplanar = np.nonzero(~degenerate & (ndistinct == 4) & (offplane > planar))[0]
+        self.offplane = offplane[self.nonplanar]
+        faces = np.nonzero(~degenerate)[0]
+        first = _firsts(srt[faces])
+        dup = first != np.arange(len(faces))
+        self.dupfaces = faces[dup]
+        self.dupfaceof = faces[first[dup]]
+
+        #free ends of lines [their joint is used by no other element] near another joint
+        self.nearmiss, self.nearend, self.neartarget, self.neardist = self._nearMisses(frj,inv,valid,tol,snap)
+
+    def _nearMisses(self,frj,inv,valid,tol,snap):
+        empty = np.zeros(0,dtype=np.intp)
+        uses = np.bincount(inv,minlength=len(self.xyz))
+        free = [(e,end) for e, end in zip(*np.nonzero((uses[frj] == 1) & valid[:,None]))]
+        if not free or snap <= tol:
+            return empty, empty, empty, np.zeros(0)
+        cells = np.floor(self.xyz/snap).astype(np.int64).tolist()
+        grid = {}
+        for j in range(0,len(cells)):
+            grid.setdefault(tuple(cells[j]),[]).append(j)
+        pts = self.xyz.tolist()
+        found = []
+        for e, end in free:
+            j = frj[e,end]
+            x, y, z = pts[j]
+            cx, cy, cz = cells[j]
+            best = None
+            for dx, dy, dz in NEIGHBOURS:
+                for k in grid.get((cx+dx,cy+dy,cz+dz),()):
+                    if k == j or k == frj[e,1-end] or (uses[k] == 1 and k > j):
+                        continue #2 free ends near each other: only one of them is snapped
+                    px, py, pz = pts[k]
+                    d = ((px-x)**2 + (py-y)**2 + (pz-z)**2) ** 0.5
+                    if d <= snap and (best is None or d < best[1]):
+                        best = (k,d)
+            if best is not None:
+                found.append((e,end,best[0],best[1]))
+        if not found:
+            return empty, empty, empty, np.zeros(0)
+        e, end, k, d = zip(*found)
+        return np.array(e,dtype=np.intp), np.array(end,dtype=np.intp), np.array(k,dtype=np.intp), np.array(d)
+
+    #The number of defects that fixGeometry fixes
+    def fixable(self):
+        return len(self.zerolength) + len(self.duplines) + len(self.degenerate) + len(self.dupfaces) + len(self.nearmiss)
+
+    def count(self):
+        return self.fixable() + len(self.nonplanar)
+
+    #The defects as problems of the drawing [validate.Issue], with the handles and layers of their elements
+    def issues(self):
+        m = self.model
+        issues = []
+        def line(kind,e,message):
+            issues.append(Issue(kind,m.framehandles[e],m.layers[m.framelayer[e]],message))
+        def face(kind,e,message):
+            issues.append(Issue(kind,m.areahandles[e],m.layers[m.arealayer[e]],message))
+        for e, end, d in zip(self.nearmiss,self.nearend,self.neardist):
+            line(NEAR_MISS,e,"line's %s misses a joint by %.1f mm" % (['start','end'][end],1000*d))
+        for e in self.zerolength:
+            line(ZERO_LENGTH,e,"line of zero length")
+        for e, of in zip(self.duplines,self.duplineof):
+            line(DUPLICATE_LINE,e,"duplicate of the line %s" % m.framehandles[of])
+        for e in self.degenerate:
+            face(DEGENERATE_FACE,e,"3dface without area")
+        for e, d in zip(self.nonplanar,self.offplane):
+            face(NONPLANAR_FACE,e,"a vertex is %.1f mm off the 3dface's plane" % (1000*d))
+        for e, of in zip(self.dupfaces,self.dupfaceof):
+            face(DUPLICATE_FACE,e,"duplicate of the 3dface %s" % m.areahandles[of])
+        return issues
+
+#A utility function that returns the report file of the geometry's defects of a drawing, next to it [see validate.writeIssues]
+def geometryPath(drawingpath):
+    return os.path.splitext(drawingpath)[0] + GEOMETRY_EXT
+
+#Check the geometry of the model, returns its defects [GeometryDefects]
+def checkGeometry(model,tol=JOINT_TOL,snap=SNAP_TOL,planar=PLANAR_TOL):
+    return GeometryDefects(model,tol,snap,planar)
+
+#Fix the defects of the model's geometry in place: near-miss ends are snapped first, then the lines and 3dfaces that are
+#zero-length, degenerate or duplicates [after snapping] are removed; returns the number of snapped ends and removed elements
+def fixGeometry(model,tol=JOINT_TOL,snap=SNAP_TOL,planar=PLANAR_TOL):
+    defects = GeometryDefects(model,tol,snap,planar)
+    nsnapped = len(defects.nearmiss)
+    if nsnapped:
+        framexyz = model.framexyz.copy()
+        for e, end, k in zip(defects.nearmiss,defects.nearend,defects.neartarget):
+            framexyz[e,3*end:3*end+3] = defects.xyz[k]
+        model.framexyz = framexyz
+        defects = GeometryDefects(model,tol,0,planar) #the joints after snapping
+    frkeep = np.ones(model.nframes(),dtype=bool)
+    frkeep[defects.zerolength] = False
+    frkeep[defects.duplines] = False
+    arkeep = np.ones(model.nareas(),dtype=bool)
+    arkeep[defects.degenerate] = False
+    arkeep[defects.dupfaces] = False
+    nremoved = int((~frkeep).sum() + (~arkeep).sum())
+    if nremoved:
+        model.keepElements(frkeep,arkeep)
+    return nsnapped, nremoved
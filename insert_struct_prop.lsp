@@ -56,6 +56,7 @@
 ;17- C:set-flatslabs: assigns a flat slab section property alongside with its dead load [for usage if "Dead" Self Weight Modifier=0]
 ;18- C:set-restraints: assigns hinged or fixed restrain over a group of joints
 ;19- C:delines: select lines only then delete them
+;20- C:tag-shw: tags a wall's stiff line with the data of draw-shw without drawing its elements, they're drawn at the import
 ;***********************
 
 ;**GENERAL UTILITY FUNCTIONS**
@@ -1791,9 +1792,9 @@
 
 ;****
 
-;13- draw-shw
-
-(defun C:draw-shw (/ stiffline0 stiffline stiffline1 beamsonwall spoint epoint i kwb intpt temppt ptlist dxfgrcd val flgpid flgsid flgwsp lpid lsid lwsp pid sid wsp xprop idtype loadstate sload eload flglpat lpat lapat ldir kwlist flgdpth ladpth dpth elembval osmode)
+;get-shw-data: a utility function that gets from the user the data of a wall [draw-shw and tag-shw], returns them in a list:
+;(section property, pier ID, spandral ID, loading state, start load, end load, load pattern, load direction, meshing dimension, depth)
+(defun get-shw-data (/ dxfgrcd val flgpid flgsid flgwsp lpid lsid lwsp pid sid wsp idtype loadstate sload eload flglpat lpat lapat ldir kwlist flgdpth ladpth dpth elembval)
   ;External variables:-
   ;pierids: the dictionary "PierIDs"
   ;spandids: the dictionary "SpandralIDs"
@@ -1815,72 +1816,6 @@
   ;initwalldepth: the XRecord of the initial value of wall depth
   ;lastwalldepth: the XRecord of the last assigned wall depth
 
-  ;<<The Plan is to get all intersection points with beams rested on wall, then derive the needed dimensions for meshing>>
-  ;Select the stiff line (representing the shearwall) and intersected beams
-  (print "[[Select ONLY the wall's stiff line]]")
-  (setq stiffline0 (ssget "_:S" '((-4 . "<OR") (0 . "LINE") (0 . "LWPOLYLINE") (0 . "SPLINE") (-4 . "OR>"))))
-  (setq stiffline (ssname stiffline0 0));get the line's ename
-  (setq stiffline1 stiffline)
-  (setq stiffline0 nil);no need for this selection set anymore
-  (setq stiffline (vlax-ename->vla-object stiffline)) ;convert stiff line to a vla-object
-
-  ;get stiffline's start and end points
-  (setq spoint (vla-get-startpoint stiffline)) ;get stiffline's start point
-  (setq spoint (vlax-safearray->list (vlax-variant-value spoint))) ;convert it to list
-  (setq epoint (vla-get-endpoint stiffline)) ;get stiffline's end point
-  (setq epoint (vlax-safearray->list (vlax-variant-value epoint))) ;convert it to list
-  
-  (setq kwb (pool-getkword "Yes" "Is the Wall connected with beam(s)/slab(s)?" '("Yes" "No")))
-  (if (eq kwb "Yes")
-    (progn
-  (print "[[Select beam(s)/slab(s) rested on wall. Selection of stiff line has no effect on results]]")
-  ;(setq stiffline1 (cdr (assoc 5 (entget stiffline1))))
-  ;(setq nostiff (list '(-4 . "<OR") (cons -4 "<NOT") (cons 5 stiffline1) (cons -4 "NOT>") '(0 . "LINE") '(0 . "3DFACE") '(0 . "LWPOLYLINE") '(-4 . "OR>"))) ;stiffline is not selectable
-  ;(print nostiff);debug line
-  (setq beamsonwall (ssget))
-  (ssdel stiffline1 beamsonwall) ;delete the stiffline if selected within the selection set
-  
-  ;get intersection points
-  
-  (setq i 0)
-  (repeat (sslength beamsonwall)
-    (progn
-      (setq objid (ssname beamsonwall i)) ;get beam's entity name
-      (setq objid (vlax-ename->vla-object objid)) ;convert beam to a vla-object
-      (setq intpt (vla-intersectwith stiffline objid acExtendNone)) ;get the variant safearray containing the intersection point
-      (setq temppt (vlax-safearray->list (vlax-variant-value intpt)));get beam's intersection point
-
-      ;for lines, things go perfectly, for 3dface with 2-point intersection, arrange them in temppt
-      (if (eq (vla-get-objectname objid) "AcDbFace")
-	(progn
-	  (if (eq 6 (length temppt))
-	    (setq temppt (list (list (nth 0 temppt) (nth 1 temppt) (nth 2 temppt)) (list (nth 3 temppt) (nth 4 temppt) (nth 5 temppt))));[then part]
-	    ;no else part
-	    );End if [to check whether the 3Dface intersects stiffline at one or two point]
-	  (if (eq 2 (length temppt))
-	    (setq ptlist (append ptlist temppt));then part [2-point intersection]
-	    (setq ptlist (append ptlist (list temppt)));else part [single-point intersection]
-	    );End if [of appending temppt to ptlist]
-	  );End progn [for 3DFaces of 2-point intersection]
-	(progn
-	  (setq ptlist (append ptlist (list temppt))) ;add intersection point to points list
-	  );End progn [for lines]
-	);End if [for 3DFaces of 2-point intersection]
-      
-      (setq i (1+ i))
-      );End progn [of repeat]
-    );End repeat
-  ;(setq ptlist (rem-dup ptlist)) ;remove duplicate points **_new_**
-  (setq ptlist (vl-remove spoint ptlist));remove start point from point list
-  (setq ptlist (vl-remove epoint ptlist));remove end point from point list
-  (setq ptlist (csortpts spoint ptlist)) ;sort points according to their distances from stiffline's start point
-  (setq ptlist (append (list spoint) (append ptlist (list epoint)))) ;create the full list of points
-  );End progn [then part]
-    (progn
-      (setq ptlist (list spoint epoint)) ;create the full list of points
-      );End progn [else part]
-    );End if
-
   ;get the wall's section property & pier or spandral ID
   (setq flgpid (XRecord-get-element initpierid1 1)) ;get flag of pier ID
   (setq flgsid (XRecord-get-element initspandid1 1)) ;get flag of spandral ID
@@ -2060,6 +1995,84 @@
       (populate-XRecord lastwalldepth 1 dxfgrcd val)
       );End progn [depth previously assigned]
     );End if [of wall depth assignment]
+
+  (list wsp pid sid loadstate sload eload lpat ldir elembval dpth)
+  );End defun
+
+;****
+
+;13- draw-shw
+
+(defun C:draw-shw (/ stiffline0 stiffline stiffline1 beamsonwall spoint epoint i kwb intpt temppt ptlist shwdata osmode)
+  ;External variables: the ones of get-shw-data
+
+  ;<<The Plan is to get all intersection points with beams rested on wall, then derive the needed dimensions for meshing>>
+  ;Select the stiff line (representing the shearwall) and intersected beams
+  (print "[[Select ONLY the wall's stiff line]]")
+  (setq stiffline0 (ssget "_:S" '((-4 . "<OR") (0 . "LINE") (0 . "LWPOLYLINE") (0 . "SPLINE") (-4 . "OR>"))))
+  (setq stiffline (ssname stiffline0 0));get the line's ename
+  (setq stiffline1 stiffline)
+  (setq stiffline0 nil);no need for this selection set anymore
+  (setq stiffline (vlax-ename->vla-object stiffline)) ;convert stiff line to a vla-object
+
+  ;get stiffline's start and end points
+  (setq spoint (vla-get-startpoint stiffline)) ;get stiffline's start point
+  (setq spoint (vlax-safearray->list (vlax-variant-value spoint))) ;convert it to list
+  (setq epoint (vla-get-endpoint stiffline)) ;get stiffline's end point
+  (setq epoint (vlax-safearray->list (vlax-variant-value epoint))) ;convert it to list
+  
+  (setq kwb (pool-getkword "Yes" "Is the Wall connected with beam(s)/slab(s)?" '("Yes" "No")))
+  (if (eq kwb "Yes")
+    (progn
+  (print "[[Select beam(s)/slab(s) rested on wall. Selection of stiff line has no effect on results]]")
+  ;(setq stiffline1 (cdr (assoc 5 (entget stiffline1))))
+  ;(setq nostiff (list '(-4 . "<OR") (cons -4 "<NOT") (cons 5 stiffline1) (cons -4 "NOT>") '(0 . "LINE") '(0 . "3DFACE") '(0 . "LWPOLYLINE") '(-4 . "OR>"))) ;stiffline is not selectable
+  ;(print nostiff);debug line
+  (setq beamsonwall (ssget))
+  (ssdel stiffline1 beamsonwall) ;delete the stiffline if selected within the selection set
+  
+  ;get intersection points
+  
+  (setq i 0)
+  (repeat (sslength beamsonwall)
+    (progn
+      (setq objid (ssname beamsonwall i)) ;get beam's entity name
+      (setq objid (vlax-ename->vla-object objid)) ;convert beam to a vla-object
+      (setq intpt (vla-intersectwith stiffline objid acExtendNone)) ;get the variant safearray containing the intersection point
+      (setq temppt (vlax-safearray->list (vlax-variant-value intpt)));get beam's intersection point
+
+      ;for lines, things go perfectly, for 3dface with 2-point intersection, arrange them in temppt
+      (if (eq (vla-get-objectname objid) "AcDbFace")
+	(progn
+	  (if (eq 6 (length temppt))
+	    (setq temppt (list (list (nth 0 temppt) (nth 1 temppt) (nth 2 temppt)) (list (nth 3 temppt) (nth 4 temppt) (nth 5 temppt))));[then part]
+	    ;no else part
+	    );End if [to check whether the 3Dface intersects stiffline at one or two point]
+	  (if (eq 2 (length temppt))
+	    (setq ptlist (append ptlist temppt));then part [2-point intersection]
+	    (setq ptlist (append ptlist (list temppt)));else part [single-point intersection]
+	    );End if [of appending temppt to ptlist]
+	  );End progn [for 3DFaces of 2-point intersection]
+	(progn
+	  (setq ptlist (append ptlist (list temppt))) ;add intersection point to points list
+	  );End progn [for lines]
+	);End if [for 3DFaces of 2-point intersection]
+      
+      (setq i (1+ i))
+      );End progn [of repeat]
+    );End repeat
+  ;(setq ptlist (rem-dup ptlist)) ;remove duplicate points **_new_**
+  (setq ptlist (vl-remove spoint ptlist));remove start point from point list
+  (setq ptlist (vl-remove epoint ptlist));remove end point from point list
+  (setq ptlist (csortpts spoint ptlist)) ;sort points according to their distances from stiffline's start point
+  (setq ptlist (append (list spoint) (append ptlist (list epoint)))) ;create the full list of points
+  );End progn [then part]
+    (progn
+      (setq ptlist (list spoint epoint)) ;create the full list of points
+      );End progn [else part]
+    );End if
+
+  (setq shwdata (get-shw-data)) ;get the wall's section property, pier or spandral ID, loads, meshing dimension and depth
   
   ;Now, let's draw the wall elements based on:-
   ;1- element's best chosen dimension value for meshing (from user)
@@ -2068,7 +2081,7 @@
   ;4- assign section property & pier/spandral ID for every element
   (setq osmode (getvar 'OSNAPCOORD)) ;get object snap overwriting system variable
   (setvar "OSNAPCOORD" 1)
-  (in-draw-shw ptlist wsp pid sid loadstate sload eload lpat ldir elembval dpth)
+  (apply 'in-draw-shw (cons ptlist shwdata)) ;shwdata: (wsp pid sid loadstate sload eload lpat ldir elembval dpth)
   (setvar "OSNAPCOORD" osmode)
 
   (princ) ;clean end
@@ -2076,6 +2089,67 @@
 
 ;****
 
+;20- tag-shw
+
+(defun C:tag-shw (/ stiffline0 stiffline shwdata exdict xprop dloads xrecload dxfgrcd val wsp pid sid loadstate sload eload lpat ldir elembval dpth)
+  ;External variables: the ones of get-shw-data
+  ;<<The stiff line keeps the wall's data in its extension dictionary, the importer divides the wall into panels like draw-shw>>
+  (print "[[Select ONLY the wall's stiff line]]")
+  (setq stiffline0 (ssget "_:S" '((0 . "LINE"))))
+  (setq stiffline (vlax-ename->vla-object (ssname stiffline0 0))) ;get the line as a vla-object
+  (setq stiffline0 nil) ;no need for this selection set anymore
+
+  (setq shwdata (get-shw-data))
+  (setq wsp (nth 0 shwdata) pid (nth 1 shwdata) sid (nth 2 shwdata) loadstate (nth 3 shwdata) sload (nth 4 shwdata) eload (nth 5 shwdata))
+  (setq lpat (nth 6 shwdata) ldir (nth 7 shwdata) elembval (nth 8 shwdata) dpth (nth 9 shwdata))
+  (if (eq (type dpth) (type 1)) (setq dpth (atof (itoa dpth)))) ;ensure that "dpth" is REAL
+
+  (if (>= dpth elembval)
+    (progn
+      (setq exdict (vla-GetExtensionDictionary stiffline)) ;get the stiff line's extension dictionary
+
+      ;fill "WallProp" XRecord
+      (setq xprop (add-or-getXRecord exdict "WallProp"))
+      (setq dxfgrcd '(1) val (list wsp))
+      (populate-XRecord xprop 1 dxfgrcd val)
+
+      ;fill "PierID" XRecord
+      (setq xprop (add-or-getXRecord exdict "PierID"))
+      (setq dxfgrcd '(1) val (list pid))
+      (populate-XRecord xprop 1 dxfgrcd val)
+
+      ;fill "SpandralID" XRecord
+      (setq xprop (add-or-getXRecord exdict "SpandralID"))
+      (setq dxfgrcd '(1) val (list sid))
+      (populate-XRecord xprop 1 dxfgrcd val)
+
+      ;fill "WallMesh" XRecord [depth, best dimension of the meshing elements]
+      (setq xprop (add-or-getXRecord exdict "WallMesh"))
+      (setq dxfgrcd '(1 2) val (list dpth elembval))
+      (populate-XRecord xprop 2 dxfgrcd val)
+
+      ;fill "DistLoads" XRecord of the load pattern [loads at the stiff line's level and at the wall's bottom], as set-frames-distload
+      (if (/= loadstate "None")
+	(progn
+	  (setq dloads (dict-in-xdict exdict "DistLoads"))
+	  (setq xrecload (add-or-getXRecord dloads lpat))
+	  (setq dxfgrcd '(1 2 3 4) val (list sload eload ldir lpat))
+	  (populate-XRecord xrecload 4 dxfgrcd val)
+	  );End progn [of loads]
+	);End if [of loading state]
+      (print "The stiff line is tagged!")
+      );End progn [proceed execution]
+    (progn
+      (print "Can't Proceed; Depth is smaller than meshing size!")
+      (alert "Can't Proceed; Depth is smaller than meshing size!")
+      );End progn [exit with a warning message]
+    );End if
+
+  (princ) ;clean end
+  );End defun
+
+;****
+
 ;assign-mat-solidflatslabs: a utility function that "really" works for the redefinition of solid and flat slab material properties
 (defun assign-mat-solidflatslabs (ty lastchmatslab lastmatslabs / kwlist sprop ls lmat xmat uw xsprop tksap tketabs dxfgrcd val)
   ;External variables:-
@@ -0,0 +1,200 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- A profiler of an import: the time of every stage (nested stages are kept), and the number and time of the calls of every
+remote method [ETABS/SAP2000's SapModel, AutoCAD and the Excel facilitator]
+2- The current profiler: the stages and calls are sent to it, it does nothing unless a profile is started
+3- The report of a profile as JSON, and as a trace file of Chrome's tracing (chrome://tracing or Perfetto),
+with an optional peak memory and the largest allocations [tracemalloc]
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    import tracemalloc #Python 3.4+
+except ImportError:
+    tracemalloc = None
+
+timer = getattr(time,'perf_counter',time.time)
+
+TOP_ALLOCATIONS = 10 #number of the largest allocations kept in the report
+
+#A utility function that tells values from remote objects, values read through a timed surface are returned as they are
+def _isValue(value):
+    if value is None or isinstance(value,(bool,int,float,str,bytes)):
+        return True
+    if isinstance(value,(tuple,list)):
+        return all(_isValue(v) for v in value)
+    try:
+        return isinstance(value,(long,unicode))
+    except NameError:
+        return False
+
+#A remote object seen through the profiler: its property reads and method calls are counted and timed by their path
+class TimedSurface(object):
+    def __init__(self,profiler,obj,path):
+        self.__dict__['_profiler'] = profiler
+        self.__dict__['_obj'] = obj
+        self.__dict__['_path'] = path
+
+    def __getattr__(self,name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        path = self._path + '.' + name if self._path else name
+        start = timer()
+        value = getattr(self._obj,name)
+        if _isValue(value):
+            self._profiler.count(path,timer() - start)
+            return value
+        return TimedSurface(self._profiler,value,path) #methods are counted when they're called
+
+    def __call__(self,*args):
+        start = timer()
+        try:
+            return self._obj(*args)
+        finally:
+            self._profiler.count(self._path,timer() - start)
+
+#The profiler of one import
+class Profiler(object):
+    def __init__(self,name='import',memory=False):
+        self.name = name
+        self.origin = timer()
+        self.started = time.time()
+        self.spans = [] #(name, category, start, seconds, depth) in the order they end
+        self.depth = 0
+        self.calls = {} #path -> [number of calls, seconds]
+        self.memory = memory and tracemalloc is not None
+        self.peak = None
+        self.top = []
+        self.total = None
+        if self.memory:
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self,name,category='stage'):
+        start = timer()
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            self.spans.append((name,category,start - self.origin,timer() - start,self.depth))
+
+    def count(self,path,seconds):
+        c = self.calls.get(path)
+        if c is None:
+            c = self.calls[path] = [0,0.0]
+        c[0] += 1
+        c[1] += seconds
+
+    #Get a remote object whose calls are counted, label is the first part of their paths (e.g. "SapModel")
+    def wrap(self,obj,label=''):
+        return TimedSurface(self,obj,label)
+
+    #Stop the profile: the total time, and the peak memory with the largest allocations
+    def finish(self):
+        self.total = timer() - self.origin
+        if self.memory and tracemalloc.is_tracing():
+            self.peak = tracemalloc.get_traced_memory()[1]
+            stats = tracemalloc.take_snapshot().statistics('lineno')[:TOP_ALLOCATIONS]
+            self.top = [{'where':str(stat.traceback),'mb':stat.size/1048576.0,'count':stat.count} for stat in stats]
+            tracemalloc.stop()
+
+    def report(self):
+        if self.total is None:
+            self.finish()
+        stages = [{'name':name,'category':cat,'start_s':start,'seconds':seconds,'depth':depth}
+                  for name, cat, start, seconds, depth in sorted(self.spans,key=lambda span: (span[2],span[4]))]
+        calls = {}
+        for path, (n, seconds) in self.calls.items():
+            calls[path] = {'count':n,'seconds':seconds,'mean_ms':1000.0*seconds/n}
+        return {'name':self.name,'started':time.strftime('%Y-%m-%d %H:%M:%S',time.localtime(self.started)),
+                'total_s':self.total,'stages':stages,'calls':calls,
+                'peak_mb':self.peak/1048576.0 if self.peak is not None else None,'top_allocations':self.top}
+
+    #The trace of Chrome's tracing: a complete event for every stage [in microseconds], and the calls' totals as metadata
+    def trace(self):
+        events = []
+        for name, cat, start, seconds, depth in self.spans:
+            events.append({'name':name,'cat':cat,'ph':'X','ts':start*1e6,'dur':seconds*1e6,'pid':1,'tid':1})
+        totals = dict((path,{'count':n,'seconds':seconds}) for path, (n, seconds) in self.calls.items())
+        return {'traceEvents':events,'displayTimeUnit':'ms','otherData':{'name':self.name,'calls':totals}}
+
+    #Write the report and the trace next to each other at a directory, returns their paths
+    def save(self,directory):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        paths = []
+        for suffix, data in [('.profile.json',self.report()),('.trace.json',self.trace())]:
+            path = os.path.join(directory,self.name + suffix)
+            f = open(path,'w')
+            try:
+                json.dump(data,f,indent=1,sort_keys=True)
+            finally:
+                f.close()
+            paths.append(path)
+        return paths
+
+    def summary(self,top=10):
+        lines = ["%s: %.3f s" % (self.name,self.total or 0.0)]
+        for name, cat, start, seconds, depth in sorted(self.spans,key=lambda span: (span[2],span[4])):
+            if depth <= 1:
+                lines.append("  %s%-32s %9.3f s" % ('  '*depth,name,seconds))
+        for path, (n, seconds) in sorted(self.calls.items(),key=lambda item: -item[1][1])[:top]:
+            lines.append("  %-40s %8d calls %9.3f s" % (path,n,seconds))
+        if self.peak is not None:
+            lines.append("  peak memory %.1f MB" % (self.peak/1048576.0))
+        return '\n'.join(lines)
+
+#The profiler used when no profile is started: it does nothing
+class NullProfiler(object):
+    @contextmanager
+    def stage(self,name,category='stage'):
+        yield
+
+    def count(self,path,seconds):
+        pass
+
+    def wrap(self,obj,label=''):
+        return obj
+
+_current = NullProfiler()
+
+#Start a profile, the stages and calls of every module go to it until it's stopped
+def startProfile(name='import',memory=False):
+    global _current
+    _current = Profiler(name,memory)
+    return _current
+
+#Stop the current profile, returns it
+def stopProfile():
+    global _current
+    prof = _current
+    _current = NullProfiler()
+    if isinstance(prof,Profiler):
+        prof.finish()
+    return prof
+
+def current():
+    return _current
+
+def stage(name,category='stage'):
+    return _current.stage(name,category)
+
+#A decorator that counts the calls of a function (e.g. an Excel macro's round trip) at the current profile
+def counted(path):
+    def decorate(fn):
+        def call(*args,**kw):
+            start = timer()
+            try:
+                return fn(*args,**kw)
+            finally:
+                _current.count(path,timer() - start)
+        call.__name__ = fn.__name__
+        call.__doc__ = fn.__doc__
+        return call
+    return decorate
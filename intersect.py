@@ -0,0 +1,186 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The intersections of lines [or other segments, e.g. the stiff lines of walls] with each other and with the edges of 3dfaces [e.g. a beam drawn across several columns, or
+across a wall], found in one pass: every segment is put in the cells of a uniform grid that its bounding box overlaps, then
+the segments of every cell are tested in pairs with NumPy
+2- The split of lines at their intersections, before emission: the segments keep the line's section, layer and labels, and
+its distributed loads are interpolated over them
+3- This replaces the "divide" command and the "ssget" of every line of get-interpts [insert_struct_prop.lsp]
+"""
+
+import numpy as np
+
+from joints import JOINT_TOL
+
+PARALLEL_TOL = 1e-9 #segments whose directions' cross product (relative) is below this are parallel
+GRID_SHIFT = 0.381966 #the grid's origin is shifted by this part of a cell, joints drawn at round distances fall inside cells
+MAX_CELLS = 64 #segments overlapping more cells than this [long sloped lines] are tested with every bounding box instead
+
+#A utility function that returns a key [int64] of every row of integers, equal rows have equal keys
+def _keys(rows):
+    if len(rows) == 0:
+        return np.zeros(0,dtype=np.int64)
+    rows = rows - rows.min(axis=0)
+    size = rows.max(axis=0) + 1
+    if float(np.prod(size.astype(float))) >= 2.0**62:
+        return np.unique(rows,axis=0,return_inverse=True)[1].ravel().astype(np.int64) #sorting the rows is much slower
+    return (rows[:,0]*size[1] + rows[:,1])*size[2] + rows[:,2]
+
+#A utility function that returns the pairs of segments whose bounding boxes (lo, hi) overlap, found by the cells of a uniform
+#grid that they share; only the pairs of an active segment [a line] with another one are returned, the active one first
+def _candidatePairs(lo,hi,cell,active):
+    origin = lo.min(axis=0) - GRID_SHIFT*cell
+    first = np.floor((lo - origin)/cell).astype(np.int64)
+    span = np.floor((hi - origin)/cell).astype(np.int64) - first + 1
+    ncells = span.prod(axis=1)
+    big = ncells > MAX_CELLS
+    small = np.nonzero(~big)[0]
+
+    #every (cell, segment) of the grid, sorted by cell
+    counts = ncells[small]
+    seg = np.repeat(small,counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,counts)
+    sx, sy = span[seg,0], span[seg,1]
+    cells = np.stack([first[seg,0] + local % sx,first[seg,1] + (local // sx) % sy,first[seg,2] + local // (sx*sy)],axis=1)
+    key = _keys(cells)
+    order = np.lexsort((seg,~active[seg],key))
+    seg = seg[order]
+    key = key[order]
+
+    #every active segment with the following ones of its cell [the active ones are first]
+    counts = np.where(active[seg],np.searchsorted(key,key,'right') - np.arange(len(key)) - 1,0)
+    a = np.repeat(np.arange(len(key)),counts)
+    b = a + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts,counts)
+    pairs = [np.stack([seg[a],seg[b]],axis=1)]
+    for i in np.nonzero(big)[0].tolist():
+        near = np.nonzero(np.all((lo <= hi[i]) & (hi >= lo[i]),axis=1))[0]
+        near = near[(near != i) & (active[i] | active[near])]
+        first = np.where(active[i],i,near)
+        pairs.append(np.stack([first,np.where(first == i,near,i)],axis=1))
+    pairs = np.concatenate(pairs)
+    if len(pairs) == 0:
+        return pairs
+    #a pair sharing many cells is found once, and a pair of active segments once in either order
+    n = len(lo)
+    swap = active[pairs[:,1]] & (pairs[:,1] < pairs[:,0])
+    pairs[swap] = pairs[swap][:,::-1]
+    pairs = np.sort(pairs[:,0]*n + pairs[:,1])
+    pairs = pairs[np.concatenate([[True],pairs[1:] != pairs[:-1]])]
+    pairs = np.stack([pairs // n,pairs % n],axis=1)
+    return pairs[np.all((lo[pairs[:,0]] <= hi[pairs[:,1]]) & (hi[pairs[:,0]] >= lo[pairs[:,1]]),axis=1)]
+
+#A utility function that returns the parameters [0, 1] of the points of segments (p, d) nearest to points q, and the distances
+def _project(p,d,q):
+    dd = (d*d).sum(axis=1)
+    t = np.clip(((q - p)*d).sum(axis=1)/dd,0.0,1.0)
+    dist = np.sqrt(((p + d*t[:,None] - q)**2).sum(axis=1))
+    return t, dist
+
+#A utility function that returns the parameters of the nearest points of 2 sets of segments (p1, d1) and (p2, d2), their
+#distances and whether they're parallel [the nearest points of parallel segments aren't unique]
+def _nearest(p1,d1,p2,d2):
+    r = p1 - p2
+    a = (d1*d1).sum(axis=1)
+    e = (d2*d2).sum(axis=1)
+    b = (d1*d2).sum(axis=1)
+    c = (d1*r).sum(axis=1)
+    f = (d2*r).sum(axis=1)
+    denom = a*e - b*b
+    parallel = denom <= PARALLEL_TOL*a*e
+    s = np.clip((b*f - c*e)/np.where(parallel,1.0,denom),0.0,1.0)
+    s[parallel] = 0.0
+    t = (b*s + f)/e
+    below = t < 0
+    above = t > 1
+    s = np.where(below,np.clip(-c/a,0.0,1.0),np.where(above,np.clip((b - c)/a,0.0,1.0),s))
+    t = np.clip(t,0.0,1.0)
+    dist = np.sqrt(((p1 + d1*s[:,None] - p2 - d2*t[:,None])**2).sum(axis=1))
+    return s, t, dist, parallel
+
+#Find the points where active segments meet other segments inside their lengths [not at their ends], segs are (n,2,3)
+#A segment meets another one where they cross, or where the other's end is on it [e.g. a column under a beam]
+#Returns the active segments and the parameters [0, 1] of their points, sorted by segment then parameter, without repetitions
+def segmentIntersections(segs,active,tol=JOINT_TOL):
+    p = segs[:,0]
+    d = segs[:,1] - segs[:,0]
+    length = np.sqrt((d*d).sum(axis=1))
+    valid = length > tol
+    empty = np.zeros(0,dtype=np.intp), np.zeros(0)
+    if not active[valid].any():
+        return empty
+
+    idx = np.nonzero(valid)[0]
+    lo = np.minimum(segs[idx,0],segs[idx,1]) - tol
+    hi = np.maximum(segs[idx,0],segs[idx,1]) + tol
+    cell = max(float(np.median(length[idx[active[idx]]])),100*tol)
+    pairs = _candidatePairs(lo,hi,cell,active[idx])
+    if len(pairs) == 0:
+        return empty
+    i = idx[pairs[:,0]]
+    j = idx[pairs[:,1]]
+
+    #crossings, and the ends of either segment on the other one [this also finds the overlaps of parallel segments]
+    s, t, dist, parallel = _nearest(p[i],d[i],p[j],d[j])
+    hits = [(i,s,(dist <= tol) & ~parallel),(j,t,(dist <= tol) & ~parallel)]
+    for k in (0,1):
+        for seg, other in [(i,j),(j,i)]:
+            u, dist = _project(p[seg],d[seg],p[other] + k*d[other])
+            hits.append((seg,u,dist <= tol))
+
+    lines = np.concatenate([seg[ok] for seg, u, ok in hits])
+    params = np.concatenate([u[ok] for seg, u, ok in hits])
+    inside = active[lines] & (params*length[lines] > tol) & ((1 - params)*length[lines] > tol)
+    lines = lines[inside]
+    params = params[inside]
+    order = np.lexsort((params,lines))
+    lines = lines[order]
+    params = params[order]
+    #points of a segment within tol of the previous one are one point
+    apart = np.ones(len(lines),dtype=bool)
+    apart[1:] = (lines[1:] != lines[:-1]) | ((params[1:] - params[:-1])*length[lines[1:]] > tol)
+    return lines[apart], params[apart]
+
+#A utility function that returns the edges of the 3dfaces of the model (4n,2,3)
+def areaEdges(model):
+    if model.nareas() == 0:
+        return np.zeros((0,2,3))
+    return model.areaxyz[:,[0,1,2,3,1,2,3,0],:].reshape(-1,2,3)
+
+#Find the points where lines meet other lines or the edges of 3dfaces [segmentIntersections]
+def frameIntersections(model,tol=JOINT_TOL):
+    segs = np.concatenate([model.framexyz.reshape(-1,2,3),areaEdges(model)])
+    return segmentIntersections(segs,np.arange(len(segs)) < model.nframes(),tol)
+
+#A utility function that returns the segments between 0, the points [sorted by segment then parameter] and 1 of n segments
+#Returns the segment of every part and the parameters of its bounds
+def segmentParts(n,segments,params):
+    segs = np.concatenate([np.arange(n),segments,np.arange(n)])
+    bounds = np.concatenate([np.zeros(n),params,np.ones(n)])
+    order = np.lexsort((bounds,segs))
+    segs = segs[order]
+    bounds = bounds[order]
+    same = segs[1:] == segs[:-1]
+    return segs[:-1][same], bounds[:-1][same], bounds[1:][same]
+
+#Split the lines of the model at their intersections [frameIntersections], in place
+#The segments of a split line are numbered after its handle ("handle:1", "handle:2", ...) so later imports find them again
+#Returns the number of split lines and of the segments that replaced them
+def splitFrames(model,tol=JOINT_TOL):
+    lines, params = frameIntersections(model,tol)
+    if len(lines) == 0:
+        return 0, 0
+    nfr = model.nframes()
+    nsplit = np.bincount(lines,minlength=nfr)
+    index, t0, t1 = segmentParts(nfr,lines,params)
+
+    xyz = model.framexyz
+    start = xyz[index,:3]
+    d = xyz[index,3:] - start
+    handles = model.framehandles
+    model.takeElements('frame',index,(t0,t1))
+    model.framexyz = np.concatenate([start + d*t0[:,None],start + d*t1[:,None]],axis=1)
+    piece = np.arange(len(index)) - np.searchsorted(index,index,'left') #index is sorted
+    model.framehandles = [handles[e] if nsplit[e] == 0 else '%s:%d' % (handles[e],k+1) for e, k in zip(index.tolist(),piece.tolist())]
+    nlines = int((nsplit > 0).sum())
+    return nlines, nlines + int(nsplit.sum())
@@ -0,0 +1,73 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The joints of the import model: vertices of lines and 3dfaces, and restrained points, merged within a tolerance
+2- The merge itself, a spatial hash (a grid of cells as large as the tolerance) that takes O(n)
+3- The distinct joints of the 3dfaces: a 3dface with a repeated corner is a triangle
+"""
+
+import numpy as np
+
+from model import NORESTRAINT
+
+JOINT_TOL = 0.001 #points closer than this are one joint [m]
+
+#The 27 cells around a cell, the cell itself first
+NEIGHBOURS = [(0,0,0)] + [(i,j,k) for i in (-1,0,1) for j in (-1,0,1) for k in (-1,0,1) if (i,j,k) != (0,0,0)]
+
+#Merge points that are within tol of each other, every joint keeps the coordinates of its first point [in sorted order]
+#Returns the joints' coordinates (m,3) and the joint of every point
+def mergePoints(xyz,tol=JOINT_TOL):
+    if len(xyz) == 0:
+        return np.zeros((0,3)), np.zeros(0,int)
+    uniq, inv = np.unique(xyz,axis=0,return_inverse=True) #exact duplicates are merged at once
+    inv = inv.ravel()
+    if tol <= 0:
+        return uniq, inv
+    cells = np.floor(uniq/tol).astype(np.int64).tolist()
+    pts = uniq.tolist()
+    tol2 = tol*tol
+    grid = {} #cell -> joints whose first point is in it
+    first = [] #the first point of every joint
+    joint = np.empty(len(pts),dtype=np.intp)
+    for k in range(0,len(pts)):
+        x, y, z = pts[k]
+        cx, cy, cz = cells[k]
+        found = -1
+        for dx, dy, dz in NEIGHBOURS:
+            for j in grid.get((cx+dx,cy+dy,cz+dz),()):
+                px, py, pz = pts[first[j]]
+                if (px-x)**2 + (py-y)**2 + (pz-z)**2 <= tol2:
+                    found = j
+                    break
+            if found != -1:
+                break
+        if found == -1:
+            found = len(first)
+            first.append(k)
+            grid.setdefault((cx,cy,cz),[]).append(found)
+        joint[k] = found
+    return uniq[first], joint[inv]
+
+#Get the joints of the model: frame ends, area vertices and restrained points merged within tol
+#Returns joints' coordinates (m,3), frames' joints (n,2), areas' joints (n,4), restrained points' indices and their joints
+def modelJoints(model,tol=JOINT_TOL):
+    restrained = np.nonzero(model.pointrestraint != NORESTRAINT)[0]
+    allxyz = np.concatenate([model.framexyz.reshape(-1,3),model.areaxyz.reshape(-1,3),model.pointxyz[restrained]])
+    if len(allxyz) == 0:
+        return np.zeros((0,3)), np.zeros((0,2),int), np.zeros((0,4),int), restrained, np.zeros(0,int)
+    xyz, inv = mergePoints(allxyz,tol)
+    nfr = 2*model.nframes()
+    nar = 4*model.nareas()
+    return xyz, inv[:nfr].reshape(-1,2), inv[nfr:nfr+nar].reshape(-1,4), restrained, inv[nfr+nar:]
+
+#Get the distinct joints of every 3dface in their order: AutoCAD draws a triangle as a 3dface whose last 2 corners are one
+#point, and merging the joints within a tolerance can make any 2 corners one joint
+#Returns the 3dfaces' joints (n,4) with the repeated corners moved last, and the number of distinct joints of every 3dface
+def faceJoints(arj):
+    arj = np.asarray(arj).reshape(-1,4)
+    repeated = np.zeros(arj.shape,dtype=bool)
+    for k in range(1,4):
+        repeated[:,k] = (arj[:,:k] == arj[:,k:k+1]).any(axis=1)
+    order = np.argsort(repeated,axis=1,kind='mergesort') #stable, the distinct corners keep their order
+    return arj[np.arange(len(arj))[:,None],order], 4 - repeated.sum(axis=1)
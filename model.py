@@ -0,0 +1,433 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The import model: the drawing's structural data held in NumPy arrays, between reading the drawing and writing to ETABS or SAP2000
+2- The builder that fills the import model once while the drawing is being read
+3- The merge of the import models of consecutive parts of a drawing [e.g. the shards of a .dxf file read in parallel]
+4- The walls drawn by their stiff lines [lines with a "WallProp"], kept until they're divided into panels [panelize.py]
+"""
+
+import array
+import numpy as np
+
+from xrecords import Label, FrameLoad, AreaLoad, WallMesh, BadXRecord, XDICT_KEYS
+
+#Types of areas
+NOTYPE = -1 #no section property assigned
+SLAB = 0
+WALL = 1
+
+#Types of restraints
+BADRESTRAINT = -1 #unknown restraint type
+NORESTRAINT = 0
+HINGED = 1
+FIXED = 2
+RESTRAINTS = {'Hinged':HINGED,'Fixed':FIXED}
+
+#The index of a missing reference (section, pier or spandrel label)
+NOREF = -1
+
+#The interned names: every name is stored once and is referenced by its integer index
+class StringTable(object):
+    def __init__(self,names=()):
+        self.names = []
+        self.index = {}
+        for name in names:
+            self.intern(name)
+
+    #Get the index of a name, adding it if it's new
+    def intern(self,name):
+        try:
+            return self.index[name]
+        except KeyError:
+            i = len(self.names)
+            self.names.append(name)
+            self.index[name] = i
+            return i
+
+    def get(self,name,default=NOREF):
+        return self.index.get(name,default)
+
+    def __getitem__(self,i):
+        return self.names[i]
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self,name):
+        return name in self.index
+
+#Columns of equal length, every column is a NumPy array [used for loads]
+class Columns(object):
+    def __init__(self,**cols):
+        self.names = sorted(cols)
+        for name in self.names:
+            setattr(self,name,cols[name])
+
+    def __len__(self):
+        if not self.names:
+            return 0
+        return len(getattr(self,self.names[0]))
+
+    #Get the rows of the given indices as new columns
+    def take(self,idx):
+        return Columns(**dict((name,getattr(self,name)[idx]) for name in self.names))
+
+    #Get, for every element, the range [start, end) of its rows [rows are sorted by "elem"]
+    def ranges(self,nelem):
+        elems = np.arange(nelem)
+        return np.searchsorted(self.elem,elems,'left'), np.searchsorted(self.elem,elems,'right')
+
+#The import model
+class ImportModel(object):
+    '''
+    Typical contents:-
+    definitions: {dictionary name: list of typed records} of "ConcMaterial", "LoadPatterns", "FrSecProp", ...
+    frames: framexyz (n,6) [start x,y,z, end x,y,z], framesec, framelayer, framehandles
+    areas: areaxyz (n,4,3), areasec, areatype [SLAB, WALL], arealayer, areapier, areaspand, areahandles
+    points: pointxyz (n,3), pointlayer, pointrestraint [NORESTRAINT, HINGED, FIXED], pointhandles
+    frameloads: elem, pattern, direction, start, end
+    arealoads: elem, pattern, direction, value
+    walls [stiff lines]: wallxyz (n,6) [the wall's top], wallsec, walllayer, wallpier, wallspand, wallmesh (n,2) [depth, panels'
+    size, NaN without a WallMesh], wallhandles
+    wallloads: elem, pattern, direction, start [at the wall's top], end [at its bottom]
+    stories [stories.assignStories]: levels, levelranges (k,2), framestory, areastory, pointstory
+    issues: (handle, layer, key, message) of the elements' records that can't be used [see validate.py]
+    '''
+    def __init__(self):
+        self.definitions = {}
+        self.levels = None #stories aren't found yet
+        self.layers = StringTable()
+        self.sections = StringTable()
+        self.patterns = StringTable()
+        self.labels = StringTable()
+        self.issues = []
+
+    def nframes(self):
+        return len(self.framesec)
+
+    def nareas(self):
+        return len(self.areasec)
+
+    def npoints(self):
+        return len(self.pointlayer)
+
+    def nwalls(self):
+        return len(self.wallsec)
+
+    #Take lines or 3dfaces [kind is 'frame' or 'area'] by their indices, with their loads and stories; an element can be taken
+    #more than once [e.g. the segments of a split line], spans (start, end) are the parts of the lines that are taken, at [0, 1]
+    #of their lengths, and their distributed loads are interpolated over them
+    def takeElements(self,kind,index,spans=None):
+        nelem = len(getattr(self,kind + 'sec'))
+        for name in ['xyz','sec','layer','type','pier','spand','mesh','story']:
+            arr = getattr(self,kind + name,None)
+            if arr is not None:
+                setattr(self,kind + name,arr[index])
+        handles = getattr(self,kind + 'handles')
+        setattr(self,kind + 'handles',[handles[e] for e in index])
+        loads = getattr(self,kind + 'loads')
+        lstart, lend = loads.ranges(nelem)
+        counts = lend[index] - lstart[index]
+        offsets = np.cumsum(counts) - counts
+        rows = np.arange(counts.sum()) - np.repeat(offsets - lstart[index],counts)
+        cols = loads.take(rows)
+        cols.elem = np.repeat(np.arange(len(index)),counts).astype(np.intc)
+        if spans is not None:
+            t0 = np.repeat(spans[0],counts)
+            t1 = np.repeat(spans[1],counts)
+            start, end = cols.start, cols.end
+            cols.start = start + (end - start)*t0
+            cols.end = start + (end - start)*t1
+        setattr(self,kind + 'loads',cols)
+
+    #Append 3dfaces to the model [e.g. the panels of walls], loads are the columns of their area loads by their own indices
+    def appendAreas(self,xyz,sec,types,layer,pier,spand,handles,loads):
+        n = self.nareas()
+        for name, arr in [('xyz',xyz),('sec',sec),('type',types),('layer',layer),('pier',pier),('spand',spand)]:
+            old = getattr(self,'area' + name)
+            setattr(self,'area' + name,np.concatenate([old,np.asarray(arr,dtype=old.dtype).reshape((-1,) + old.shape[1:])]))
+        self.areahandles = self.areahandles + list(handles)
+        al = self.arealoads
+        self.arealoads = Columns(elem=np.concatenate([al.elem,loads.elem + n]).astype(np.intc),
+                                 pattern=np.concatenate([al.pattern,loads.pattern]).astype(al.pattern.dtype),
+                                 direction=np.concatenate([al.direction,loads.direction]).astype(al.direction.dtype),
+                                 value=np.concatenate([al.value,loads.value]))
+
+    #Keep only some lines and 3dfaces [boolean arrays]
+    def keepElements(self,frames,areas):
+        self.takeElements('frame',np.nonzero(frames)[0])
+        self.takeElements('area',np.nonzero(areas)[0])
+
+    #Get the indices of the elements of every layer, in their original order [list indexed by layer index]
+    def byLayer(self,layerarr):
+        order = np.argsort(layerarr,kind='mergesort')
+        counts = np.bincount(layerarr,minlength=len(self.layers))
+        return np.split(order,np.cumsum(counts)[:-1])
+
+    #Get the names of frames, areas or points: layer + "_Fr "/"_Sh "/"_Po " + its order within its layer
+    def elementNames(self,kind):
+        layerarr, tag = {'frame':(self.framelayer,'_Fr '),'area':(self.arealayer,'_Sh '),'point':(self.pointlayer,'_Po ')}[kind]
+        names = [None]*len(layerarr)
+        for li, idx in enumerate(self.byLayer(layerarr)):
+            prefix = self.layers[li] + tag
+            for i, e in enumerate(idx):
+                names[e] = prefix + str(i)
+        return names
+
+#A utility function that converts a growable array.array to a NumPy array without copying
+def _toarray(buf,dtype,shape=None):
+    arr = np.frombuffer(buf,dtype=dtype)
+    if shape is not None:
+        arr = arr.reshape(shape)
+    return arr
+
+#A utility function that returns the label of a typed record, or None if it isn't a label
+def _label(rec):
+    if isinstance(rec,Label):
+        return rec.label
+    return None
+
+#The builder of the import model, elements are appended one by one then converted to arrays once
+class ModelBuilder(object):
+    def __init__(self):
+        self.model = ImportModel()
+        self.framexyz = array.array('d')
+        self.framesec = array.array('i')
+        self.framelayer = array.array('i')
+        self.framehandles = []
+        self.areaxyz = array.array('d')
+        self.areasec = array.array('i')
+        self.areatype = array.array('b')
+        self.arealayer = array.array('i')
+        self.areapier = array.array('i')
+        self.areaspand = array.array('i')
+        self.areahandles = []
+        self.pointxyz = array.array('d')
+        self.pointlayer = array.array('i')
+        self.pointrestraint = array.array('b')
+        self.pointhandles = []
+        self.wallxyz = array.array('d')
+        self.wallsec = array.array('i')
+        self.walllayer = array.array('i')
+        self.wallpier = array.array('i')
+        self.wallspand = array.array('i')
+        self.wallmesh = array.array('d')
+        self.wallhandles = []
+        self.wlloads = [array.array('i'),array.array('i'),array.array('b'),array.array('d'),array.array('d')]
+        self.frloads = [array.array('i'),array.array('i'),array.array('b'),array.array('d'),array.array('d')]
+        self.arloads = [array.array('i'),array.array('i'),array.array('b'),array.array('d')]
+
+    def setDefinitions(self,dicts):
+        self.model.definitions = dicts
+
+    def addLayer(self,name):
+        return self.model.layers.intern(name)
+
+    #The index of a pier or spandrel label, "None" means no label
+    def _label_remap(self,rec):
+        label = _label(rec)
+        if label is None or label == "None":
+            return NOREF
+        return self.model.labels.intern(label)
+
+    def _section_remap(self,rec):
+        label = _label(rec)
+        if label is None:
+            return NOREF
+        return self.model.sections.intern(label)
+
+    #Keep the records of an element that can't be used: malformed XRecords and loads of another type of element
+    def _checkRecords(self,handle,layer,enttype,xdata):
+        loadtype = FrameLoad if enttype == 'LINE' else AreaLoad
+        for key in XDICT_KEYS:
+            recs = xdata.get(key)
+            if recs is None:
+                continue
+            for rec in recs if isinstance(recs,list) else [recs]:
+                if isinstance(rec,BadXRecord):
+                    self.model.issues.append((handle,layer,key,"malformed XRecord: %s" % rec.error))
+                elif isinstance(recs,list) and not isinstance(rec,loadtype):
+                    self.model.issues.append((handle,layer,key,"%s record isn't a load of a %s" % (type(rec).__name__,enttype)))
+
+    #Add a drawing element: "LINE", "3DFACE" or "POINT", with its extension dictionary's typed records
+    def addEntity(self,handle,enttype,layer,coords,xdata):
+        model = self.model
+        li = model.layers.intern(layer)
+        if xdata:
+            self._checkRecords(handle,layer,enttype,xdata)
+        if enttype == 'LINE' and 'WallProp' in xdata:
+            self._addWall(handle,li,coords,xdata)
+        elif enttype == 'LINE':
+            e = len(self.framesec)
+            self.framexyz.extend(coords[:6])
+            self.framesec.append(self._section_remap(xdata.get('SecProp')))
+            self.framelayer.append(li)
+            self.framehandles.append(handle)
+            for load in xdata.get('DistLoads',()):
+                if isinstance(load,FrameLoad):
+                    self.frloads[0].append(e)
+                    self.frloads[1].append(model.patterns.intern(load.pattern))
+                    self.frloads[2].append(load.direction)
+                    self.frloads[3].append(load.start)
+                    self.frloads[4].append(load.end)
+        elif enttype == '3DFACE':
+            e = len(self.areasec)
+            self.areaxyz.extend(coords[:12])
+            if 'SecProp' in xdata:
+                self.areasec.append(self._section_remap(xdata['SecProp']))
+                self.areatype.append(SLAB)
+            elif 'WallProp' in xdata:
+                self.areasec.append(self._section_remap(xdata['WallProp']))
+                self.areatype.append(WALL)
+            else:
+                self.areasec.append(NOREF)
+                self.areatype.append(NOTYPE)
+            self.arealayer.append(li)
+            self.areapier.append(self._label_remap(xdata.get('PierID')))
+            self.areaspand.append(self._label_remap(xdata.get('SpandralID')))
+            self.areahandles.append(handle)
+            loads = xdata.get('DistLoads')
+            if loads is None:
+                loads = xdata.get('WallDistLoads',())
+            for load in loads:
+                if isinstance(load,AreaLoad):
+                    self.arloads[0].append(e)
+                    self.arloads[1].append(model.patterns.intern(load.pattern))
+                    self.arloads[2].append(load.direction)
+                    self.arloads[3].append(load.value)
+        elif enttype == 'POINT':
+            self.pointxyz.extend(coords[:3])
+            self.pointlayer.append(li)
+            label = _label(xdata.get('Restrain'))
+            if label is None:
+                self.pointrestraint.append(NORESTRAINT)
+            else:
+                self.pointrestraint.append(RESTRAINTS.get(label,BADRESTRAINT))
+            self.pointhandles.append(handle)
+
+    #A wall's stiff line, its distributed loads are the loads at the wall's top [start] and bottom [end]
+    def _addWall(self,handle,li,coords,xdata):
+        model = self.model
+        e = len(self.wallsec)
+        self.wallxyz.extend(coords[:6])
+        self.wallsec.append(self._section_remap(xdata['WallProp']))
+        self.walllayer.append(li)
+        self.wallpier.append(self._label_remap(xdata.get('PierID')))
+        self.wallspand.append(self._label_remap(xdata.get('SpandralID')))
+        mesh = xdata.get('WallMesh')
+        if isinstance(mesh,WallMesh):
+            self.wallmesh.extend([mesh.depth,mesh.size])
+        else:
+            self.wallmesh.extend([np.nan,np.nan])
+        self.wallhandles.append(handle)
+        for load in xdata.get('DistLoads',()):
+            if isinstance(load,FrameLoad):
+                self.wlloads[0].append(e)
+                self.wlloads[1].append(model.patterns.intern(load.pattern))
+                self.wlloads[2].append(load.direction)
+                self.wlloads[3].append(load.start)
+                self.wlloads[4].append(load.end)
+
+    #Convert everything to arrays, and return the import model
+    def finish(self):
+        model = self.model
+        model.framexyz = _toarray(self.framexyz,np.float64,(-1,6))
+        model.framesec = _toarray(self.framesec,np.intc)
+        model.framelayer = _toarray(self.framelayer,np.intc)
+        model.framehandles = self.framehandles
+        model.areaxyz = _toarray(self.areaxyz,np.float64,(-1,4,3))
+        model.areasec = _toarray(self.areasec,np.intc)
+        model.areatype = _toarray(self.areatype,np.int8)
+        model.arealayer = _toarray(self.arealayer,np.intc)
+        model.areapier = _toarray(self.areapier,np.intc)
+        model.areaspand = _toarray(self.areaspand,np.intc)
+        model.areahandles = self.areahandles
+        model.pointxyz = _toarray(self.pointxyz,np.float64,(-1,3))
+        model.pointlayer = _toarray(self.pointlayer,np.intc)
+        model.pointrestraint = _toarray(self.pointrestraint,np.int8)
+        model.pointhandles = self.pointhandles
+        model.wallxyz = _toarray(self.wallxyz,np.float64,(-1,6))
+        model.wallsec = _toarray(self.wallsec,np.intc)
+        model.walllayer = _toarray(self.walllayer,np.intc)
+        model.wallpier = _toarray(self.wallpier,np.intc)
+        model.wallspand = _toarray(self.wallspand,np.intc)
+        model.wallmesh = _toarray(self.wallmesh,np.float64,(-1,2))
+        model.wallhandles = self.wallhandles
+        elem, pattern, direction, start, end = self.wlloads
+        model.wallloads = Columns(elem=_toarray(elem,np.intc),pattern=_toarray(pattern,np.intc),direction=_toarray(direction,np.int8),
+                                  start=_toarray(start,np.float64),end=_toarray(end,np.float64))
+        elem, pattern, direction, start, end = self.frloads
+        model.frameloads = Columns(elem=_toarray(elem,np.intc),pattern=_toarray(pattern,np.intc),direction=_toarray(direction,np.int8),
+                                   start=_toarray(start,np.float64),end=_toarray(end,np.float64))
+        elem, pattern, direction, value = self.arloads
+        model.arealoads = Columns(elem=_toarray(elem,np.intc),pattern=_toarray(pattern,np.intc),direction=_toarray(direction,np.int8),
+                                  value=_toarray(value,np.float64))
+        return model
+
+#A utility function that interns all names of a table at the merged table, returns the new index of every old one
+def _mapping(table,merged):
+    return np.array([merged.intern(name) for name in table],dtype=np.intc)
+
+#A utility function that replaces the indices of an array by their new ones, NOREF stays as it is
+def _remap(arr,mapping):
+    if len(mapping) == 0:
+        return arr.copy()
+    return np.where(arr == NOREF,NOREF,mapping[arr]).astype(arr.dtype)
+
+#Merge the import models of consecutive parts of a drawing, in their order, into the model of the drawing read at once
+#The names are interned in the order they're met, so the merged tables are the same as those of one pass
+def mergeModels(models,definitions=None):
+    merged = ImportModel()
+    merged.definitions = definitions if definitions is not None else models[0].definitions
+    frames = []
+    areas = []
+    points = []
+    walls = []
+    frloads = []
+    arloads = []
+    wlloads = []
+    nfr = nar = nwl = 0
+    for m in models:
+        #every table is interned as a whole, in its own order
+        layers = _mapping(m.layers,merged.layers)
+        sections = _mapping(m.sections,merged.sections)
+        patterns = _mapping(m.patterns,merged.patterns)
+        labels = _mapping(m.labels,merged.labels)
+        frames.append((m.framexyz,_remap(m.framesec,sections),_remap(m.framelayer,layers)))
+        areas.append((m.areaxyz,_remap(m.areasec,sections),m.areatype,_remap(m.arealayer,layers),_remap(m.areapier,labels),_remap(m.areaspand,labels)))
+        points.append((m.pointxyz,_remap(m.pointlayer,layers),m.pointrestraint))
+        walls.append((m.wallxyz,_remap(m.wallsec,sections),_remap(m.walllayer,layers),_remap(m.wallpier,labels),
+                      _remap(m.wallspand,labels),m.wallmesh))
+        fl = m.frameloads
+        frloads.append((fl.elem + nfr,_remap(fl.pattern,patterns),fl.direction,fl.start,fl.end))
+        al = m.arealoads
+        arloads.append((al.elem + nar,_remap(al.pattern,patterns),al.direction,al.value))
+        wl = m.wallloads
+        wlloads.append((wl.elem + nwl,_remap(wl.pattern,patterns),wl.direction,wl.start,wl.end))
+        nfr += m.nframes()
+        nar += m.nareas()
+        nwl += m.nwalls()
+    cols = [np.concatenate(col) for col in zip(*frames)]
+    merged.framexyz, merged.framesec, merged.framelayer = cols
+    cols = [np.concatenate(col) for col in zip(*areas)]
+    merged.areaxyz, merged.areasec, merged.areatype, merged.arealayer, merged.areapier, merged.areaspand = cols
+    cols = [np.concatenate(col) for col in zip(*points)]
+    merged.pointxyz, merged.pointlayer, merged.pointrestraint = cols
+    cols = [np.concatenate(col) for col in zip(*walls)]
+    merged.wallxyz, merged.wallsec, merged.walllayer, merged.wallpier, merged.wallspand, merged.wallmesh = cols
+    merged.framehandles = [h for m in models for h in m.framehandles]
+    merged.areahandles = [h for m in models for h in m.areahandles]
+    merged.pointhandles = [h for m in models for h in m.pointhandles]
+    merged.wallhandles = [h for m in models for h in m.wallhandles]
+    merged.issues = [issue for m in models for issue in m.issues]
+    elem, pattern, direction, start, end = [np.concatenate(col) for col in zip(*frloads)]
+    merged.frameloads = Columns(elem=elem.astype(np.intc),pattern=pattern,direction=direction,start=start,end=end)
+    elem, pattern, direction, value = [np.concatenate(col) for col in zip(*arloads)]
+    merged.arealoads = Columns(elem=elem.astype(np.intc),pattern=pattern,direction=direction,value=value)
+    elem, pattern, direction, start, end = [np.concatenate(col) for col in zip(*wlloads)]
+    merged.wallloads = Columns(elem=elem.astype(np.intc),pattern=pattern,direction=direction,start=start,end=end)
+    return merged
@@ -0,0 +1,86 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The panels of the walls drawn by their stiff lines [lines with a "WallProp", at the walls' tops]: every stiff line is
+divided where other elements meet it [beams, slabs' edges, columns and other walls], then every span into panels of about
+the wall's best size, and the wall's depth into rows of panels, like draw-shw [insert_struct_prop.lsp]
+2- The panels are written to the import model as wall 3dfaces with the wall's section, pier and spandrel labels, and the
+loads of every row are the wall's loads at the row's middle [they change linearly from the wall's top to its bottom]
+3- All walls are divided at once with NumPy: the intersections are found in one pass [intersect.py], then sorted along the
+stiff lines without repetitions, instead of vla-intersectwith per beam, csortpts and rem-dup
+"""
+
+import numpy as np
+
+from model import Columns, WALL
+from joints import JOINT_TOL
+from intersect import segmentIntersections, segmentParts, areaEdges
+
+#A utility function that returns the number of panels of lengths by the best size, at least 1 [rounded as draw-shw does]
+def _divisions(lengths,size):
+    return np.maximum(np.floor(lengths/size + 0.5),1).astype(np.intp)
+
+#Find the points of the stiff lines where lines, edges of 3dfaces and other stiff lines meet them
+#Returns the walls and the parameters [0, 1] of their points along their stiff lines, sorted without repetitions
+def wallPoints(model,tol=JOINT_TOL):
+    segs = np.concatenate([model.wallxyz.reshape(-1,2,3),model.framexyz.reshape(-1,2,3),areaEdges(model)])
+    return segmentIntersections(segs,np.arange(len(segs)) < model.nwalls(),tol)
+
+#Divide the stiff lines: at their points, then every span into panels of about the wall's size
+#Returns the wall of every column of panels, and the parameters of its bounds along the stiff line
+def wallColumns(model,walls,params):
+    wall, t0, t1 = segmentParts(model.nwalls(),walls,params)
+    d = model.wallxyz[:,3:] - model.wallxyz[:,:3]
+    length = np.sqrt((d*d).sum(axis=1))
+    n = _divisions((t1 - t0)*length[wall],model.wallmesh[wall,1])
+    k = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n,n)
+    start = np.repeat(t0,n)
+    span = np.repeat((t1 - t0)/n,n)
+    return np.repeat(wall,n), start + span*k, start + span*(k + 1)
+
+#Divide the walls of the model into panels, in place: the panels are appended to its 3dfaces and the walls are removed
+#The panels of a wall are numbered after its stiff line's handle ("handle:1", "handle:2", ...) so later imports find them again
+#Returns the number of walls and of their panels
+def panelizeWalls(model,tol=JOINT_TOL):
+    nwalls = model.nwalls()
+    if nwalls == 0:
+        return 0, 0
+    walls, params = wallPoints(model,tol)
+    wall, t0, t1 = wallColumns(model,walls,params)
+
+    #every column by the rows of its wall, top to bottom [the columns of every wall are together, along its stiff line]
+    depth = model.wallmesh[:,0]
+    nrows = _divisions(depth,model.wallmesh[:,1])
+    rows = nrows[wall]
+    row = np.arange(rows.sum()) - np.repeat(np.cumsum(rows) - rows,rows)
+    col = np.repeat(np.arange(len(wall)),rows)
+    w = wall[col]
+    step = depth[w]/nrows[w]
+
+    top = model.wallxyz[:,:3]
+    d = model.wallxyz[:,3:] - top
+    left = top[w] + d[w]*t0[col][:,None]
+    right = top[w] + d[w]*t1[col][:,None]
+    up = np.zeros((len(w),3))
+    up[:,2] = -row*step
+    down = np.zeros((len(w),3))
+    down[:,2] = -(row + 1)*step
+    xyz = np.stack([left + up,left + down,right + down,right + up],axis=1)
+
+    #the loads of every panel: the wall's loads at the middle of its row
+    loads = model.wallloads
+    lstart, lend = loads.ranges(nwalls)
+    counts = lend[w] - lstart[w]
+    offsets = np.cumsum(counts) - counts
+    lrows = np.arange(counts.sum()) - np.repeat(offsets - lstart[w],counts)
+    at = np.repeat((row + 0.5)/nrows[w],counts)
+    values = loads.start[lrows] + (loads.end[lrows] - loads.start[lrows])*at
+    panelloads = Columns(elem=np.repeat(np.arange(len(w)),counts).astype(np.intc),pattern=loads.pattern[lrows],
+                         direction=loads.direction[lrows],value=values)
+
+    piece = np.arange(len(w)) - np.searchsorted(w,w,'left') #w is sorted
+    handles = ['%s:%d' % (model.wallhandles[e],k+1) for e, k in zip(w.tolist(),piece.tolist())]
+    model.appendAreas(xyz,model.wallsec[w],np.full(len(w),WALL),model.walllayer[w],model.wallpier[w],model.wallspand[w],
+                      handles,panelloads)
+    model.takeElements('wall',np.zeros(0,dtype=np.intp))
+    return nwalls, len(w)
@@ -0,0 +1,305 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- A pipeline of 2 workers with a bounded queue between them, each in its own thread and its own COM apartment: the producer
+waits when the queue is full (backpressure), and an error of either worker stops both of them cleanly
+2- The pipelined import of an AutoCAD document: the geometry is dumped at once [geomdump.lsp] so the joints and stories are
+known first, then one worker reads the extension dictionaries of the elements through AutoCAD while the other draws the
+joints at ETABS/SAP2000, so both applications work at the same time; the whole model is validated [validate.py] before
+its first element is drawn, then the elements are drawn in batches
+3- Walls drawn by their stiff lines are divided into panels with the whole model [panelize.py], a document that has them is
+imported in another way; they're found by the dump's data of the elements' extension dictionaries
+4- Unlike the other ways of writing the model, the lines aren't split where they meet [intersect.py] and defects of the
+geometry aren't fixed [geomqa.py], the elements are drawn as the dump has them
+"""
+
+import sys
+import threading
+import time
+import traceback
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue #Python 2
+
+import numpy as np
+
+from backends import Backend, ACAD_PROGID, CSI_PROGIDS
+from extract import documentDictionaries, fetchGeometry, entityXData, GEOM_TYPES
+from cache import contentHash
+from model import ModelBuilder
+from validate import validateModel, formatIssues
+from joints import mergePoints, JOINT_TOL
+from emit import drawlines, drawFaces, drawPoints, apiName
+
+QUEUE_SIZE = 32 #batches waiting between the workers
+BATCH_SIZE = 64 #elements of a batch
+POLL = 0.1 #seconds between the checks of a waiting worker for a stop
+
+KIND_ORDER = {'LINE':0,'3DFACE':1,'POINT':2} #of every layer, as emitObjects draws them
+WALL_SIGNATURE = ';WallProp(' #the "WallProp" XRecord in the dump's data of an extension dictionary [obj-sig of geomdump.lsp]
+
+_DONE = object() #the end of the items
+
+#Raised at a worker when the other one has failed
+class PipelineStopped(Exception):
+    pass
+
+#A problem that stops the pipeline: elements that can't be drawn [the issues of validate.py], or a document that isn't open
+class PipelineError(Exception):
+    def __init__(self,message,issues=()):
+        Exception.__init__(self,message)
+        self.issues = list(issues)
+
+#A utility function that enters a single-threaded COM apartment at the current thread, if comtypes exists
+def _enterApartment():
+    try:
+        import comtypes
+    except ImportError:
+        return False
+    comtypes.CoInitializeEx(comtypes.COINIT_APARTMENTTHREADED)
+    return True
+
+def _leaveApartment(entered):
+    if entered:
+        import comtypes
+        comtypes.CoUninitialize()
+
+#The pipeline: produce(put) calls put for every item, consume(items) iterates over them
+class Pipeline(object):
+    def __init__(self,maxsize=QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize)
+        self.stopped = threading.Event()
+        self.errors = [] #(worker, exception, formatted traceback)
+        self.produced = 0
+        self.consumed = 0
+        self.blocked = 0.0 #seconds the producer waited for room in the queue
+        self.starved = 0.0 #seconds the consumer waited for items
+        self.elapsed = 0.0
+
+    def put(self,item):
+        start = time.time()
+        while True:
+            if self.stopped.is_set():
+                raise PipelineStopped()
+            try:
+                self.queue.put(item,True,POLL)
+                break
+            except queue.Full:
+                continue
+        self.blocked += time.time() - start
+        if item is not _DONE:
+            self.produced += 1
+
+    def items(self):
+        while True:
+            start = time.time()
+            while True:
+                if self.stopped.is_set():
+                    raise PipelineStopped()
+                try:
+                    item = self.queue.get(True,POLL)
+                    break
+                except queue.Empty:
+                    continue
+            self.starved += time.time() - start
+            if item is _DONE:
+                return
+            self.consumed += 1
+            yield item
+
+    def _work(self,worker,fn,arg):
+        entered = _enterApartment()
+        try:
+            fn(arg)
+            if worker == 'producer':
+                self.put(_DONE)
+        except PipelineStopped:
+            pass
+        except Exception:
+            err = sys.exc_info()[1]
+            self.errors.append((worker,err,traceback.format_exc()))
+            self.stopped.set()
+        finally:
+            if worker == 'consumer':
+                self.stopped.set() #the producer mustn't wait for a consumer that has returned
+            _leaveApartment(entered)
+
+    #Run both workers until they finish, the first error of either is raised again here
+    def run(self,produce,consume):
+        start = time.time()
+        workers = [threading.Thread(target=self._work,args=('producer',produce,self.put)),
+                   threading.Thread(target=self._work,args=('consumer',consume,self.items()))]
+        for w in workers:
+            w.daemon = True
+            w.start()
+        for w in workers:
+            w.join()
+        self.elapsed = time.time() - start
+        if self.errors:
+            worker, err, tb = self.errors[0]
+            if not isinstance(err,PipelineError):
+                sys.stderr.write("The %s of the pipeline failed:\n%s" % (worker,tb))
+            raise err
+        return self
+
+    def report(self):
+        return "Pipeline: %d batches in %.3f s, the producer waited %.3f s for room, the consumer waited %.3f s for batches" % (
+            self.consumed,self.elapsed,self.blocked,self.starved)
+
+#Connect to the document of AutoCAD at the current thread [COM objects can't be used by another apartment]
+def connectDocument(fullname):
+    acad = Backend("AutoCAD",ACAD_PROGID,dynamic=True,create=False).get()
+    for i in range(0,acad.Documents.Count):
+        doc = acad.Documents.Item(i)
+        if doc.FullName == fullname:
+            return doc
+    raise PipelineError("%s isn't open at AutoCAD" % fullname)
+
+#Connect to the SapModel of ETABS or SAP2000 at the current thread
+def connectSapModel(program):
+    return Backend(program,CSI_PROGIDS[program],create=False,probe='SapModel').get().SapModel
+
+#Read the definitions, layers and geometry of a document without the extension dictionaries of its elements
+#Returns the geometry's model [elements without sections, loads or restraints] and the dump, or None if the dump failed
+def geometryModel(doc,xrecs,lisppath):
+    dump = fetchGeometry(doc,lisppath)
+    if dump is None:
+        return None
+    builder = ModelBuilder()
+    builder.setDefinitions(documentDictionaries(doc,xrecs))
+    for i in range(0,doc.Layers.Count):
+        builder.addLayer(doc.Layers.Item(i).Name)
+    handles, hasxdict, layers, signatures, geo = dump
+    coords = geo[:,1:].tolist()
+    for k in range(0,len(handles)):
+        builder.addEntity(handles[k],GEOM_TYPES[int(geo[k,0])],layers[k],coords[k],{})
+    return builder.finish(), dump
+
+#A utility function that tells if the dumped geometry has walls' stiff lines [lines with a "WallProp" XRecord]
+def hasStiffLines(dump):
+    handles, hasxdict, layers, signatures, geo = dump
+    return any(WALL_SIGNATURE in signatures[k] for k in np.nonzero(geo[:,0] == 1)[0].tolist())
+
+#The pipelined import of a document: its geometry's model [geometryModel] is already read, and its definitions and stories
+#are already at ETABS/SAP2000; connectDoc and connectSap connect to AutoCAD's document and SapModel at the workers' threads
+#The producer reads every element's extension dictionary while the consumer draws the joints, then the whole model is
+#validated before the first batch is queued, so a drawing with problems leaves no elements drawn
+#Returns the whole import model and the pipeline
+def streamImport(geom,dump,xrecs,program,swm,connectDoc,connectSap,colyr='None',cache=None,tol=JOINT_TOL,
+                 maxsize=QUEUE_SIZE,batchsize=BATCH_SIZE):
+    if hasStiffLines(dump):
+        raise PipelineError("Walls' stiff lines are divided into panels before the import, import them in another way")
+    handles, hasxdict, layers, signatures, geo = dump
+    types = [GEOM_TYPES[int(code)] for code in geo[:,0]]
+    coords = geo[:,1:].tolist()
+    nelem = len(handles)
+
+    #the index of every element among the elements of its type, the names and joints come from the geometry's model
+    kindindex = np.zeros(nelem,dtype=np.intp)
+    for code in GEOM_TYPES:
+        rows = np.nonzero(geo[:,0] == code)[0]
+        kindindex[rows] = np.arange(len(rows))
+    names = {'LINE':geom.elementNames('frame'),'3DFACE':geom.elementNames('area')}
+    xyz, inv = mergePoints(np.concatenate([geom.framexyz.reshape(-1,3),geom.areaxyz.reshape(-1,3),geom.pointxyz]),tol)
+    nfr = 2*geom.nframes()
+    nar = 4*geom.nareas()
+    frj = inv[:nfr].reshape(-1,2)
+    arj = inv[nfr:nfr+nar].reshape(-1,4)
+    poj = inv[nfr+nar:]
+
+    #the columns' layer first, then every layer's lines, 3dfaces and points
+    rank = dict((name,i) for i, name in enumerate(geom.layers))
+    if colyr in rank:
+        rank[colyr] = -1
+    order = sorted(range(0,nelem),key=lambda k: (rank[layers[k]],KIND_ORDER[types[k]],k))
+    xdatas = [None]*nelem
+    whole = [] #the import model, built by the producer
+
+    def produce(put):
+        doc = connectDoc()
+        for k in order:
+            xdata = None
+            if cache is not None:
+                chash = contentHash(handles[k],types[k],layers[k],geo[k],signatures[k])
+                entry = cache.get(handles[k],chash)
+                if entry is not None:
+                    xdata = entry[4]
+            if xdata is None:
+                xdata = {}
+                if hasxdict[k]:
+                    xdata = entityXData(doc.HandleToObject(handles[k]),xrecs)
+                if cache is not None:
+                    cache.put(handles[k],chash,types[k],layers[k],coords[k],xdata)
+            xdatas[k] = xdata
+        model = elementsModel(geom,handles,types,layers,coords,xdatas)
+        issues = validateModel(model,colyr)
+        if issues:
+            raise PipelineError(formatIssues(issues),issues)
+        if model.nwalls():
+            raise PipelineError("Walls' stiff lines are divided into panels before the import, import them in another way")
+        whole.append(model)
+        for start in range(0,nelem,batchsize):
+            put(order[start:start+batchsize])
+
+    def consume(batches):
+        sapmodel = connectSap()
+        jnames = [None]*len(xyz)
+        for j in np.unique(np.concatenate([frj.ravel(),arj.ravel()])).tolist():
+            x, y, z = xyz[j].tolist()
+            name = str(j+1)
+            jnames[j] = apiName(sapmodel.PointObj.AddCartesian(x,y,z,name,name,"Global",True,0),name)
+        for batch in batches:
+            drawBatch(geom,batch,handles,types,layers,coords,xdatas,kindindex,names,frj,arj,poj,xyz,jnames,sapmodel,program,swm)
+
+    pipeline = Pipeline(maxsize)
+    pipeline.run(produce,consume)
+    return whole[0], pipeline
+
+#A utility function that reads elements [indices of the dump, all of them by default] with their extension dictionaries
+#into an import model, with the same layers' indices as the geometry's model
+def elementsModel(geom,handles,types,layers,coords,xdatas,elements=None):
+    builder = ModelBuilder()
+    builder.setDefinitions(geom.definitions)
+    for name in geom.layers:
+        builder.addLayer(name)
+    for k in (range(0,len(handles)) if elements is None else elements):
+        builder.addEntity(handles[k],types[k],layers[k],coords[k],xdatas[k])
+    return builder.finish()
+
+#Draw a batch of elements [indices of the dump], they're read into a model of their own, then drawn layer by layer
+#The whole model was validated before the first batch
+def drawBatch(geom,batch,handles,types,layers,coords,xdatas,kindindex,names,frj,arj,poj,xyz,jnames,sapmodel,program,swm):
+    kinds = {'LINE':[],'3DFACE':[],'POINT':[]} #the index of every element of the batch at the geometry's model
+    for k in batch:
+        kinds[types[k]].append(kindindex[k])
+    bm = elementsModel(geom,handles,types,layers,coords,xdatas,batch)
+
+    fr = kinds['LINE']
+    ar = kinds['3DFACE']
+    po = kinds['POINT']
+    frnames = [names['LINE'][g] for g in fr]
+    arnames = [names['3DFACE'][g] for g in ar]
+    pointjoint = {}
+    for e, g in enumerate(po):
+        j = poj[g]
+        if bm.pointrestraint[e] != 0 and jnames[j] is None:
+            x, y, z = xyz[j].tolist()
+            jnames[j] = apiName(sapmodel.PointObj.AddCartesian(x,y,z,str(j+1),str(j+1),"Global",True,0),str(j+1))
+        pointjoint[e] = j
+    frbylayer = bm.byLayer(bm.framelayer)
+    arbylayer = bm.byLayer(bm.arealayer)
+    pobylayer = bm.byLayer(bm.pointlayer)
+    seen = []
+    for k in batch:
+        li = bm.layers.get(layers[k])
+        if li in seen:
+            continue
+        seen.append(li)
+        if len(frbylayer[li]):
+            drawlines(bm,frnames,frbylayer[li],bm.layers[li],sapmodel,program,swm,frj[fr],jnames)
+        if len(arbylayer[li]):
+            drawFaces(bm,arnames,arbylayer[li],bm.layers[li],sapmodel,program,swm,arj[ar],jnames)
+        if len(pobylayer[li]):
+            drawPoints(bm,pobylayer[li],bm.layers[li],sapmodel,pointjoint,jnames)
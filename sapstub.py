@@ -0,0 +1,416 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- A local stand-in of ETABS/SAP2000's SapModel, to try the import without CSI software
+2- Its database tables: they keep the edited tables, and check the references between them when they are applied
+3- A recording stand-in: every call is recorded with its arguments and return, the model it builds can be dumped
+4- Latency models that add the cost of a COM round trip to every call, to measure the emission's throughput offline
+"""
+
+import json
+import time
+
+#The references checked when tables are applied: (table, field) -> (referenced table, its key field)
+REFERENCES = {('Connectivity - Frame','JointI'):('Joint Coordinates','Joint'),
+              ('Connectivity - Frame','JointJ'):('Joint Coordinates','Joint'),
+              ('Connectivity - Area','Joint1'):('Joint Coordinates','Joint'),
+              ('Connectivity - Area','Joint2'):('Joint Coordinates','Joint'),
+              ('Connectivity - Area','Joint3'):('Joint Coordinates','Joint'),
+              ('Connectivity - Area','Joint4'):('Joint Coordinates','Joint'),
+              ('Joint Restraint Assignments','Joint'):('Joint Coordinates','Joint'),
+              ('Frame Section Assignments','Frame'):('Connectivity - Frame','Frame'),
+              ('Area Section Assignments','Area'):('Connectivity - Area','Area'),
+              ('Groups 2 - Assignments','GroupName'):('Groups 1 - Definitions','GroupName'),
+              ('Frame Loads - Distributed','Frame'):('Connectivity - Frame','Frame'),
+              ('Area Loads - Uniform','Area'):('Connectivity - Area','Area')}
+OPTIONAL_FIELDS = [('Connectivity - Area','Joint4')] #empty for triangles
+
+#Any other part of the API: every call is accepted and returns 0
+class AnySurface(object):
+    def __getattr__(self,name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self
+
+    def __call__(self,*args):
+        return 0
+
+#The database tables of the stand-in, calls return like comtypes does: the ByRef arguments then the return code
+class LocalDatabaseTables(object):
+    def __init__(self):
+        self.tables = {} #table key -> (fields, rows) of the applied tables
+        self.pending = {} #table key -> (fields, rows) set for editing, not yet applied
+        self.transfers = 0 #number of Get/SetTableForEditingArray calls
+        self.cells = 0 #number of values sent or received
+
+    def GetTableForEditingArray(self,TableKey,GroupName,TableVersion,FieldsKeysIncluded,NumberRecords,TableData):
+        self.transfers += 1
+        if TableKey not in self.tables:
+            return [0,[],0,[],1]
+        fields, rows = self.tables[TableKey]
+        data = []
+        for row in rows:
+            data.extend(row)
+        self.cells += len(data)
+        return [1,list(fields),len(rows),data,0]
+
+    def SetTableForEditingArray(self,TableKey,TableVersion,FieldsKeysIncluded,NumberRecords,TableData):
+        self.transfers += 1
+        fields = list(FieldsKeysIncluded)
+        n = len(fields)
+        if n == 0 or len(TableData) != n*NumberRecords:
+            return [TableVersion,FieldsKeysIncluded,TableData,1]
+        self.cells += len(TableData)
+        self.pending[TableKey] = (fields,[list(TableData[k*n:(k+1)*n]) for k in range(0,NumberRecords)])
+        return [TableVersion,FieldsKeysIncluded,TableData,0]
+
+    def CancelTableEditing(self):
+        self.pending = {}
+        return 0
+
+    def ApplyEditedTables(self,FillImportLog,NumFatalErrors=0,NumErrorMsgs=0,NumWarnMsgs=0,NumInfoMsgs=0,ImportLog=""):
+        self.tables.update(self.pending)
+        self.pending = {}
+        errors = self.check()
+        log = '\n'.join(errors) if FillImportLog else ""
+        return [0,len(errors),0,len(self.tables),log,0]
+
+    #Get the rows of an applied table as dictionaries of field: value
+    def table(self,key):
+        if key not in self.tables:
+            return []
+        fields, rows = self.tables[key]
+        return [dict(zip(fields,row)) for row in rows]
+
+    #Get the error messages of the references that don't exist
+    def check(self):
+        errors = []
+        for (key, field), (refkey, reffield) in sorted(REFERENCES.items()):
+            rows = self.table(key)
+            if not rows:
+                continue
+            names = set(row.get(reffield) for row in self.table(refkey))
+            for row in rows:
+                if (key,field) in OPTIONAL_FIELDS and row.get(field,'') == '':
+                    continue
+                if row.get(field,'') not in names:
+                    errors.append('%s: %s "%s" is not in %s' % (key,field,row.get(field,''),refkey))
+        return errors
+
+#The stand-in of SapModel, it has database tables and accepts every other call
+class LocalSapModel(AnySurface):
+    def __init__(self,program="SAP2000"):
+        self.program = program
+        self.DatabaseTables = LocalDatabaseTables()
+
+MERGE_TOL = 0.001 #points added by coordinates within this are merged, like the default merge tolerance [m]
+
+#The cost of every call: a fixed cost, plus a cost for every value of the array arguments
+#overrides gives the fixed cost of some calls, by their path (e.g. "PointObj.AddCartesian") or their method's name
+class LatencyModel(object):
+    def __init__(self,percall=0.0,pervalue=0.0,overrides=None):
+        self.percall = percall
+        self.pervalue = pervalue
+        self.overrides = overrides or {}
+
+    def cost(self,path,args):
+        base = self.overrides.get(path)
+        if base is None:
+            base = self.overrides.get(path.split('.')[-1],self.percall)
+        if self.pervalue:
+            base += self.pervalue*sum(len(arg) for arg in args if isinstance(arg,(list,tuple)))
+        return base
+
+#Latency presets [seconds]: no cost, an in-process call, an out-of-process COM call to ETABS/SAP2000, and a loaded machine
+LATENCIES = {'none': LatencyModel(),
+             'inproc': LatencyModel(5e-6,1e-8),
+             'com': LatencyModel(3e-4,2e-7,{'ApplyEditedTables':0.5,'SetStories':0.01,'RefreshView':0.2}),
+             'slow': LatencyModel(2e-3,1e-6,{'ApplyEditedTables':2.0,'SetStories':0.05,'RefreshView':1.0})}
+
+#A part of the recording stand-in's API, its attributes are parts too, and calling it records the call
+class RecordingSurface(object):
+    def __init__(self,model,path):
+        self._model = model
+        self._path = path
+
+    def __getattr__(self,name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        surface = RecordingSurface(self._model,self._path + '.' + name)
+        self.__dict__[name] = surface
+        return surface
+
+    def __call__(self,*args):
+        return self._model._call(self._path,args)
+
+#The recording stand-in of SapModel: it records every call, builds the model that the calls describe, and returns like comtypes does
+#[ByRef arguments then the return code], sleep=True waits for the latency of every call, otherwise the latency is only added up
+class RecordingSapModel(LocalSapModel):
+    def __init__(self,program="SAP2000",latency='none',sleep=False,record=True):
+        self.program = program
+        self.latency = LATENCIES[latency] if isinstance(latency,str) else latency
+        self.sleep = sleep
+        self.record = record #False: only the counts of the calls are kept
+        self.tables = LocalDatabaseTables()
+        self.calls = [] #(path, arguments, return)
+        self.counts = {} #path -> number of calls
+        self.simulated = 0.0 #the added up latency [seconds]
+        self.resetModel()
+
+    def __getattr__(self,name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        surface = RecordingSurface(self,name)
+        self.__dict__[name] = surface
+        return surface
+
+    #Clear the recorded model [a new blank model], the calls are kept
+    def resetModel(self):
+        self.definitions = {} #path of the call -> {name: the other arguments}
+        self.points = {} #name -> (x, y, z)
+        self.pointkeys = {} #merge key -> name
+        self.frames = {} #name -> [point i, point j, section]
+        self.areas = {} #name -> [points, section]
+        self.groups = {} #name -> set of (kind, element)
+        self.restraints = {} #point -> degrees of freedom
+        self.frameloads = {} #frame -> [(pattern, direction, start, end, ...)]
+        self.arealoads = {} #area -> [(pattern, value, direction, ...)]
+        self.piers = {} #area -> pier
+        self.spandrels = {} #area -> spandrel
+        self.stories = None
+
+    def _call(self,path,args):
+        handler = getattr(self,'_' + path.replace('.','_'),None)
+        if handler is not None:
+            result = handler(*args)
+        elif path.startswith('DatabaseTables.'):
+            result = getattr(self.tables,path[len('DatabaseTables.'):])(*args)
+        else:
+            method = path.split('.')[-1]
+            if (method.startswith('Set') or method == 'Add') and args:
+                self._define(path,args)
+            result = 0
+        self.counts[path] = self.counts.get(path,0) + 1
+        if self.record:
+            self.calls.append((path,tuple(list(arg) if isinstance(arg,(list,tuple)) else arg for arg in args),result))
+        cost = self.latency.cost(path,args)
+        self.simulated += cost
+        if self.sleep and cost > 0:
+            time.sleep(cost)
+        return result
+
+    #A utility function that keeps a definition (a material, section, load pattern, label, ...) by its call and name
+    def _define(self,path,args):
+        self.definitions.setdefault(path,{})[args[0]] = [list(arg) if isinstance(arg,(list,tuple)) else arg for arg in args[1:]]
+
+    #A utility function that returns the names of the elements of a call's ItemType: 0 the element, 1 the elements of a group
+    def _items(self,name,itemtype,kind):
+        if itemtype == 1:
+            return [elem for k, elem in self.groups.get(name,()) if k == kind]
+        return [name]
+
+    def _newName(self,elements,name):
+        if name:
+            return name
+        k = len(elements) + 1
+        while str(k) in elements:
+            k += 1
+        return str(k)
+
+    #A utility function that adds a point at coordinates, merged with an existing one unless mergeoff
+    def _addPoint(self,x,y,z,name="",mergeoff=False):
+        key = (int(round(x/MERGE_TOL)),int(round(y/MERGE_TOL)),int(round(z/MERGE_TOL)))
+        if not mergeoff and key in self.pointkeys:
+            return self.pointkeys[key]
+        name = self._newName(self.points,name)
+        self.points[name] = (float(x),float(y),float(z))
+        self.pointkeys.setdefault(key,name)
+        return name
+
+    def _File_NewBlank(self,*args):
+        self.resetModel()
+        return 0
+
+    def _InitializeNewModel(self,*args):
+        self.resetModel()
+        return 0
+
+    def _Story_SetStories(self,names,elevations,heights,*args):
+        self.stories = list(zip(names,elevations))
+        return 0
+
+    def _Story_SetElevation(self,name,elevation):
+        self.stories = [(name,elevation)]
+        return 0
+
+    def _Story_GetStories(self,*args):
+        stories = self.stories or []
+        n = len(stories)
+        elevations = [float(z) for name, z in stories]
+        heights = [0.0] + [b - a for a, b in zip(elevations[:-1],elevations[1:])]
+        return [n,[name for name, z in stories],elevations,heights,[True]*n,['None']*n,[False]*n,[0.0]*n,0]
+
+    def _GroupDef_SetGroup(self,name,*args):
+        self.groups.setdefault(name,set())
+        return 0
+
+    def _GroupDef_GetNameList(self,*args):
+        names = sorted(self.groups)
+        return [len(names),names,0]
+
+    #The group's elements keep their assignments
+    def _GroupDef_Delete(self,name):
+        if self.groups.pop(name,None) is None:
+            return 1
+        return 0
+
+    def _PointObj_AddCartesian(self,x,y,z,name="",username="",csys="Global",mergeoff=False,mergenumber=0):
+        return [self._addPoint(x,y,z,username,mergeoff),0]
+
+    def _PointObj_GetNameList(self,*args):
+        names = sorted(self.points)
+        return [len(names),names,0]
+
+    def _PointObj_GetCoordCartesian(self,name,*args):
+        if name not in self.points:
+            return [0.0,0.0,0.0,1]
+        return list(self.points[name]) + [0]
+
+    def _FrameObj_AddByPoint(self,point1,point2,name="",section="Default",username=""):
+        if point1 not in self.points or point2 not in self.points:
+            return [name,1]
+        name = self._newName(self.frames,username)
+        self.frames[name] = [point1,point2,section]
+        return [name,0]
+
+    def _FrameObj_AddByCoord(self,x1,y1,z1,x2,y2,z2,name="",section="Default",username="",csys="Global"):
+        point1 = self._addPoint(x1,y1,z1)
+        point2 = self._addPoint(x2,y2,z2)
+        return self._FrameObj_AddByPoint(point1,point2,name,section,username)
+
+    def _AreaObj_AddByPoint(self,npoints,points,name="",section="Default",username=""):
+        points = list(points)[:npoints]
+        if any(p not in self.points for p in points):
+            return [points,name,1]
+        name = self._newName(self.areas,username)
+        self.areas[name] = [points,section]
+        return [points,name,0]
+
+    def _AreaObj_AddByCoord(self,npoints,x,y,z,name="",section="Default",username="",csys="Global"):
+        points = [self._addPoint(x[k],y[k],z[k]) for k in range(0,npoints)]
+        result = self._AreaObj_AddByPoint(npoints,points,name,section,username)
+        return [x,y,z] + result[1:]
+
+    def _delete(self,elements,loads,kind,name,itemtype):
+        names = self._items(name,itemtype,kind)
+        if not names or any(n not in elements for n in names):
+            return 1
+        for n in names:
+            del elements[n]
+            loads.pop(n,None)
+            for members in self.groups.values():
+                members.discard((kind,n))
+        return 0
+
+    def _FrameObj_Delete(self,name,itemtype=0):
+        return self._delete(self.frames,self.frameloads,'frame',name,itemtype)
+
+    def _AreaObj_Delete(self,name,itemtype=0):
+        self.piers.pop(name,None)
+        self.spandrels.pop(name,None)
+        return self._delete(self.areas,self.arealoads,'area',name,itemtype)
+
+    def _groupAssign(self,elements,kind,name,group,remove=False,itemtype=0):
+        if group not in self.groups:
+            return 1
+        for n in self._items(name,itemtype,kind):
+            if n not in elements:
+                return 1
+            if remove:
+                self.groups[group].discard((kind,n))
+            else:
+                self.groups[group].add((kind,n))
+        return 0
+
+    def _PointObj_SetGroupAssign(self,name,group,remove=False,itemtype=0):
+        return self._groupAssign(self.points,'point',name,group,remove,itemtype)
+
+    def _FrameObj_SetGroupAssign(self,name,group,remove=False,itemtype=0):
+        return self._groupAssign(self.frames,'frame',name,group,remove,itemtype)
+
+    def _AreaObj_SetGroupAssign(self,name,group,remove=False,itemtype=0):
+        return self._groupAssign(self.areas,'area',name,group,remove,itemtype)
+
+    def _PointObj_SetRestraint(self,name,dofs,itemtype=0):
+        for n in self._items(name,itemtype,'point'):
+            self.restraints[n] = list(dofs)
+        return [dofs,0]
+
+    def _PointObj_DeleteRestraint(self,name,itemtype=0):
+        for n in self._items(name,itemtype,'point'):
+            self.restraints.pop(n,None)
+        return 0
+
+    #Loads of a pattern replace the element's previous loads of that pattern if replace
+    def _addLoad(self,loads,names,load,replace):
+        for n in names:
+            if replace:
+                loads[n] = [l for l in loads.get(n,[]) if l[0] != load[0]]
+            loads.setdefault(n,[]).append(load)
+        return 0
+
+    def _FrameObj_SetLoadDistributed(self,name,pattern,loadtype,direction,dist1,dist2,val1,val2,csys="Global",reldist=True,replace=True,itemtype=0):
+        load = (pattern,loadtype,direction,dist1,dist2,val1,val2,csys,reldist)
+        return self._addLoad(self.frameloads,self._items(name,itemtype,'frame'),load,replace)
+
+    def _AreaObj_SetLoadUniform(self,name,pattern,value,direction,replace=True,csys="Global",itemtype=0):
+        return self._addLoad(self.arealoads,self._items(name,itemtype,'area'),(pattern,value,direction,csys),replace)
+
+    def _AreaObj_SetPier(self,name,pier,itemtype=0):
+        for n in self._items(name,itemtype,'area'):
+            self.piers[n] = pier
+        return 0
+
+    def _AreaObj_SetSpandrel(self,name,spandrel,itemtype=0):
+        for n in self._items(name,itemtype,'area'):
+            self.spandrels[n] = spandrel
+        return 0
+
+    def _PropFrame_SetModifiers(self,name,values):
+        self._define('PropFrame.SetModifiers',(name,values))
+        return [values,0]
+
+    def _PropArea_SetModifiers(self,name,values):
+        self._define('PropArea.SetModifiers',(name,values))
+        return [values,0]
+
+    #Get the recorded model as plain data [lists and dictionaries sorted by name]
+    def dump(self):
+        return {'program': self.program,
+                'definitions': self.definitions,
+                'stories': self.stories,
+                'points': self.points,
+                'frames': self.frames,
+                'areas': self.areas,
+                'groups': dict((name,sorted(list(m) for m in members)) for name, members in self.groups.items()),
+                'restraints': self.restraints,
+                'frameloads': dict((n,[list(l) for l in loads]) for n, loads in self.frameloads.items()),
+                'arealoads': dict((n,[list(l) for l in loads]) for n, loads in self.arealoads.items()),
+                'piers': self.piers,
+                'spandrels': self.spandrels,
+                'tables': dict((key,{'fields':fields,'rows':rows}) for key, (fields, rows) in self.tables.tables.items())}
+
+    def saveDump(self,path):
+        f = open(path,'w')
+        try:
+            json.dump(self.dump(),f,indent=1,sort_keys=True)
+        finally:
+            f.close()
+
+    #Get the calls' statistics: number of calls of every path (most called first), and the added up latency
+    def report(self):
+        total = sum(self.counts.values())
+        lines = ["%d calls, %.3f s of simulated latency" % (total,self.simulated)]
+        for path, n in sorted(self.counts.items(),key=lambda item: (-item[1],item[0])):
+            lines.append("  %-40s %8d" % (path,n))
+        return '\n'.join(lines)
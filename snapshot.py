@@ -0,0 +1,151 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The snapshot of an extracted drawing: a file of the import model's columns [coordinates, sections, layers, labels and
+loads], its interned tables, definitions and handles, so importing the same drawing again [e.g. with other modifiers, or
+to the other program] skips its extraction
+2- The file is a short JSON header followed by the raw columns, every one aligned to 64 bytes; it's opened memory-mapped and
+the columns are NumPy arrays over the mapping without copying [copy on write, the file itself is never changed]
+3- A snapshot is used only while its drawing is unchanged: the drawing's size and modification time are kept in the header
+"""
+
+import json
+import mmap
+import os
+import struct
+import hashlib
+
+import numpy as np
+
+import xrecords
+from model import ImportModel, StringTable, Columns
+from cache import cacheDir
+
+SNAPSHOT_VERSION = 1 #a snapshot of another version is ignored
+SNAPSHOT_MAGIC = b'C2ESNAP\x00'
+SNAPSHOT_EXT = '.snapshot'
+ALIGN = 64 #bytes
+
+#The columns of the import model
+ARRAYS = ['framexyz','framesec','framelayer',
+          'areaxyz','areasec','areatype','arealayer','areapier','areaspand',
+          'pointxyz','pointlayer','pointrestraint',
+          'wallxyz','wallsec','walllayer','wallpier','wallspand','wallmesh']
+LOADS = ['frameloads','arealoads','wallloads']
+TABLES = ['layers','sections','patterns','labels']
+HANDLES = ['framehandles','areahandles','pointhandles','wallhandles']
+
+#A utility function that returns the snapshot file of a drawing, at the cache's directory by default
+def snapshotPath(drawingpath,directory=None):
+    key = os.path.normcase(os.path.abspath(drawingpath)).encode('utf-8')
+    return os.path.join(directory or cacheDir(),hashlib.sha1(key).hexdigest() + SNAPSHOT_EXT)
+
+#A utility function that returns what tells a drawing's file has changed: its size and modification time, None if it's missing
+def drawingStamp(drawingpath):
+    try:
+        st = os.stat(drawingpath)
+    except OSError:
+        return None
+    return [st.st_size,st.st_mtime]
+
+#A utility function that converts the lists of a decoded JSON value to tuples [the records' fields are tuples]
+def _tuples(value):
+    if isinstance(value,list):
+        return tuple(_tuples(v) for v in value)
+    return value
+
+def _encodeDefinitions(definitions):
+    return dict((name,[[type(rec).__name__,list(rec)] for rec in recs]) for name, recs in definitions.items())
+
+def _decodeDefinitions(encoded):
+    return dict((name,[getattr(xrecords,kind)(*_tuples(fields)) for kind, fields in recs]) for name, recs in encoded.items())
+
+#Write the snapshot of an import model, stamp is its drawing's [drawingStamp]
+def saveSnapshot(model,path,stamp):
+    columns = []
+    for name in ARRAYS:
+        columns.append((name,getattr(model,name)))
+    for name in LOADS:
+        cols = getattr(model,name)
+        for col in cols.names:
+            columns.append((name + '.' + col,getattr(cols,col)))
+    for name in HANDLES:
+        text = u'\n'.join(getattr(model,name)).encode('utf-8')
+        columns.append((name,np.frombuffer(text,dtype=np.uint8)))
+
+    offset = 0
+    entries = []
+    for name, arr in columns:
+        arr = np.ascontiguousarray(arr)
+        entries.append({'name':name,'dtype':arr.dtype.str,'shape':list(arr.shape),'offset':offset,'nbytes':arr.nbytes})
+        offset += -(-arr.nbytes//ALIGN)*ALIGN
+    header = {'version':SNAPSHOT_VERSION,'stamp':stamp,'columns':entries,
+              'tables':dict((name,list(getattr(model,name))) for name in TABLES),
+              'definitions':_encodeDefinitions(model.definitions),'issues':[list(issue) for issue in model.issues],
+              'counts':dict((name,len(getattr(model,name))) for name in HANDLES)}
+    text = json.dumps(header).encode('utf-8')
+    start = -(-(len(SNAPSHOT_MAGIC) + 8 + len(text))//ALIGN)*ALIGN
+
+    directory = os.path.dirname(path)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    f = open(path,'wb')
+    try:
+        f.write(SNAPSHOT_MAGIC + struct.pack('<Q',len(text)) + text)
+        f.write(b'\0'*(start - f.tell()))
+        for (name, arr), entry in zip(columns,entries):
+            f.write(np.ascontiguousarray(arr).tobytes())
+            f.write(b'\0'*(start + entry['offset'] + -(-entry['nbytes']//ALIGN)*ALIGN - f.tell()))
+    finally:
+        f.close()
+    return path
+
+#A utility function that reads the header of a snapshot file, returns it with the offset of its columns
+def _readHeader(f):
+    head = f.read(len(SNAPSHOT_MAGIC) + 8)
+    if len(head) < len(SNAPSHOT_MAGIC) + 8 or head[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError("not a snapshot")
+    size = struct.unpack('<Q',head[len(SNAPSHOT_MAGIC):])[0]
+    header = json.loads(f.read(size).decode('utf-8'))
+    return header, -(-(len(head) + size)//ALIGN)*ALIGN
+
+#Open the snapshot of a drawing memory-mapped, returns its import model or None if it's missing, damaged, of another version
+#or of another state of the drawing [stamp isn't the one kept in it]
+def loadSnapshot(path,stamp=None):
+    try:
+        f = open(path,'rb')
+    except IOError:
+        return None
+    try:
+        try:
+            header, start = _readHeader(f)
+        except (ValueError, struct.error):
+            return None #a damaged snapshot is like no snapshot
+        if header.get('version') != SNAPSHOT_VERSION or (stamp is not None and header.get('stamp') != list(stamp)):
+            return None
+        mm = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_COPY)
+    finally:
+        f.close()
+
+    cols = {}
+    try:
+        for entry in header['columns']:
+            count = int(np.prod(entry['shape'])) if entry['shape'] else 1
+            cols[entry['name']] = np.frombuffer(mm,dtype=np.dtype(entry['dtype']),count=count,
+                                                offset=start + entry['offset']).reshape(entry['shape'])
+    except ValueError:
+        return None #a snapshot whose writing was cut short
+    model = ImportModel()
+    model.definitions = _decodeDefinitions(header['definitions'])
+    for name in TABLES:
+        setattr(model,name,StringTable(header['tables'][name]))
+    for name in ARRAYS:
+        setattr(model,name,cols[name])
+    for name in LOADS:
+        prefix = name + '.'
+        setattr(model,name,Columns(**dict((key[len(prefix):],arr) for key, arr in cols.items() if key.startswith(prefix))))
+    for name in HANDLES:
+        handles = cols[name].tobytes().decode('utf-8').split(u'\n')
+        setattr(model,name,handles if header['counts'][name] else [])
+    model.issues = [tuple(issue) for issue in header['issues']]
+    return model
@@ -0,0 +1,138 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The stories of the import model, found from the levels (Z) of its horizontal elements [lines whose ends are at one level
+and flat 3dfaces], with the lowest and highest vertices as the base and the top; levels closer than the smallest story height
+to the story below them aren't stories [e.g. stairs' landings], and of levels closer than it to each other the one with the
+most vertices of slabs is the story, or the highest [a slab above beams dropped below it]
+2- The story of every line, 3dface and point: every vertex belongs to the nearest story at or below it [the ends of sloped
+beams and braces, ramps, stairs and the rows of walls' panels are between stories], lines and 3dfaces to the story of their
+top vertex
+3- The definition of the whole story table at ETABS with one call
+"""
+
+import numpy as np
+
+STORY_TOL = 0.02 #levels closer than this are one level [m]
+MIN_STORY_HEIGHT = 1.5 #the smallest height of a story [m]
+
+#Cluster levels within tol of the lowest level of their cluster [sorted, then every cluster starts at the first level above
+#the previous one's start by more than tol, so levels a little apart along a ramp don't chain into one cluster], O(n log n)
+#Returns the level of every cluster (the mean of its values), its range (k,2) [min, max] and the cluster of every value
+def clusterLevels(z,tol=STORY_TOL):
+    z = np.asarray(z,dtype=np.float64).ravel()
+    if len(z) == 0:
+        return np.zeros(0), np.zeros((0,2)), np.zeros(0,int)
+    order = np.argsort(z,kind='mergesort')
+    zs = z[order]
+    starts = [0]
+    while True:
+        k = int(np.searchsorted(zs,zs[starts[-1]] + tol,'right'))
+        if k == len(zs):
+            break
+        starts.append(k)
+    sortedlabels = np.zeros(len(zs),dtype=np.intp)
+    sortedlabels[starts[1:]] = 1
+    sortedlabels = np.cumsum(sortedlabels)
+    labels = np.empty(len(z),dtype=np.intp)
+    labels[order] = sortedlabels
+    counts = np.bincount(sortedlabels)
+    levels = np.bincount(sortedlabels,weights=zs)/counts
+    ends = np.cumsum(counts)
+    ranges = np.column_stack([zs[ends-counts],zs[ends-1]])
+    return levels, ranges, labels
+
+#A utility function that returns the levels of the horizontal elements of the model: lines whose ends are within tol of
+#each other's level, and 3dfaces whose vertices are, with the number of slabs' vertices at every level [0 for lines]
+def horizontalLevels(model,tol=STORY_TOL):
+    frz = model.framexyz[:,[2,5]]
+    arz = model.areaxyz[:,:,2]
+    flatfr = np.ptp(frz,axis=1) <= tol if len(frz) else np.zeros(0,dtype=bool)
+    flatar = np.ptp(arz,axis=1) <= tol if len(arz) else np.zeros(0,dtype=bool)
+    levels = np.concatenate([frz[flatfr].mean(axis=1),arz[flatar].mean(axis=1)])
+    slabvertices = np.concatenate([np.zeros(int(flatfr.sum())),np.full(int(flatar.sum()),4.0)])
+    return levels, slabvertices
+
+#Find the levels of the stories: the base [the lowest vertex], the clustered levels of the horizontal elements, and the top
+#[the highest vertex]; a level less than minheight above the previous story isn't a story, and of a group of levels less
+#than minheight above its lowest one the level with the most slabs' vertices is the story [the highest of equal ones]
+def storyLevels(model,tol=STORY_TOL,minheight=MIN_STORY_HEIGHT):
+    z = np.concatenate([model.framexyz[:,[2,5]].ravel(),model.areaxyz[:,:,2].ravel(),model.pointxyz[:,2]])
+    if len(z) == 0:
+        return np.zeros(0)
+    base, top = float(z.min()), float(z.max())
+    horizontal, slabvertices = horizontalLevels(model,tol)
+    clustered, ranges, labels = clusterLevels(horizontal,tol)
+    weights = np.bincount(labels,weights=slabvertices,minlength=len(clustered)) if len(labels) else np.zeros(0)
+    levels = [base]
+    group = [] #(slabs' vertices, level) of the current group of close levels
+    for level, weight in zip(clustered.tolist(),weights.tolist()):
+        if top - level <= tol:
+            break
+        if group and level - group[0][1] < minheight:
+            group.append((weight,level))
+            continue
+        if group:
+            levels.append(max(group)[1])
+            group = []
+        if level - levels[-1] >= minheight:
+            group = [(weight,level)]
+    if group:
+        #the last group's story is at least minheight below the top if one of its levels is, else the lowest of its levels
+        #with the most slabs' vertices [the steps of a ramp up to the top]
+        below = [member for member in group if top - member[1] >= minheight]
+        levels.append(max(below)[1] if below else max(group,key=lambda member: (member[0],-member[1]))[1])
+    if top - levels[-1] > tol:
+        levels.append(top)
+    return np.array(levels)
+
+#Find the stories of the model, and tag every line, 3dface and point with its story index
+def assignStories(model,tol=STORY_TOL,minheight=MIN_STORY_HEIGHT):
+    nfr = model.nframes()
+    nar = model.nareas()
+    z = np.concatenate([model.framexyz[:,[2,5]].ravel(),model.areaxyz[:,:,2].ravel(),model.pointxyz[:,2]])
+    model.levels = storyLevels(model,tol,minheight)
+    labels = storyOf(model,z,tol)
+    #the range [min, max] of the vertices of every story
+    model.levelranges = np.column_stack([model.levels,model.levels])
+    if len(z):
+        np.minimum.at(model.levelranges[:,0],labels,z)
+        np.maximum.at(model.levelranges[:,1],labels,z)
+    #labels grow with the level, so the top vertex has the largest label
+    model.framestory = labels[:2*nfr].reshape(-1,2).max(axis=1) if nfr else np.zeros(0,int)
+    model.areastory = labels[2*nfr:2*nfr+4*nar].reshape(-1,4).max(axis=1) if nar else np.zeros(0,int)
+    model.pointstory = labels[2*nfr+4*nar:]
+    return model
+
+#Get the story index of levels (e.g. of joints) from the stories of the model: the nearest story at or below every level
+def storyOf(model,z,tol=STORY_TOL):
+    z = np.asarray(z,dtype=np.float64)
+    if len(model.levels) == 0:
+        return np.zeros(len(z),dtype=np.intp)
+    return np.clip(np.searchsorted(model.levels,z + tol,'right')-1,0,len(model.levels)-1)
+
+#Get the nearest story at or above every level and the distance below it, as ETABS places points between stories
+def storyAbove(model,z,tol=STORY_TOL):
+    z = np.asarray(z,dtype=np.float64)
+    if len(model.levels) == 0:
+        return np.zeros(len(z),dtype=np.intp), np.zeros(len(z))
+    story = np.clip(np.searchsorted(model.levels,z - tol,'left'),0,len(model.levels)-1)
+    below = model.levels[story] - z
+    return story, np.where(np.abs(below) <= tol,0.0,below)
+
+#Get the names of the stories: "Base" for the lowest level, then "Story1", "Story2", ...
+def storyNames(model):
+    return ['Base'] + ['Story%d' % k for k in range(1,len(model.levels))]
+
+#Define all stories at ETABS with one call, the lowest level is the base
+def defineStories(model,sapmodel):
+    nstories = len(model.levels) - 1
+    if nstories < 1:
+        if len(model.levels):
+            ret = sapmodel.Story.SetElevation("Base",float(model.levels[0]))
+        return
+    names = storyNames(model)
+    elevations = model.levels.tolist()
+    heights = [0.0] + np.diff(model.levels).tolist()
+    ret = sapmodel.Story.SetStories(names,elevations,heights,[True]*(nstories+1),['None']*(nstories+1),[False]*(nstories+1),[0.0]*(nstories+1))
+    return ret
@@ -0,0 +1,268 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- A generator of synthetic structural drawings: a building of stories and bays with columns, beams, slabs (3dfaces),
+shear walls with pier and spandrel labels [3dfaces, or stiff lines divided into panels at the import], supports and
+distributed loads
+2- The drawings are ASCII .dxf files with the dictionaries and extension dictionaries written by insert_struct_prop.lsp
+3- The XRecords of the drawing as the rows of the "dumpxrecords" macro, to benchmark their decoding
+
+Usage:-
+python synth.py OUTPUT.dxf [--elements N] [--stories N] [--baysx N] [--baysy N] [--stiff-lines]
+"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+
+#The DXF group codes of the XRecords of insert_struct_prop.lsp
+CODES = {'ConcMaterial':[1,2,3,4,6,7,8,9],
+         'LoadPatterns':[1,2],
+         'FrSecProp':[1,6,2,3,7,8,9],
+         'SlabSecProp':[1,2,3,4,6],
+         'WallSecProps':[1,2,3],
+         'FrameLoad':[1,2,3,4],
+         'AreaLoad':[1,3,4],
+         'Label':[1],
+         'WallMesh':[1,2]}
+
+LAYERS = ['0','Columns','Beams','Slabs','Walls','Supports']
+GRAVITY = 6 #direction of the loads
+
+#The definitions of the building [as their XRecords' values]
+MATERIALS = [['C30','30000','24855578','0.002','0.003','0.2','9.9e-6','25']]
+PATTERNS = [['Dead','Dead'],['Live','Live'],['SDL','Other']]
+FRAME_SECTIONS = [['C500X500','Rec','C30','Column','0.5','0.5','25'],['B250X600','Rec','C30','Beam','0.6','0.25','25']]
+SLAB_SECTIONS = [['S150','C30','0.15','0.15','25']]
+WALL_SECTIONS = [['W250','0.25','C30']]
+WALL_MESH = 0.75 #the best size of the walls' panels [m]
+
+#A synthetic building: baysx by baysy bays of bay [m] and stories of height [m]
+#Every story has columns, beams around every bay, a slab 3dface for every bay, and shear walls along the 2 sides at x=0 and
+#x=baysx*bay [a pier label for every wall line, a spandrel label for every story]; supports are at the columns' bases
+#With stifflines, every story's wall is a stiff line along its top instead of a 3dface for every bay [see panelize.py]
+class SyntheticBuilding(object):
+    def __init__(self,stories=3,baysx=3,baysy=3,bay=5.0,height=3.0,walls=True,loads=True,stifflines=False):
+        self.stories = stories
+        self.baysx = baysx
+        self.baysy = baysy
+        self.bay = bay
+        self.height = height
+        self.walls = walls
+        self.loads = loads
+        self.stifflines = stifflines
+
+    #A building of about nelements elements [at least nelements], square in plan
+    @classmethod
+    def forElements(cls,nelements,stories=None,**kw):
+        if stories is None:
+            stories = max(1,int(round((nelements/40.0) ** (1/3.0))))
+        bays = 1
+        while cls(stories,bays,bays,**kw).nelements() < nelements:
+            bays += 1
+        return cls(stories,bays,bays,**kw)
+
+    def counts(self):
+        bx, by, s = self.baysx, self.baysy, self.stories
+        nwalls = 2*by if self.walls and not self.stifflines else 0
+        nstiff = 2 if self.walls and self.stifflines else 0
+        return {'frames': s*((bx+1)*(by+1) + bx*(by+1) + by*(bx+1) + nstiff),
+                'areas': s*(bx*by + nwalls),
+                'points': (bx+1)*(by+1)}
+
+    def nelements(self):
+        return sum(self.counts().values())
+
+    #Write the building to a .dxf file, returns the rows of its XRecords [see dumpRows]
+    def write(self,path):
+        writer = _DxfWriter()
+        self.records = writer.records
+        definitions = [('ConcMaterial',MATERIALS,'ConcMaterial'),('LoadPatterns',PATTERNS,'LoadPatterns'),
+                       ('FrSecProp',FRAME_SECTIONS,'FrSecProp'),('SlabSecProp',SLAB_SECTIONS,'SlabSecProp'),
+                       ('WallSecProps',WALL_SECTIONS,'WallSecProps'),
+                       ('PierIDs',[['P%d' % k] for k in (1,2)] if self.walls else [],'Label'),
+                       ('SpandralIDs',[['SP%d' % k] for k in range(1,self.stories+1)] if self.walls else [],'Label')]
+        named = []
+        for name, records, kind in definitions:
+            entries = [(vals[0],writer.xrecord(name,'',CODES[kind],vals)) for vals in records]
+            named.append((name,writer.dictionary(entries)))
+        writer.root(named)
+
+        bx, by, bay, h = self.baysx, self.baysy, self.bay, self.height
+        for k in range(0,self.stories):
+            z1 = k*h
+            z2 = z1 + h
+            for i in range(0,bx+1):
+                for j in range(0,by+1):
+                    writer.line('Columns',(i*bay,j*bay,z1),(i*bay,j*bay,z2),{'SecProp':'C500X500'})
+            for j in range(0,by+1):
+                edge = j == 0 or j == by
+                for i in range(0,bx):
+                    writer.line('Beams',(i*bay,j*bay,z2),((i+1)*bay,j*bay,z2),{'SecProp':'B250X600'},self._beamLoads(edge))
+            for i in range(0,bx+1):
+                edge = i == 0 or i == bx
+                for j in range(0,by):
+                    writer.line('Beams',(i*bay,j*bay,z2),(i*bay,(j+1)*bay,z2),{'SecProp':'B250X600'},self._beamLoads(edge))
+            for i in range(0,bx):
+                for j in range(0,by):
+                    x1, y1, x2, y2 = i*bay, j*bay, (i+1)*bay, (j+1)*bay
+                    writer.face('Slabs',[(x1,y1,z2),(x2,y1,z2),(x2,y2,z2),(x1,y2,z2)],{'SecProp':'S150'},'DistLoads',self._slabLoads())
+            if self.walls and self.stifflines:
+                for pier, x in [('P1',0.0),('P2',bx*bay)]:
+                    labels = {'WallProp':'W250','PierID':pier,'SpandralID':'SP%d' % (k+1),'WallMesh':[repr(h),repr(WALL_MESH)]}
+                    writer.line('Walls',(x,0.0,z2),(x,by*bay,z2),labels,self._stiffLoads())
+            elif self.walls:
+                for pier, x in [('P1',0.0),('P2',bx*bay)]:
+                    for j in range(0,by):
+                        y1, y2 = j*bay, (j+1)*bay
+                        labels = {'WallProp':'W250','PierID':pier,'SpandralID':'SP%d' % (k+1)}
+                        writer.face('Walls',[(x,y1,z1),(x,y2,z1),(x,y2,z2),(x,y1,z2)],labels,'WallDistLoads',self._wallLoads())
+        for i in range(0,bx+1):
+            for j in range(0,by+1):
+                writer.point('Supports',(i*bay,j*bay,0.0),{'Restrain':'Fixed'})
+        writer.save(path,LAYERS)
+        return self.records
+
+    def _beamLoads(self,edge):
+        if not self.loads:
+            return []
+        loads = [('SDL',['2','2',str(GRAVITY),'SDL'])]
+        if edge:
+            loads.append(('Dead',['12','12',str(GRAVITY),'Dead'])) #the weight of the cladding
+        return loads
+
+    def _slabLoads(self):
+        if not self.loads:
+            return []
+        return [('SDL',['1.5',str(GRAVITY),'SDL']),('Live',['2',str(GRAVITY),'Live'])]
+
+    def _wallLoads(self):
+        if not self.loads:
+            return []
+        return [('Live',['0.5',str(GRAVITY),'Live'])]
+
+    #The loads of a stiff line: at the wall's top and bottom
+    def _stiffLoads(self):
+        if not self.loads:
+            return []
+        return [('Live',['0.5','1.5',str(GRAVITY),'Live'])]
+
+#A utility function that returns the rows of the "dumpxrecords" macro of XRecords [as xrecords.decodeDump reads them]
+def dumpRows(records):
+    rows = []
+    for objid, key, owner, codes, vals in records:
+        row = [objid,key,owner,len(codes)]
+        for code, val in zip(codes,vals):
+            row.extend([code,val])
+        rows.append(row)
+    return rows
+
+#The writer of the .dxf file: entities and objects are kept as text until they're saved
+class _DxfWriter(object):
+    def __init__(self):
+        self.next = 0x100
+        self.entities = []
+        self.objects = []
+        self.records = [] #(Object ID, parent key, owner's type, dxf group codes, values) of every XRecord
+        self.rootdict = None
+
+    def handle(self):
+        h = self.next
+        self.next += 1
+        return h
+
+    def xrecord(self,key,owner,codes,vals):
+        h = self.handle()
+        self.records.append((h,key,owner,codes,vals))
+        parts = ['0\nXRECORD\n5\n%X\n100\nAcDbXrecord\n280\n1\n' % h]
+        for code, val in zip(codes,vals):
+            parts.append('%d\n%s\n' % (code,val))
+        self.objects.append(''.join(parts))
+        return h
+
+    def dictionary(self,entries,code=350):
+        h = self.handle()
+        parts = ['0\nDICTIONARY\n5\n%X\n100\nAcDbDictionary\n' % h]
+        for key, eh in entries:
+            parts.append('3\n%s\n%d\n%X\n' % (key,code,eh))
+        self.objects.append(''.join(parts))
+        return h
+
+    #The named objects dictionary, it must be the first object
+    def root(self,entries):
+        self.rootdict = self.dictionary(entries)
+        self.objects.insert(0,self.objects.pop())
+
+    #The extension dictionary of an element: labels are XRecords, loads are a dictionary of XRecords (one per load pattern)
+    def xdict(self,owner,labels,loadkey=None,loads=()):
+        entries = []
+        for key, label in sorted(labels.items()):
+            vals = label if isinstance(label,list) else [label]
+            entries.append((key,self.xrecord(key,owner,CODES.get(key,CODES['Label']),vals)))
+        if loads:
+            kind = 'FrameLoad' if owner == 'LINE' else 'AreaLoad'
+            lentries = [(pattern,self.xrecord(loadkey,owner,CODES[kind],vals)) for pattern, vals in loads]
+            entries.append((loadkey,self.dictionary(lentries,360)))
+        return self.dictionary(entries,360)
+
+    def _entity(self,enttype,layer,coords,xd):
+        parts = ['0\n%s\n5\n%X\n102\n{ACAD_XDICTIONARY\n360\n%X\n102\n}\n8\n%s\n' % (enttype,self.handle(),xd,layer)]
+        for v, (x, y, z) in enumerate(coords):
+            parts.append('%d\n%r\n%d\n%r\n%d\n%r\n' % (10+v,float(x),20+v,float(y),30+v,float(z)))
+        self.entities.append(''.join(parts))
+
+    def line(self,layer,p1,p2,labels,loads=()):
+        self._entity('LINE',layer,[p1,p2],self.xdict('LINE',labels,'DistLoads',loads))
+
+    def face(self,layer,pts,labels,loadkey,loads=()):
+        self._entity('3DFACE',layer,pts,self.xdict('3DFACE',labels,loadkey,loads))
+
+    def point(self,layer,p,labels):
+        self._entity('POINT',layer,[p],self.xdict('POINT',labels))
+
+    def save(self,path,layers):
+        f = open(path,'w')
+        try:
+            f.write('0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\nAC1027\n0\nENDSEC\n')
+            f.write('0\nSECTION\n2\nTABLES\n0\nTABLE\n2\nLAYER\n')
+            for name in layers:
+                f.write('0\nLAYER\n2\n%s\n70\n0\n' % name)
+            f.write('0\nENDTAB\n0\nENDSEC\n0\nSECTION\n2\nENTITIES\n')
+            f.writelines(self.entities)
+            f.write('0\nENDSEC\n0\nSECTION\n2\nOBJECTS\n')
+            f.writelines(self.objects)
+            f.write('0\nENDSEC\n0\nEOF\n')
+        finally:
+            f.close()
+
+def parseArgs(argv):
+    parser = argparse.ArgumentParser(description="Write a synthetic structural drawing (.dxf)")
+    parser.add_argument('output',help="the .dxf file")
+    parser.add_argument('--elements',type=int,default=0,help="about this number of elements [the bays are found from it]")
+    parser.add_argument('--stories',type=int,default=None)
+    parser.add_argument('--baysx',type=int,default=3)
+    parser.add_argument('--baysy',type=int,default=3)
+    parser.add_argument('--bay',type=float,default=5.0,help="bay's length [m]")
+    parser.add_argument('--height',type=float,default=3.0,help="story's height [m]")
+    parser.add_argument('--no-walls',dest='walls',action='store_false')
+    parser.add_argument('--no-loads',dest='loads',action='store_false')
+    parser.add_argument('--stiff-lines',dest='stifflines',action='store_true',help="walls as stiff lines instead of 3dfaces")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parseArgs(sys.argv[1:] if argv is None else argv)
+    if args.elements:
+        building = SyntheticBuilding.forElements(args.elements,args.stories,bay=args.bay,height=args.height,walls=args.walls,loads=args.loads,
+                                                 stifflines=args.stifflines)
+    else:
+        building = SyntheticBuilding(args.stories or 3,args.baysx,args.baysy,args.bay,args.height,args.walls,args.loads,args.stifflines)
+    records = building.write(args.output)
+    counts = building.counts()
+    print("%s: %d stories, %dx%d bays, %d frames, %d areas, %d points, %d XRecords" % (args.output,building.stories,building.baysx,
+                                                                                     building.baysy,counts['frames'],counts['areas'],
+                                                                                     counts['points'],len(records)))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
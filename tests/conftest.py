@@ -0,0 +1,149 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The repository's directory on the import path, the tests import its modules as the application does
+2- A fixture that builds the import model of a synthetic building [synth.py] from its .dxf file, without AutoCAD
+3- The comparison of 2 import models, column by column
+4- A fake AutoCAD document of a synthetic .dxf file: its "dump-geom" writes the geometry of the drawing's elements, and its
+dictionaries and extension dictionaries are read through the Object IDs of their XRecords
+"""
+
+import os
+import re
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synth import SyntheticBuilding
+from extract import extractDxf
+from dxfreader import DxfDrawing
+
+ARRAYS = ['framexyz','framesec','framelayer','areaxyz','areasec','areatype','arealayer','areapier','areaspand',
+          'pointxyz','pointlayer','pointrestraint','wallxyz','wallsec','walllayer','wallpier','wallspand','wallmesh']
+HANDLES = ['framehandles','areahandles','pointhandles','wallhandles']
+TABLES = ['layers','sections','patterns','labels']
+LOADS = ['frameloads','arealoads','wallloads']
+
+#A utility function that writes a synthetic building to directory and returns the path of its .dxf file
+def writeSynth(directory,name='synth.dxf',**kw):
+    path = os.path.join(str(directory),name)
+    SyntheticBuilding(**kw).write(path)
+    return path
+
+@pytest.fixture
+def synthModel(tmp_path):
+    def build(**kw):
+        return extractDxf(writeSynth(tmp_path,**kw))
+    return build
+
+#Assert that 2 import models have the same columns [values and types], handles, tables, loads, definitions and issues
+def assertSameModel(a,b):
+    for name in ARRAYS:
+        x, y = getattr(a,name), getattr(b,name)
+        assert x.dtype == y.dtype, name
+        assert np.array_equal(x,y,equal_nan=x.dtype.kind == 'f'), name
+    for name in HANDLES:
+        assert list(getattr(a,name)) == list(getattr(b,name)), name
+    for name in TABLES:
+        assert list(getattr(a,name)) == list(getattr(b,name)), name
+    for name in LOADS:
+        x, y = getattr(a,name), getattr(b,name)
+        assert x.names == y.names, name
+        for col in x.names:
+            assert getattr(x,col).dtype == getattr(y,col).dtype, name + '.' + col
+            assert np.array_equal(getattr(x,col),getattr(y,col)), name + '.' + col
+    assert a.definitions == b.definitions
+    assert list(a.issues) == list(b.issues)
+
+#The type codes of "dump-geom" [extract.GEOM_TYPES]
+GEOM_CODES = {'LINE':1,'3DFACE':2,'POINT':3}
+OBJECT_NAMES = {'LINE':'AcDbLine','3DFACE':'AcDbFace','POINT':'AcDbPoint'}
+
+class _Named(object):
+    def __init__(self,name):
+        self.Name = name
+
+class _Layers(object):
+    def __init__(self,names):
+        self.names = names
+        self.Count = len(names)
+    def Item(self,i):
+        return _Named(self.names[i])
+
+#A dictionary of XRecords [their Object IDs] or of dictionaries, items are 0-based like AutoCAD's
+class _Dictionary(_Named):
+    def __init__(self,name,items=(),objid=None):
+        _Named.__init__(self,name)
+        self.items = list(items)
+        self.Count = len(self.items)
+        self.ObjectID = objid
+    def Item(self,j):
+        if isinstance(j,int):
+            return self.items[j]
+        for item in self.items:
+            if item.Name == j:
+                return item
+        raise KeyError(j)
+
+#An element read through AutoCAD, with the extension dictionary of the .dxf file's entity
+class _Element(object):
+    def __init__(self,ent,xdict):
+        self.Handle = ent.handle
+        self.ObjectName = OBJECT_NAMES[ent.type]
+        self.HasExtensionDictionary = xdict is not None
+        self.xdict = xdict
+    def GetExtensionDictionary(self):
+        return self.xdict
+
+#A fake document of a .dxf file: its dictionaries and the extension dictionaries of its elements are served through the
+#Object IDs of their XRecords [xrecs, as the "dumpxrecords" macro reads them], reads counts the elements read through AutoCAD
+class FakeDocument(object):
+    def __init__(self,path):
+        drawing = DxfDrawing(path)
+        self.entities = list(drawing.entities())
+        self.Layers = _Layers(list(drawing.layers))
+        self.xrecs = {}
+        self.Dictionaries = _Dictionary('',[_Dictionary(name,[self._record(name,rec) for rec in records])
+                                            for name, records in drawing.dictionaries().items()])
+        self.xdicts = {}
+        for ent in self.entities:
+            if ent.xdata:
+                items = []
+                for key, value in sorted(ent.xdata.items()):
+                    if isinstance(value,list):
+                        items.append(_Dictionary(key,[self._record(key,rec) for rec in value]))
+                    else:
+                        items.append(self._record(key,value))
+                self.xdicts[ent.handle] = _Dictionary('',items)
+        self.reads = 0
+
+    #A utility function that gives a typed record an Object ID
+    def _record(self,name,rec):
+        objid = 1000 + len(self.xrecs)
+        self.xrecs[objid] = rec
+        return _Dictionary(name,(),objid)
+
+    def SendCommand(self,command):
+        base = re.search(r'\(dump-geom "([^"]*)"\)',command).group(1)
+        rows = []
+        f = open(base + '.ids','w')
+        try:
+            for ent in self.entities:
+                coords = list(ent.coords) + [0.0]*(12-len(ent.coords))
+                rows.append([GEOM_CODES[ent.type]] + coords)
+                signature = ''.join(';%s(%r)' % item for item in sorted(ent.xdata.items())) #as obj-sig of geomdump.lsp
+                f.write('%s\t%d\t%s\t%s\n' % (ent.handle,1 if ent.xdata else 0,ent.layer,signature))
+        finally:
+            f.close()
+        np.savetxt(base + '.tmp',np.array(rows,dtype=float).reshape(-1,13))
+        os.rename(base + '.tmp',base + '.geo')
+
+    def HandleToObject(self,handle):
+        self.reads += 1
+        for ent in self.entities:
+            if ent.handle == handle:
+                return _Element(ent,self.xdicts.get(handle))
+        raise KeyError(handle)
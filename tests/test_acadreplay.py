@@ -0,0 +1,49 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the recording and replay of the AutoCAD side of an import [acadreplay.py]: the extraction of a recorded fake
+document is replayed without it to the same import model, with no access missed
+"""
+
+import pytest
+
+from conftest import writeSynth, assertSameModel, FakeDocument
+from acadreplay import AcadRecorder, AcadReplay, ReplayMiss, ReplayedError, recordingPath, main
+from extract import extractDocument
+
+@pytest.fixture
+def recorded(tmp_path):
+    drawing = writeSynth(tmp_path,stories=2,baysx=2,baysy=1)
+    doc = FakeDocument(drawing)
+    recorder = AcadRecorder('geomdump.lsp')
+    recorder.xrecs = doc.xrecs
+    model = extractDocument(recorder.wrap(doc),doc.xrecs,recorder.lisppath)
+    path = recorder.save(recordingPath(str(tmp_path / 'recordings'),drawing))
+    return doc, recorder, model, path
+
+def test_round_trip(recorded):
+    doc, recorder, model, path = recorded
+    assert path.endswith('synth.acrec')
+    assert recorder.counts['HandleToObject'] == doc.reads > 0
+    replay = AcadReplay(path)
+    for run in range(0,2): #the responses are served from their start again
+        replayed, elapsed = replay.extract()
+        assert replay.misses == 0
+        assert replay.served == recorder.naccesses()
+        assertSameModel(replayed,model)
+    assert main([path,'--repeat','1']) == 0
+
+#An access that wasn't recorded is a miss, an error raised while recording is raised again
+def test_miss_and_error(recorded):
+    doc, recorder, model, path = recorded
+    proxy = recorder.wrap(doc)
+    with pytest.raises(KeyError):
+        proxy.Dictionaries.Item('NOTHERE')
+    recorder.save(path)
+    replay = AcadReplay(path)
+    document = replay.document()
+    with pytest.raises(ReplayedError):
+        document.Dictionaries.Item('NOTHERE')
+    with pytest.raises(ReplayMiss):
+        document.Layers.Item(99)
+    assert replay.misses == 1
@@ -0,0 +1,148 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the backends [backends.py] with fake COM applications: a running instance is reused, otherwise one is started,
+and only the instances and the workbook that were started here are closed
+"""
+
+import os
+import sys
+import types
+
+import pytest
+
+import backends
+from backends import Backend, Backends, BackendError, ExcelBackend, StartupReport
+
+class FakeWorkbook(object):
+    def __init__(self,books,fullname):
+        self.books = books
+        self.FullName = fullname
+        self.closed = False
+        self.activations = 0
+
+    def Activate(self):
+        if self.closed:
+            raise RuntimeError("the workbook was closed")
+        self.activations += 1
+
+    def Close(self,SaveChanges=0):
+        self.closed = True
+        self.books.remove(self)
+
+class FakeWorkbooks(object):
+    def __init__(self):
+        self.books = []
+
+    @property
+    def Count(self):
+        return len(self.books)
+
+    def Item(self,k):
+        return self.books[k-1] #1-based like Excel's
+
+    def Open(self,Filename,ReadOnly=0):
+        wb = FakeWorkbook(self.books,os.path.abspath(Filename))
+        self.books.append(wb)
+        return wb
+
+class FakeApp(object):
+    def __init__(self,progid):
+        self.progid = progid
+        self.Name = progid
+        self.SapModel = object()
+        self.Workbooks = FakeWorkbooks()
+        self.quit = False
+
+    def Quit(self):
+        self.quit = True
+        del self.Name #a closed application doesn't answer
+
+#The running applications by their ProgIDs, and the ones started through the fake comtypes.client
+class FakeCom(object):
+    def __init__(self,running=()):
+        self.running = dict((progid,FakeApp(progid)) for progid in running)
+        self.created = []
+
+    def GetActiveObject(self,progid,dynamic=False):
+        if progid not in self.running:
+            raise OSError("Operation unavailable")
+        return self.running[progid]
+
+    def CreateObject(self,progid,dynamic=False):
+        app = FakeApp(progid)
+        self.created.append(app)
+        self.running[progid] = app
+        return app
+
+@pytest.fixture
+def com(monkeypatch):
+    def install(running=()):
+        fake = FakeCom(running)
+        client = types.ModuleType('comtypes.client')
+        client.GetActiveObject = fake.GetActiveObject
+        client.CreateObject = fake.CreateObject
+        package = types.ModuleType('comtypes')
+        package.client = client
+        monkeypatch.setitem(sys.modules,'comtypes',package)
+        monkeypatch.setitem(sys.modules,'comtypes.client',client)
+        monkeypatch.setattr(backends.atexit,'register',lambda func: func)
+        return fake
+    return install
+
+def test_reuse_or_start(com):
+    fake = com(running=[backends.ACAD_PROGID])
+    startup = StartupReport()
+    acad = Backend("AutoCAD",backends.ACAD_PROGID,dynamic=True,startup=startup)
+    assert acad.get() is fake.running[backends.ACAD_PROGID] and not acad.started
+    other = Backend("Other","Other.Application",startup=startup)
+    app = other.get()
+    assert fake.created == [app] and other.started
+    assert other.get() is app #kept while it's alive
+    assert [stage for stage, at, duration in startup.stages] == ["AutoCAD (reused)","Other (started)"]
+    app.Quit() #closed by the user, started again
+    del fake.running["Other.Application"]
+    assert other.get() is not app and len(fake.created) == 2
+
+def test_running_only(com):
+    com()
+    with pytest.raises(BackendError):
+        Backend("ETABS",backends.CSI_PROGIDS["ETABS"],create=False,probe='SapModel').get()
+
+#Only the workbook and the applications started here are closed, ETABS and SAP2000 are left open
+def test_close_all_started(com,tmp_path):
+    fake = com(running=["Excel.Application",backends.CSI_PROGIDS["ETABS"]])
+    excelapp = fake.running["Excel.Application"]
+    workbookpath = str(tmp_path / 'facilitate.xlsm')
+    apps = Backends(workbookpath)
+    acad = apps.acad.get()
+    excel = apps.excel.get()
+    etabs = apps.program("ETABS")
+    assert apps.excel.openedbook and apps.excel.workbook.activations == 1
+    apps.closeAll()
+    assert acad.quit #started here
+    assert not excel.quit and not etabs.quit #the user's
+    assert excelapp.Workbooks.Count == 0 #the workbook opened here is closed
+    assert apps.csi["ETABS"].app is None
+
+def test_reused_workbook(com,tmp_path):
+    fake = com(running=["Excel.Application"])
+    workbookpath = str(tmp_path / 'facilitate.xlsm')
+    workbook = fake.running["Excel.Application"].Workbooks.Open(workbookpath)
+    excel = ExcelBackend(workbookpath)
+    excel.get()
+    assert excel.workbook is workbook and not excel.openedbook
+    excel.close()
+    assert not workbook.closed
+
+#A workbook closed by the user while Excel is still running is opened again, instead of failing to activate it
+def test_closed_workbook_opened_again(com,tmp_path):
+    fake = com()
+    excel = ExcelBackend(str(tmp_path / 'facilitate.xlsm'))
+    app = excel.get()
+    excel.workbook.Close()
+    app2 = excel.get()
+    assert app2 is app and not excel.workbook.closed and excel.workbook.activations == 1
+    assert app.Workbooks.Count == 1
+    excel.close()
+    assert app.quit and app.Workbooks.Count == 0
@@ -0,0 +1,58 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the batch conversion [batch.py]: a directory of synthetic drawings is converted to model files, and a drawing
+that fails the validation is reported as an error without stopping the others
+"""
+
+import csv
+import io
+import os
+
+from conftest import writeSynth
+from batch import convertDrawing, findDrawings, main
+from validate import MISSING_SECTION
+
+OPTS = {'program':'ETABS','swm':'0','modifiers':'All set to 1','walls':'cracked','slabs':'2D','columns':'Columns',
+        'fixgeometry':False,'split':True,'snapshots':False,'out':''}
+
+#A utility function that writes a synthetic drawing with a line that has no section property [no extension dictionary]
+def writeInvalid(directory,name='invalid.dxf'):
+    path = writeSynth(directory,name,stories=1,baysx=1,baysy=1)
+    f = io.open(path,encoding='ascii')
+    text = f.read()
+    f.close()
+    line = u'0\nLINE\n5\nFFFFF\n8\nBeams\n10\n0.0\n20\n0.0\n30\n3.0\n11\n2.5\n21\n0.0\n31\n3.0\n'
+    f = io.open(path,'w',encoding='ascii')
+    f.write(text.replace(u'0\nENDSEC\n0\nSECTION\n2\nOBJECTS\n',line + u'0\nENDSEC\n0\nSECTION\n2\nOBJECTS\n'))
+    f.close()
+    return path
+
+def test_convert_drawing(tmp_path):
+    path = writeSynth(tmp_path,stories=2,baysx=2,baysy=1)
+    opts = dict(OPTS,out=str(tmp_path / 'out'))
+    os.makedirs(opts['out'])
+    row = convertDrawing((path,opts))
+    assert row['status'] == 'ok', row['message']
+    assert row['modelfile'] == os.path.join(opts['out'],'synth.e2k')
+    assert os.path.getsize(row['modelfile']) > 0
+    assert row['stories'] == 3 and row['frames'] > 0 and row['areas'] > 0
+
+def test_validation_error(tmp_path):
+    row = convertDrawing((writeInvalid(tmp_path),OPTS))
+    assert row['status'] == 'error'
+    assert MISSING_SECTION in row['message'] and 'FFFFF' in row['message']
+    assert row['modelfile'] == '' and not os.path.exists(str(tmp_path / 'invalid.e2k'))
+
+def test_convert_directory(tmp_path):
+    writeSynth(tmp_path,'good.dxf',stories=1,baysx=2,baysy=1)
+    writeInvalid(tmp_path,'invalid.dxf')
+    out = tmp_path / 'models'
+    report = str(tmp_path / 'report.csv')
+    assert findDrawings(str(tmp_path)) == [str(tmp_path / 'good.dxf'),str(tmp_path / 'invalid.dxf')]
+    assert main([str(tmp_path),'--program','SAP2000','--out',str(out),'--workers','1','--report',report]) == 2
+    f = open(report)
+    rows = list(csv.DictReader(f))
+    f.close()
+    assert [(os.path.basename(row['drawing']),row['status']) for row in rows] == [('good.dxf','ok'),('invalid.dxf','error')]
+    assert os.listdir(str(out)) == ['good.$2k']
@@ -0,0 +1,78 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the extraction cache [cache.py]: a second import of a drawing reads no element through AutoCAD, a changed
+element is read again, and the least recently used cache files are evicted first
+"""
+
+import os
+import pickle
+
+import numpy as np
+
+from conftest import writeSynth, assertSameModel, FakeDocument
+from cache import ExtractionCache, evict, CACHE_VERSION
+from extract import extractDocument, extractDxf
+
+def _import(doc,drawing,directory):
+    cache = ExtractionCache(drawing,str(directory))
+    model = extractDocument(doc,doc.xrecs,'geomdump.lsp',cache)
+    cache.save()
+    return model, cache
+
+def test_second_import_from_cache(tmp_path):
+    drawing = writeSynth(tmp_path,stories=2,baysx=2,baysy=1)
+    doc = FakeDocument(drawing)
+    first, cache = _import(doc,drawing,tmp_path / 'cache')
+    assert cache.hits == 0 and cache.misses == len(doc.entities)
+    reads = doc.reads
+    assert reads > 0
+    second, cache = _import(doc,drawing,tmp_path / 'cache')
+    assert cache.hits == len(doc.entities) and cache.misses == 0
+    assert doc.reads == reads #no element was read through AutoCAD again
+    assertSameModel(first,second)
+    assertSameModel(second,extractDxf(drawing))
+
+#A moved element or one on another layer changes its content hash, so it's read again
+def test_changed_element(tmp_path):
+    drawing = writeSynth(tmp_path,stories=1,baysx=1,baysy=1)
+    doc = FakeDocument(drawing)
+    _import(doc,drawing,tmp_path / 'cache')
+    doc.entities[0] = doc.entities[0]._replace(coords=tuple(c + 1.0 for c in doc.entities[0].coords))
+    doc.entities[1] = doc.entities[1]._replace(layer='0')
+    model, cache = _import(doc,drawing,tmp_path / 'cache')
+    assert cache.misses == 2 and cache.hits == len(doc.entities) - 2
+    assert model.nframes() + model.nareas() + len(model.pointxyz) == len(doc.entities)
+
+#A deleted element is dropped from the cache when it's saved, a cache of another version or a damaged one is ignored
+def test_deleted_and_stale(tmp_path):
+    drawing = writeSynth(tmp_path,stories=1,baysx=1,baysy=1)
+    doc = FakeDocument(drawing)
+    _import(doc,drawing,tmp_path / 'cache')
+    deleted = doc.entities.pop()
+    model, cache = _import(doc,drawing,tmp_path / 'cache')
+    assert deleted.handle not in ExtractionCache(drawing,str(tmp_path / 'cache')).entries
+    f = open(cache.path,'wb')
+    pickle.dump((CACHE_VERSION + 1,cache.entries),f)
+    f.close()
+    assert ExtractionCache(drawing,str(tmp_path / 'cache')).entries == {}
+    f = open(cache.path,'wb')
+    f.write(b'damaged')
+    f.close()
+    assert ExtractionCache(drawing,str(tmp_path / 'cache')).entries == {}
+
+def test_evict_least_recently_used(tmp_path):
+    paths = []
+    for k, name in enumerate(['a.cache','b.snapshot','c.cache','d.txt']):
+        path = str(tmp_path / name)
+        f = open(path,'wb')
+        f.write(b'x'*100)
+        f.close()
+        os.utime(path,(1000 + k,1000 + k))
+        paths.append(path)
+    assert evict(str(tmp_path),250) == 1 #the oldest cache file
+    assert [os.path.exists(path) for path in paths] == [False,True,True,True]
+    assert evict(str(tmp_path),250) == 0
+    assert evict(str(tmp_path),0) == 2 #other files aren't the cache's
+    assert [os.path.exists(path) for path in paths] == [False,False,False,True]
+    assert evict(str(tmp_path / 'missing')) == 0
@@ -0,0 +1,71 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the database tables [dbtables.py]: the tables of a synthetic building are written to the stand-in of SAP2000
+[sapstub.py] with their keys, fields and rows, their references hold, and the open model's rows are kept or replaced
+2- ETABS's tables aren't written [their keys and fields are other ones]
+3- A triangle's row of Connectivity - Area has 3 joints and no Joint4
+"""
+
+import pytest
+
+from dbtables import emitTables, JOINT_PREFIX
+from joints import modelJoints
+from sapstub import LocalSapModel
+
+FIELDS = {'Joint Coordinates':['Joint','CoordSys','CoordType','XorR','Y','Z'],
+          'Connectivity - Frame':['Frame','JointI','JointJ'],
+          'Connectivity - Area':['Area','NumJoints','Joint1','Joint2','Joint3','Joint4'],
+          'Joint Restraint Assignments':['Joint','U1','U2','U3','R1','R2','R3'],
+          'Frame Section Assignments':['Frame','AnalSect'],
+          'Area Section Assignments':['Area','Section'],
+          'Groups 1 - Definitions':['GroupName'],
+          'Groups 2 - Assignments':['GroupName','ObjectType','ObjectLabel'],
+          'Frame Loads - Distributed':['Frame','LoadPat','CoordSys','Type','Dir','DistType','RelDistA','RelDistB','FOverLA','FOverLB'],
+          'Area Loads - Uniform':['Area','LoadPat','CoordSys','Dir','UnifLoad']}
+
+def test_sap2000_tables(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    sapmodel = LocalSapModel("SAP2000")
+    assert emitTables(model,sapmodel,"SAP2000",'0') == ([],0,0,'')
+    tables = sapmodel.DatabaseTables.tables
+    assert sorted(tables) == sorted(FIELDS)
+    for key, fields in FIELDS.items():
+        assert tables[key][0] == fields, key
+    xyz, frj, arj, restrained, poj = modelJoints(model)
+    nrows = dict((key,len(rows)) for key, (fields, rows) in tables.items())
+    assert nrows['Joint Coordinates'] == len(xyz)
+    assert nrows['Connectivity - Frame'] == nrows['Frame Section Assignments'] == model.nframes()
+    assert nrows['Connectivity - Area'] == nrows['Area Section Assignments'] == model.nareas()
+    assert nrows['Joint Restraint Assignments'] == len(restrained)
+    assert nrows['Frame Loads - Distributed'] == len(model.frameloads)
+    assert nrows['Area Loads - Uniform'] == len(model.arealoads)
+    assert all(row[0].startswith(JOINT_PREFIX) for row in tables['Joint Coordinates'][1])
+    assert all(isinstance(value,str) for fields, rows in tables.values() for row in rows for value in row)
+
+#The rows of the open model are kept, an import again replaces its own rows instead of adding them twice
+def test_merge_with_open_model(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    sapmodel = LocalSapModel("SAP2000")
+    dbtables = sapmodel.DatabaseTables
+    dbtables.tables['Joint Coordinates'] = (['Joint','CoordSys','CoordType','XorR','Y','Z'],[['1','GLOBAL','Cartesian','0','0','-3']])
+    emitTables(model,sapmodel,"SAP2000",'0')
+    first = dict((key,len(rows)) for key, (fields, rows) in dbtables.tables.items())
+    assert dbtables.table('Joint Coordinates')[0]['Joint'] == '1'
+    assert emitTables(model,sapmodel,"SAP2000",'0') == ([],0,0,'')
+    assert dict((key,len(rows)) for key, (fields, rows) in dbtables.tables.items()) == first
+
+def test_etabs_not_written(synthModel):
+    sapmodel = LocalSapModel("ETABS")
+    with pytest.raises(ValueError):
+        emitTables(synthModel(stories=1,baysx=1,baysy=1),sapmodel,"ETABS",'0')
+    assert sapmodel.DatabaseTables.transfers == 0
+
+def test_triangle(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    model.areaxyz = model.areaxyz.copy()
+    model.areaxyz[0,3] = model.areaxyz[0,2]
+    sapmodel = LocalSapModel("SAP2000")
+    assert emitTables(model,sapmodel,"SAP2000",'0') == ([],0,0,'')
+    rows = sapmodel.DatabaseTables.table('Connectivity - Area')
+    assert sorted((row['NumJoints'],row['Joint4'] == '') for row in rows) == [('3',True)] + [('4',False)]*(model.nareas()-1)
@@ -0,0 +1,66 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the import of changes only [delta.py]: the added, deleted and modified elements sent to a model of the last
+import make the same model as importing the drawing again, and the open model's stories are checked first
+"""
+
+from delta import stateFromModel, emitDelta, diffState, elementSignatures, missingStories
+from emit import emitObjects
+from model import NORESTRAINT
+from sapstub import RecordingSapModel
+from stories import assignStories, defineStories
+
+#A utility function that returns the elements of a recorded model by their names, with the coordinates of their joints
+def _elements(sap):
+    frames = dict((name,[sap.points[p] for p in frame[:2]] + frame[2:]) for name, frame in sap.frames.items())
+    areas = dict((name,[[sap.points[p] for p in area[0]]] + area[1:]) for name, area in sap.areas.items())
+    restraints = dict((sap.points[p],dofs) for p, dofs in sap.restraints.items())
+    return frames, areas, restraints, sap.frameloads, sap.arealoads, sap.piers, sap.spandrels
+
+def test_changes_only(synthModel):
+    last = synthModel(stories=2,baysx=2,baysy=1)
+    last.keepElements([True]*last.nframes(),[True]*(last.nareas()-1))
+    sap = RecordingSapModel('ETABS')
+    emitObjects(last,sap,'ETABS','0','Columns')
+    state = stateFromModel(last,'ETABS','0')
+
+    drawing = synthModel(stories=2,baysx=2,baysy=1) #the last 3dface is added
+    drawing.keepElements([True]*(drawing.nframes()-1),[True]*drawing.nareas()) #the last line is deleted
+    drawing.framesec[0] = drawing.framesec[-1] #another section
+    drawing.pointrestraint[0] = NORESTRAINT #the support is deleted
+    assert drawing.framesec[0] != last.framesec[0]
+    newstate, counts = emitDelta(drawing,sap,'ETABS','0',state)
+    assert counts == {'frame':(0,1,1),'area':(1,0,0),'point':(0,1,0)}
+    assert newstate == stateFromModel(drawing,'ETABS','0')
+
+    again = RecordingSapModel('ETABS')
+    emitObjects(drawing,again,'ETABS','0','Columns')
+    assert _elements(sap) == _elements(again)
+    assert len(sap.frames) == drawing.nframes() and len(sap.areas) == drawing.nareas()
+
+    #nothing is sent again for an unchanged drawing
+    ncalls = len(sap.calls)
+    newstate, counts = emitDelta(drawing,sap,'ETABS','0',newstate)
+    assert counts == dict((kind,(0,0,0)) for kind in ['frame','area','point'])
+    assert all(path.startswith('GroupDef.') or path.startswith('PointObj.GetNameList') for path, args, ret in sap.calls[ncalls:])
+
+def test_diff_by_handle(synthModel):
+    model = synthModel(stories=1,baysx=1,baysy=1)
+    state = stateFromModel(model,'SAP2000','0')
+    model.framexyz[1,2] += 0.5
+    diff = diffState(state,elementSignatures(model,'SAP2000','0'))
+    assert diff['frame'] == ([],[],[model.framehandles[1]])
+    assert diff['area'] == ([],[],[]) and diff['point'] == ([],[],[])
+
+#Changes are only sent if every level of the drawing is a story of the open model
+def test_missing_stories(synthModel):
+    model = assignStories(synthModel(stories=3,baysx=1,baysy=1))
+    sap = RecordingSapModel('ETABS')
+    assert missingStories(model,sap) == model.levels.tolist() #a model without stories
+    defineStories(model,sap)
+    assert missingStories(model,sap) == []
+    sap.stories = sap.stories[:-1]
+    assert missingStories(model,sap) == [model.levels[-1]]
+    sap.stories = [(name,z + 0.01) for name, z in sap.stories] + [('Story9',model.levels[-1] + 0.5)]
+    assert missingStories(model,sap) == [model.levels[-1]]
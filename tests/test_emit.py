@@ -0,0 +1,46 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the grouped assignments [emit.py AssignmentPlan]: the model is the same as the one of assigning every element
+by itself, and the temporary groups don't take the names of the model's groups
+2- A triangle [a 3dface with a repeated corner] is drawn by its 3 joints
+"""
+
+import pytest
+
+from emit import emitObjects, ASSIGN_GROUP
+from sapstub import RecordingSapModel
+
+@pytest.mark.parametrize('program',['ETABS','SAP2000'])
+def test_grouped_same_as_one_by_one(synthModel,program):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    single = RecordingSapModel(program)
+    emitObjects(model,single,program,'0','Columns',grouped=False)
+    grouped = RecordingSapModel(program)
+    emitObjects(model,grouped,program,'0','Columns')
+    assert grouped.dump() == single.dump()
+
+#The groups of the user are neither given members nor deleted
+def test_temporary_groups_skip_model_groups(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    single = RecordingSapModel('ETABS')
+    emitObjects(model,single,'ETABS','0','Columns',grouped=False)
+    grouped = RecordingSapModel('ETABS')
+    for k in (1,2):
+        grouped.GroupDef.SetGroup(ASSIGN_GROUP % k)
+    emitObjects(model,grouped,'ETABS','0','Columns')
+    for k in (1,2):
+        assert grouped.groups.pop(ASSIGN_GROUP % k) == set()
+    assert grouped.dump() == single.dump()
+
+@pytest.mark.parametrize('program',['ETABS','SAP2000'])
+def test_triangle(synthModel,program):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    model.areaxyz = model.areaxyz.copy()
+    model.areaxyz[0,3] = model.areaxyz[0,2]
+    sap = RecordingSapModel(program)
+    emitObjects(model,sap,program,'0','Columns')
+    corners = sorted(len(area[0]) for area in sap.areas.values())
+    assert corners == [3] + [4]*(model.nareas()-1)
+    triangle = [area[0] for area in sap.areas.values() if len(area[0]) == 3][0]
+    assert [sap.points[p] for p in triangle] == [tuple(xyz) for xyz in model.areaxyz[0,:3].tolist()]
@@ -0,0 +1,103 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the geometry check [geomqa.py]: every kind of defect put in a synthetic building is found, and fixed by
+fixGeometry [non-planar 3dfaces are only reported]
+2- A triangle [a 3dface with a repeated corner] isn't a defect, but a triangle drawn twice is
+"""
+
+import numpy as np
+
+from geomqa import checkGeometry, fixGeometry, SNAP_TOL, WARNINGS, NONPLANAR_FACE
+
+#A utility function that appends a copy of a line or 3dface [kind is 'frame' or 'area'] to the model, returns its index
+def copyElement(model,kind,e):
+    n = len(getattr(model,kind + 'sec'))
+    model.takeElements(kind,np.append(np.arange(n),e))
+    setattr(model,kind + 'xyz',getattr(model,kind + 'xyz').copy())
+    return n
+
+def test_synthetic_building_has_no_defects(synthModel):
+    defects = checkGeometry(synthModel(stories=2,baysx=2,baysy=1))
+    assert defects.count() == 0 and defects.issues() == []
+
+def test_zero_length(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    nframes = model.nframes()
+    e = copyElement(model,'frame',0)
+    model.framexyz[e,3:] = model.framexyz[e,:3]
+    defects = checkGeometry(model)
+    assert list(defects.zerolength) == [e] and defects.fixable() == defects.count() == 1
+    assert fixGeometry(model) == (0,1)
+    assert model.nframes() == nframes
+
+#A line drawn twice, the 2nd time from its end to its start
+def test_duplicate_line(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    nframes = model.nframes()
+    e = copyElement(model,'frame',0)
+    model.framexyz[e] = np.concatenate([model.framexyz[e,3:],model.framexyz[e,:3]])
+    defects = checkGeometry(model)
+    assert list(defects.duplines) == [e] and list(defects.duplineof) == [0] and defects.count() == 1
+    assert fixGeometry(model) == (0,1)
+    assert model.nframes() == nframes
+
+def test_degenerate_face(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    nareas = model.nareas()
+    e = copyElement(model,'area',0)
+    model.areaxyz[e,2] = model.areaxyz[e,1]
+    model.areaxyz[e,3] = model.areaxyz[e,0]
+    defects = checkGeometry(model)
+    assert list(defects.degenerate) == [e] and defects.count() == 1
+    assert fixGeometry(model) == (0,1)
+    assert model.nareas() == nareas
+
+#A 3dface drawn twice, the 2nd time from another vertex
+def test_duplicate_face(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    nareas = model.nareas()
+    e = copyElement(model,'area',0)
+    model.areaxyz[e] = np.roll(model.areaxyz[e],1,axis=0)
+    defects = checkGeometry(model)
+    assert list(defects.dupfaces) == [e] and list(defects.dupfaceof) == [0] and defects.count() == 1
+    assert fixGeometry(model) == (0,1)
+    assert model.nareas() == nareas
+
+#A non-planar 3dface is reported as a warning, it isn't fixed nor removed
+def test_nonplanar_face(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    model.areaxyz = model.areaxyz.copy()
+    model.areaxyz[0,2,2] += 0.1
+    defects = checkGeometry(model)
+    assert list(defects.nonplanar) == [0] and np.isclose(defects.offplane[0],0.025,atol=1e-4)
+    assert defects.count() == 1 and defects.fixable() == 0
+    assert [issue.kind for issue in defects.issues()] == [NONPLANAR_FACE] and NONPLANAR_FACE in WARNINGS
+    xyz = model.areaxyz.copy()
+    assert fixGeometry(model) == (0,0)
+    assert np.array_equal(model.areaxyz,xyz)
+
+#A cantilever whose end misses the end of another line by 2 cm is snapped to it
+def test_near_miss(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    target = model.framexyz[0,3:].copy()
+    e = copyElement(model,'frame',0)
+    model.framexyz[e] = np.concatenate([target + [1.3,1.7,-1.1],target + [0.02,0,0]])
+    defects = checkGeometry(model)
+    assert list(defects.nearmiss) == [e] and list(defects.nearend) == [1] and defects.count() == 1
+    assert np.allclose(defects.neardist,0.02) and defects.neardist[0] <= SNAP_TOL
+    assert np.allclose(defects.xyz[defects.neartarget[0]],target)
+    assert fixGeometry(model) == (1,0)
+    assert np.allclose(model.framexyz[e,3:],target)
+    assert checkGeometry(model).count() == 0
+
+#The 1st 3dface cut to the triangle of its first 3 corners, and a copy of it with another corner repeated
+def test_triangles(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    model.areaxyz = model.areaxyz.copy()
+    model.areaxyz[0,3] = model.areaxyz[0,2]
+    assert checkGeometry(model).count() == 0
+    e = copyElement(model,'area',0)
+    model.areaxyz[e] = model.areaxyz[e][[1,1,2,0]]
+    defects = checkGeometry(model)
+    assert list(defects.dupfaces) == [e] and list(defects.dupfaceof) == [0] and defects.count() == 1
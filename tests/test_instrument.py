@@ -0,0 +1,64 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the profiler [instrument.py]: the calls of a wrapped SapModel are counted by their paths, nested stages are
+kept with their depths, and nothing is kept while no profile is started
+"""
+
+import json
+
+from instrument import startProfile, stopProfile, current, stage, counted, NullProfiler
+from emit import emitObjects
+from sapstub import RecordingSapModel
+
+def test_call_counting(synthModel):
+    model = synthModel(stories=1,baysx=1,baysy=1)
+    prof = startProfile('calls')
+    try:
+        sap = RecordingSapModel('SAP2000')
+        with stage('objects'):
+            emitObjects(model,current().wrap(sap,'SapModel'),'SAP2000','0')
+    finally:
+        stopProfile()
+    report = prof.report()
+    counts = dict((path,c['count']) for path, c in report['calls'].items())
+    assert counts == dict(('SapModel.' + path,n) for path, n in sap.counts.items())
+    assert counts['SapModel.FrameObj.AddByPoint'] == model.nframes()
+    assert [s['name'] for s in report['stages'] if s['depth'] == 0] == ['objects']
+    assert 'joints' in [s['name'] for s in report['stages'] if s['depth'] == 1]
+
+#Values read through a wrapped object are counted as they're read, methods when they're called
+def test_properties_and_methods():
+    class Doc(object):
+        Name = 'drawing.dwg'
+        def Regen(self,which):
+            return which
+    prof = startProfile()
+    doc = current().wrap(Doc(),'AutoCAD')
+    assert doc.Name == 'drawing.dwg'
+    method = doc.Regen
+    assert prof.calls == {'AutoCAD.Name':[1,prof.calls['AutoCAD.Name'][1]]}
+    assert method(1) == 1 and doc.Regen(0) == 0
+    stopProfile()
+    assert prof.calls['AutoCAD.Regen'][0] == 2
+
+def test_counted_and_null_profile(tmp_path):
+    @counted('Excel.macro')
+    def macro(x):
+        return 2*x
+    assert macro(1) == 2 #no profile
+    assert isinstance(current(),NullProfiler)
+    prof = startProfile('macros')
+    assert macro(2) == 4 and macro(3) == 6
+    with stage('outer'):
+        with stage('inner','layer'):
+            pass
+    assert stopProfile() is prof and prof.total is not None
+    assert prof.calls['Excel.macro'][0] == 2
+    assert [(name,cat,depth) for name, cat, start, seconds, depth in prof.spans] == [('inner','layer',1),('outer','stage',0)]
+    report, trace = prof.save(str(tmp_path))
+    f = open(trace)
+    events = json.load(f)['traceEvents']
+    f.close()
+    assert sorted(e['name'] for e in events) == ['inner','outer']
+    assert 'Excel.macro' in prof.summary()
@@ -0,0 +1,55 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the split of lines [intersect.py splitFrames]: a beam crossed by columns is split at them, its segments are
+numbered after its handle and its distributed loads are interpolated over them [trapezoidal loads stay continuous]
+"""
+
+import numpy as np
+
+from model import ImportModel, Columns
+from intersect import splitFrames
+
+#A beam along x [0 to 10] with 2 trapezoidal loads, crossed by columns at x = 2.5 and 6
+def beamAndColumns():
+    model = ImportModel()
+    model.framexyz = np.array([[0,0,3,10,0,3],[2.5,0,0,2.5,0,6],[6,0,0,6,0,6]],dtype=float)
+    model.framesec = np.array([0,1,1],dtype=np.intc)
+    model.framelayer = np.array([0,1,1],dtype=np.intc)
+    model.framehandles = ['B1','C1','C2']
+    model.frameloads = Columns(elem=np.array([0,0],dtype=np.intc),pattern=np.array([0,1],dtype=np.intc),
+                               direction=np.array([6,6],dtype=np.int8),start=np.array([2.0,5.0]),end=np.array([12.0,1.0]))
+    model.areaxyz = np.zeros((0,4,3))
+    model.areasec = np.zeros(0,dtype=np.intc)
+    return model
+
+def test_split_loads_interpolated():
+    model = beamAndColumns()
+    assert splitFrames(model) == (3,7)
+    beam = [e for e, handle in enumerate(model.framehandles) if handle.startswith('B1')]
+    assert [model.framehandles[e] for e in beam] == ['B1:1','B1:2','B1:3']
+    assert np.allclose(model.framexyz[beam][:,[0,3]],[[0,2.5],[2.5,6],[6,10]])
+
+    t0 = np.array([0,0.25,0.6])
+    t1 = np.array([0.25,0.6,1])
+    loads = model.frameloads
+    for pattern, start, end in [(0,2.0,12.0),(1,5.0,1.0)]:
+        rows = np.nonzero(loads.pattern == pattern)[0]
+        assert list(loads.elem[rows]) == beam
+        assert np.allclose(loads.start[rows],start + (end - start)*t0)
+        assert np.allclose(loads.end[rows],start + (end - start)*t1)
+        assert np.allclose(loads.start[rows][1:],loads.end[rows][:-1]) #continuous at the columns
+    assert list(loads.direction) == [6]*6
+
+#The columns are split at the beam, without loads
+def test_split_columns():
+    model = beamAndColumns()
+    splitFrames(model)
+    assert [handle for handle in model.framehandles if handle[0] == 'C'] == ['C1:1','C1:2','C2:1','C2:2']
+    assert list(model.framesec) == [0,0,0,1,1,1,1]
+
+def test_nothing_to_split():
+    model = beamAndColumns()
+    model.framexyz[1:,0] = [20,30]
+    assert splitFrames(model) == (0,0)
+    assert model.framehandles == ['B1','C1','C2'] and len(model.frameloads) == 2
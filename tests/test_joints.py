@@ -0,0 +1,82 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the merge of points into joints [joints.py]: points within the tolerance are merged even when they're at 2 sides
+of a cell's boundary, and points farther apart aren't
+2- Tests of the distinct joints of 3dfaces: a triangle's repeated corner is moved last
+"""
+
+import numpy as np
+
+from joints import mergePoints, modelJoints, faceJoints, JOINT_TOL
+
+#Points at both sides of the boundaries of the grid's cells [0 and 3*tol] in every direction
+def test_merge_across_cell_boundaries():
+    tol = JOINT_TOL
+    base = np.array([0.0,3*tol,-5*tol])
+    for axis in range(0,3):
+        for boundary in (0.0,3*tol):
+            a = base.copy()
+            b = base.copy()
+            a[axis] = boundary - 0.3*tol
+            b[axis] = boundary + 0.3*tol
+            xyz, joint = mergePoints(np.array([a,b]),tol)
+            assert np.floor(a[axis]/tol) != np.floor(b[axis]/tol) #they're at 2 cells
+            assert len(xyz) == 1
+            assert joint.tolist() == [0,0]
+
+def test_merge_across_cell_corner():
+    tol = JOINT_TOL
+    a = np.array([-0.2,-0.2,-0.2])*tol
+    b = np.array([0.2,0.2,0.2])*tol
+    xyz, joint = mergePoints(np.array([a,b,a]),tol)
+    assert len(xyz) == 1
+    assert joint.tolist() == [0,0,0]
+
+def test_points_beyond_tolerance_stay_apart():
+    tol = JOINT_TOL
+    pts = np.array([[0.0,0.0,0.0],[1.5*tol,0.0,0.0],[0.0,0.0,0.0],[0.0,1.1*tol,0.0]])
+    xyz, joint = mergePoints(pts,tol)
+    assert len(xyz) == 3
+    assert joint[0] == joint[2]
+    assert len(set(joint.tolist())) == 3
+    assert np.allclose(xyz[joint],pts)
+
+#Every joint keeps the coordinates of one of its points
+def test_joint_keeps_a_point():
+    tol = JOINT_TOL
+    pts = np.array([[1.0,2.0,3.0],[1.0 + 0.4*tol,2.0,3.0 - 0.4*tol]])
+    xyz, joint = mergePoints(pts,tol)
+    assert len(xyz) == 1
+    assert any(np.array_equal(xyz[0],p) for p in pts)
+
+def test_empty():
+    xyz, joint = mergePoints(np.zeros((0,3)))
+    assert xyz.shape == (0,3)
+    assert len(joint) == 0
+
+#The joints of a synthetic building: the grid of columns at every level, with the supports at the base
+def test_model_joints(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    xyz, frj, arj, restrained, poj = modelJoints(model)
+    assert len(xyz) == 3*2*3
+    assert len(restrained) == 3*2
+    assert np.allclose(xyz[poj],model.pointxyz[restrained])
+    assert np.allclose(xyz[frj].reshape(-1,6),model.framexyz)
+    assert np.allclose(xyz[arj],model.areaxyz)
+
+#A triangle is drawn with any 2 of its corners at one point, a line of 3 points has 2 distinct joints
+def test_face_joints():
+    fj, nj = faceJoints(np.array([[0,1,2,3],[0,1,2,2],[0,0,1,2],[0,1,0,2],[5,5,5,6]]))
+    assert nj.tolist() == [4,3,3,3,2]
+    assert fj[:,:3].tolist() == [[0,1,2],[0,1,2],[0,1,2],[0,1,2],[5,6,5]]
+
+#2 corners of a quad nearer than the tolerance are merged to one joint, it's a triangle
+def test_quad_merged_to_triangle(synthModel):
+    model = synthModel(stories=1,baysx=1,baysy=1)
+    model.areaxyz = model.areaxyz.copy()
+    model.areaxyz[0,3] = model.areaxyz[0,0] + 0.4*JOINT_TOL
+    xyz, frj, arj, restrained, poj = modelJoints(model)
+    fj, nj = faceJoints(arj)
+    assert nj[0] == 3 and (nj[1:] == 4).all()
+    assert fj[0,:3].tolist() == arj[0,:3].tolist()
@@ -0,0 +1,60 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the walls' panels [panelize.py]: the stiff lines of a synthetic building are divided into panels like draw-shw,
+and the loads of every row of panels are the ones of in-draw-shw [insert_struct_prop.lsp]
+2- The stiff lines of a dumped geometry are found before a pipelined import [pipeline.py hasStiffLines]
+"""
+
+import numpy as np
+
+from model import WALL
+from panelize import panelizeWalls
+from pipeline import hasStiffLines
+from synth import WALL_MESH
+
+#The load of the k-th element of a column of n elements, as in-draw-shw computes it
+def drawShwLoad(sload,eload,k,n):
+    dload = (eload - sload)/n
+    return 0.5*(dload*(1 + 2*k) + 2*sload)
+
+def test_panels(synthModel):
+    model = synthModel(stories=2,baysx=1,baysy=1,stifflines=True)
+    nareas = model.nareas()
+    assert panelizeWalls(model) == (4,4*7*4) #every 5 m wall: 7 columns of about 0.75 m, 4 rows of 0.75 m
+    assert model.nwalls() == 0
+    panels = np.arange(nareas,model.nareas())
+    assert np.all(model.areatype[panels] == WALL)
+    xyz = model.areaxyz[panels]
+    assert np.allclose(xyz[:,:,2].max(axis=1) - xyz[:,:,2].min(axis=1),WALL_MESH)
+    assert np.allclose(np.abs(xyz[:,2,1] - xyz[:,0,1]),5.0/7)
+
+def test_panel_row_loads(synthModel):
+    model = synthModel(stories=2,baysx=1,baysy=1,stifflines=True)
+    walls = model.wallloads
+    sload, eload = walls.start[0], walls.end[0]
+    tops = model.wallxyz[:,2]
+    nareas = model.nareas()
+    panelizeWalls(model)
+    loads = model.arealoads
+    rows = np.nonzero(loads.elem >= nareas)[0]
+    assert len(rows) == 4*7*4 #a load for every panel
+    for j in rows.tolist():
+        face = model.areaxyz[loads.elem[j]]
+        top = face[:,2].max()
+        below = tops - top
+        k = int(round(below[below > -1e-9].min()/WALL_MESH)) #the panel's row from its wall's top [the nearest one above]
+        assert np.isclose(loads.value[j],drawShwLoad(sload,eload,k,4))
+        assert loads.pattern[j] == walls.pattern[0] and loads.direction[j] == walls.direction[0]
+
+#Rows of the dump of geomdump.lsp: a stiff line, a beam, a wall's 3dface and a point
+def test_stiff_lines_of_dump():
+    geo = np.zeros((4,13))
+    geo[:,0] = [1,1,2,3]
+    signatures = ['','','','']
+    dump = (['A1','A2','A3','A4'],[1,1,1,0],['Walls','Beams','Walls','Supports'],signatures,geo)
+    signatures[1] = ';SecProp("B250X600");DistLoads;Live(0.5 1.5 6 "Live")'
+    signatures[2] = ';PierID("P1");WallProp("W250")'
+    assert not hasStiffLines(dump)
+    signatures[0] = ';PierID("P1");SpandralID("SP1");WallMesh(3.0 0.75);WallProp("W250")'
+    assert hasStiffLines(dump)
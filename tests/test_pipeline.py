@@ -0,0 +1,101 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the pipeline [pipeline.py]: an error of the producer or of the consumer stops both workers and is raised again
+2- Tests of the pipelined import of a fake document to a recorded model: it draws the same model as the API objects, and a
+drawing with problems or with walls' stiff lines is stopped before any element is drawn
+"""
+
+import pytest
+
+from conftest import writeSynth, assertSameModel, FakeDocument
+from emit import emitObjects
+from extract import extractDxf
+from pipeline import Pipeline, PipelineError, geometryModel, streamImport
+from sapstub import RecordingSapModel
+from validate import MISSING_SECTION
+
+def test_pipeline_order():
+    def produce(put):
+        for k in range(0,100):
+            put(k)
+    got = []
+    pipeline = Pipeline(4).run(produce,lambda items: got.extend(items))
+    assert got == list(range(0,100)) and pipeline.produced == pipeline.consumed == 100
+
+def test_producer_error():
+    def produce(put):
+        for k in range(0,10):
+            put(k)
+        raise ValueError("producer")
+    got = []
+    with pytest.raises(ValueError):
+        Pipeline(4).run(produce,lambda items: got.extend(items))
+    assert got == list(range(0,len(got))) and len(got) <= 10
+
+#The producer waiting for room in the full queue is stopped by the consumer's error
+def test_consumer_error():
+    pipeline = Pipeline(2)
+    def produce(put):
+        for k in range(0,1000):
+            put(k)
+    def consume(items):
+        for item in items:
+            if item == 3:
+                raise RuntimeError("consumer")
+    with pytest.raises(RuntimeError):
+        pipeline.run(produce,consume)
+    assert pipeline.consumed == 4 and pipeline.produced < 1000
+    assert [worker for worker, err, tb in pipeline.errors] == ['consumer']
+
+#A utility function that returns the elements of a recorded model by the coordinates of their joints
+def _elements(sap):
+    frames = dict((name,[sap.points[p] for p in frame[:2]] + frame[2:]) for name, frame in sap.frames.items())
+    areas = dict((name,[[sap.points[p] for p in area[0]]] + area[1:]) for name, area in sap.areas.items())
+    restraints = dict((sap.points[p],dofs) for p, dofs in sap.restraints.items())
+    return frames, areas, restraints, sap.frameloads, sap.arealoads, sap.piers, sap.spandrels
+
+def _stream(doc,sap,program='ETABS',**kw):
+    geom, dump = geometryModel(doc,doc.xrecs,'geomdump.lsp')
+    return streamImport(geom,dump,doc.xrecs,program,'0',lambda: doc,lambda: sap,'Columns',**kw)
+
+@pytest.mark.parametrize('program',['ETABS','SAP2000'])
+def test_stream_import(tmp_path,program):
+    drawing = writeSynth(tmp_path,stories=2,baysx=2,baysy=1)
+    sap = RecordingSapModel(program)
+    model, pipeline = _stream(FakeDocument(drawing),sap,program,maxsize=2,batchsize=5)
+    whole = extractDxf(drawing)
+    assertSameModel(model,whole)
+    assert pipeline.consumed == -(-(whole.nframes() + whole.nareas() + whole.npoints())//5)
+    again = RecordingSapModel(program)
+    emitObjects(whole,again,program,'0','Columns')
+    assert _elements(sap) == _elements(again)
+
+#Lines without their section property are found before any element is drawn
+def test_invalid_drawing(tmp_path):
+    doc = FakeDocument(writeSynth(tmp_path,stories=2,baysx=2,baysy=1))
+    missing = [ent.handle for ent in doc.entities if ent.type == 'LINE'][-1] #drawn last
+    doc.xdicts.pop(missing)
+    sap = RecordingSapModel('ETABS')
+    with pytest.raises(PipelineError) as err:
+        _stream(doc,sap,batchsize=5)
+    assert [(issue.kind,issue.handle) for issue in err.value.issues] == [(MISSING_SECTION,missing)]
+    assert sap.frames == {} and sap.areas == {}
+
+def test_stiff_lines(tmp_path):
+    doc = FakeDocument(writeSynth(tmp_path,stories=1,baysx=1,baysy=1,stifflines=True))
+    sap = RecordingSapModel('ETABS')
+    with pytest.raises(PipelineError):
+        _stream(doc,sap)
+    assert sap.counts == {} and doc.reads == 0
+
+#An error of ETABS/SAP2000 while drawing stops the reading of the document
+def test_consumer_error_stops_reading(tmp_path):
+    doc = FakeDocument(writeSynth(tmp_path,stories=2,baysx=2,baysy=1))
+    sap = RecordingSapModel('ETABS')
+    def fail(*args):
+        raise RuntimeError("ETABS stopped")
+    sap._PointObj_AddCartesian = fail
+    with pytest.raises(RuntimeError):
+        _stream(doc,sap)
+    assert sap.frames == {}
@@ -0,0 +1,73 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the stand-ins of SapModel [sapstub.py]: the latency models' cost of every call and its added up accounting,
+the calls' counts, and the model the recorded calls build
+"""
+
+import time
+
+import pytest
+
+from sapstub import LatencyModel, LATENCIES, RecordingSapModel, LocalSapModel
+
+def test_latency_cost():
+    latency = LatencyModel(1e-3,1e-6,{'PointObj.AddCartesian':5e-3,'ApplyEditedTables':0.5})
+    assert latency.cost('FrameObj.Delete',("B1",0)) == pytest.approx(1e-3)
+    assert latency.cost('PointObj.AddCartesian',(0.0,0.0,0.0)) == pytest.approx(5e-3) #by path
+    assert latency.cost('DatabaseTables.ApplyEditedTables',(True,)) == pytest.approx(0.5) #by method
+    #every value of the array arguments
+    assert latency.cost('AreaObj.AddByCoord',(4,[0.0]*4,[0.0]*4,[0.0]*4,"")) == pytest.approx(1e-3 + 12e-6)
+    assert LATENCIES['none'].cost('AreaObj.AddByCoord',(4,[0.0]*4,[0.0]*4,[0.0]*4,"")) == 0.0
+
+#The simulated latency is the sum of the cost of every call, the counts are kept by path
+@pytest.mark.parametrize('record',[True,False])
+def test_accounting(record):
+    sap = RecordingSapModel('SAP2000',latency='com',record=record)
+    for k in range(0,10):
+        sap.PointObj.AddCartesian(float(k),0.0,0.0)
+    sap.FrameObj.AddByCoord(0.0,0.0,0.0,1.0,0.0,0.0,"","Default","B1")
+    sap.View.RefreshView(0,True)
+    latency = LATENCIES['com']
+    assert sap.simulated == pytest.approx(11*latency.percall + 0.2)
+    assert sap.counts == {'PointObj.AddCartesian':10,'FrameObj.AddByCoord':1,'View.RefreshView':1}
+    assert len(sap.calls) == (12 if record else 0)
+    assert sap.report().splitlines()[0] == "12 calls, %.3f s of simulated latency" % sap.simulated
+    assert sap.report().splitlines()[1].split() == ['PointObj.AddCartesian','10']
+
+def test_sleep():
+    sap = RecordingSapModel('ETABS',latency=LatencyModel(0.02),sleep=True)
+    start = time.time()
+    sap.GroupDef.SetGroup("G")
+    sap.GroupDef.SetGroup("H")
+    assert time.time() - start >= 0.04
+    assert sap.simulated == pytest.approx(0.04)
+
+#Points within the merge tolerance are one joint, the calls return like comtypes [ByRef arguments then the return code]
+def test_recorded_model():
+    sap = RecordingSapModel('SAP2000')
+    assert sap.FrameObj.AddByCoord(0.0,0.0,0.0,5.0,0.0,0.0,"","B250X600","B1") == ["B1",0]
+    assert sap.FrameObj.AddByCoord(5.0,0.0,0.0005,5.0,0.0,3.0,"","C500X500","C1") == ["C1",0]
+    assert len(sap.points) == 3
+    assert sap.FrameObj.Delete("B9",0) == 1
+    assert sap.FrameObj.SetGroupAssign("B1","G",False,0) == 1 #the group isn't defined
+    sap.GroupDef.SetGroup("G")
+    assert sap.FrameObj.SetGroupAssign("B1","G",False,0) == 0
+    assert sap.FrameObj.SetLoadDistributed("G","Dead",1,6,0,1,-10,-10,"Global",True,True,1) == 0
+    assert sap.dump()['frameloads'] == {'B1':[['Dead',1,6,0,1,-10,-10,'Global',True]]}
+    assert sap.FrameObj.Delete("B1",0) == 0
+    assert sap.frames.keys() == {'C1'} and sap.frameloads == {} and sap.groups == {'G':set()}
+    sap.File.NewBlank()
+    assert sap.points == {} and sap.counts['FrameObj.AddByCoord'] == 2
+
+#The applied tables are checked for references to joints, frames and areas that don't exist
+def test_tables_check():
+    tables = LocalSapModel().DatabaseTables
+    ret = tables.SetTableForEditingArray('Joint Coordinates',0,['Joint','XorR'],2,['1','0','2','5'])
+    assert ret[-1] == 0
+    ret = tables.SetTableForEditingArray('Connectivity - Frame',0,['Frame','JointI','JointJ'],1,['B1','1','3'])
+    assert ret[-1] == 0
+    assert tables.SetTableForEditingArray('Connectivity - Frame',0,['Frame'],2,['B1'])[-1] == 1 #too few values
+    nfatal, nerror, nwarn, ninfo, log, ret = tables.ApplyEditedTables(True)
+    assert nerror == 1 and 'JointJ "3"' in log
+    assert tables.transfers == 3 and tables.cells == 7
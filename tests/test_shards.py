@@ -0,0 +1,43 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the sharded reading of .dxf files [dxfreader.py, extract.py]: the shards cover the ENTITIES section at the
+entities' boundaries, and their merged models are the same as the model of one pass
+"""
+
+import pytest
+
+from conftest import writeSynth, assertSameModel
+from dxfreader import DxfDrawing
+from extract import extractDxf, _buildEntities
+from model import mergeModels
+
+@pytest.fixture
+def drawing(tmp_path):
+    return DxfDrawing(writeSynth(tmp_path,stories=3,baysx=3,baysy=2,stifflines=True))
+
+#The shards follow each other without gaps, from the start to the end of the ENTITIES section
+@pytest.mark.parametrize('n',[2,3,7,50])
+def test_shards_cover_entities(drawing,n):
+    shards = drawing.shards(n,1)
+    assert 1 < len(shards) <= n
+    assert shards[0][0] == drawing.entityrange[0]
+    assert shards[-1][1] == drawing.entityrange[1]
+    for (s1, e1), (s2, e2) in zip(shards[:-1],shards[1:]):
+        assert e1 == s2
+        assert s1 < e1
+
+@pytest.mark.parametrize('n',[2,3,7,50,1000])
+def test_shards_same_as_one_pass(drawing,n):
+    whole = extractDxf(drawing)
+    models = [_buildEntities(drawing,drawing.entities(None,start,end),{}) for start, end in drawing.shards(n,1)]
+    assert sum(m.nframes() + m.nareas() + m.npoints() + m.nwalls() for m in models) == \
+        whole.nframes() + whole.nareas() + whole.npoints() + whole.nwalls()
+    assertSameModel(mergeModels(models,drawing.dictionaries()),whole)
+
+#The shards read by a pool of processes
+def test_processes_same_as_one_pass(drawing,monkeypatch):
+    whole = extractDxf(drawing)
+    shards = DxfDrawing.shards
+    monkeypatch.setattr(DxfDrawing,'shards',lambda self, n, minbytes=1: shards(self,n,1))
+    assertSameModel(extractDxf(drawing,2),whole)
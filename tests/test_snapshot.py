@@ -0,0 +1,78 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the snapshots [snapshot.py]: a snapshot opens to the same import model it was written from, and a snapshot of
+another state of the drawing, of another version, cut short or missing is ignored
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from conftest import writeSynth, assertSameModel
+from extract import extractDxf
+from snapshot import saveSnapshot, loadSnapshot, snapshotPath, drawingStamp, SNAPSHOT_MAGIC
+
+@pytest.fixture
+def saved(tmp_path):
+    drawing = writeSynth(tmp_path,stories=2,baysx=2,baysy=1,stifflines=True)
+    model = extractDxf(drawing)
+    model.wallmesh[0] = np.nan #a stiff line without its WallMesh
+    path = saveSnapshot(model,snapshotPath(drawing,str(tmp_path)),drawingStamp(drawing))
+    return drawing, model, path
+
+def test_round_trip(saved):
+    drawing, model, path = saved
+    loaded = loadSnapshot(path,drawingStamp(drawing))
+    assertSameModel(loaded,model)
+    assert loaded.nwalls() == model.nwalls() > 0
+
+def test_round_trip_without_loads(tmp_path):
+    drawing = writeSynth(tmp_path,stories=1,baysx=1,baysy=1,walls=False,loads=False)
+    model = extractDxf(drawing)
+    assertSameModel(loadSnapshot(saveSnapshot(model,str(tmp_path / 'empty.snapshot'),[1,2.0]),[1,2.0]),model)
+
+#The columns are over the file's mapping, changing them doesn't change the file
+def test_copy_on_write(saved):
+    drawing, model, path = saved
+    loaded = loadSnapshot(path)
+    loaded.framexyz[0] = -1
+    assertSameModel(loadSnapshot(path),model)
+
+def test_stale_snapshot(saved):
+    drawing, model, path = saved
+    size, mtime = drawingStamp(drawing)
+    assert loadSnapshot(path,[size,mtime + 1]) is None
+    assert loadSnapshot(path,[size + 1,mtime]) is None
+    os.utime(drawing,(mtime + 10,mtime + 10))
+    assert loadSnapshot(path,drawingStamp(drawing)) is None
+
+def test_other_version(saved):
+    drawing, model, path = saved
+    data = open(path,'rb').read()
+    size = struct.unpack('<Q',data[len(SNAPSHOT_MAGIC):len(SNAPSHOT_MAGIC)+8])[0]
+    start = len(SNAPSHOT_MAGIC) + 8
+    header = json.loads(data[start:start+size].decode('utf-8'))
+    header['version'] += 1
+    text = json.dumps(header).encode('utf-8').ljust(size)
+    assert len(text) == size
+    open(path,'wb').write(data[:start] + text + data[start+size:])
+    assert loadSnapshot(path,drawingStamp(drawing)) is None
+
+@pytest.mark.parametrize('keep',[0,4,len(SNAPSHOT_MAGIC) + 8,100,-64])
+def test_cut_short(saved,keep):
+    drawing, model, path = saved
+    data = open(path,'rb').read()
+    open(path,'wb').write(data[:keep] if keep >= 0 else data[:len(data)+keep-1])
+    assert loadSnapshot(path,drawingStamp(drawing)) is None
+
+def test_not_a_snapshot(saved):
+    drawing, model, path = saved
+    open(path,'wb').write(b'not a snapshot' + b'\0'*100)
+    assert loadSnapshot(path) is None
+
+def test_missing(tmp_path):
+    assert loadSnapshot(str(tmp_path / 'missing.snapshot')) is None
@@ -0,0 +1,88 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the stories [stories.py]: only the levels of horizontal elements are stories, with the base and the top; sloped
+lines, ramps, the rows of walls' panels and footings don't add stories, and vertices between stories belong to the story below
+"""
+
+import numpy as np
+
+from model import ImportModel
+from panelize import panelizeWalls
+from stories import clusterLevels, assignStories, storyOf, storyAbove, STORY_TOL, MIN_STORY_HEIGHT
+
+#A utility function that returns an import model of lines [(n,6)], 3dfaces [(n,4,3)] and points [(n,3)] only
+def geometry(lines=(),faces=(),points=()):
+    model = ImportModel()
+    model.framexyz = np.array(lines,dtype=float).reshape(-1,6)
+    model.areaxyz = np.array(faces,dtype=float).reshape(-1,4,3)
+    model.pointxyz = np.array(points,dtype=float).reshape(-1,3)
+    model.framesec = np.zeros(len(model.framexyz),dtype=np.intc)
+    model.areasec = np.zeros(len(model.areaxyz),dtype=np.intc)
+    model.pointlayer = np.zeros(len(model.pointxyz),dtype=np.intc)
+    return model
+
+#A utility function that returns a flat square 3dface at level z
+def slab(z,size=5.0):
+    return [(0,0,z),(size,0,z),(size,size,z),(0,size,z)]
+
+def test_synthetic_building(synthModel):
+    model = assignStories(synthModel(stories=3,baysx=2,baysy=2))
+    assert np.allclose(model.levels,[0,3,6,9])
+    assert model.framestory.min() == 1 and model.framestory.max() == 3
+    assert (model.pointstory == 0).all()
+
+#The rows of the walls' panels are between the stories
+def test_wall_panels_add_no_stories(synthModel):
+    model = synthModel(stories=2,baysx=1,baysy=2,stifflines=True)
+    nwalls, npanels = panelizeWalls(model)
+    assert npanels > nwalls
+    assert len(np.unique(model.areaxyz[:,:,2])) > 3
+    assert np.allclose(assignStories(model).levels,[0,3,6])
+
+#The ends of a sloped beam and a brace aren't stories, they belong to the story below them
+def test_sloped_lines():
+    lines = [(0,0,0,0,0,3),(0,0,3,5,0,3),(0,0,1.2,5,0,2.1),(0,0,0,5,0,2.4)]
+    model = assignStories(geometry(lines,[slab(3.0)]))
+    assert np.allclose(model.levels,[0,3])
+    assert storyOf(model,[1.2,2.1,2.4,3.0]).tolist() == [0,0,0,1]
+    assert model.framestory.tolist() == [1,1,0,0]
+
+#A ramp of 3dfaces and a stair of horizontal lines 15 mm apart don't chain into one level many metres tall
+def test_ramp_and_steps():
+    ramp = [[(0,0,k*0.5),(5,0,k*0.5),(5,2,(k+1)*0.5),(0,2,(k+1)*0.5)] for k in range(0,6)]
+    steps = [(0,0,k*0.015,1,0,k*0.015) for k in range(0,201)]
+    model = assignStories(geometry(steps,ramp + [slab(3.0)]))
+    levels = model.levels
+    assert levels[0] == 0 and levels[-1] == 3.0
+    assert (np.diff(levels) >= MIN_STORY_HEIGHT - STORY_TOL).all()
+    values, ranges, labels = clusterLevels([k*0.015 for k in range(0,201)])
+    assert (ranges[:,1] - ranges[:,0] <= STORY_TOL).all()
+
+#A footing's point below the columns is the base, the columns' bottoms are between the base and the first floor
+def test_footings():
+    lines = [(0,0,0,0,0,3.5),(0,0,3.5,5,0,3.5)]
+    model = assignStories(geometry(lines,[slab(3.5)],[(0,0,-1.5)]))
+    assert np.allclose(model.levels,[-1.5,3.5])
+    assert model.pointstory.tolist() == [0]
+
+#Levels closer than the smallest story height to the story below aren't stories [a stair's landing], and of a dropped
+#beam and the slab above it the slab's level is the story
+def test_minimum_story_height():
+    lines = [(0,0,0,0,0,6),(0,0,1.0,2,0,1.0),(0,0,2.8,5,0,2.8)]
+    model = assignStories(geometry(lines,[slab(3.0),slab(6.0)]))
+    assert np.allclose(model.levels,[0,3.0,6])
+    assert model.framestory.tolist() == [2,0,0]
+
+#Of close levels without slabs the highest one is the story
+def test_close_levels_without_slabs():
+    lines = [(0,0,0,0,0,6),(0,0,2.8,5,0,2.8),(0,0,3.0,5,0,3.0),(0,0,6,5,0,6)]
+    model = assignStories(geometry(lines))
+    assert np.allclose(model.levels,[0,3.0,6])
+
+#A joint between stories is placed at the story above it, with its distance below it
+def test_story_above():
+    model = assignStories(geometry([(0,0,0,0,0,3)],[slab(3.0),slab(6.0)]))
+    story, below = storyAbove(model,[0.0,1.2,3.0,3.005,4.5])
+    assert story.tolist() == [0,1,1,1,2]
+    assert np.allclose(below,[0,1.8,0,0,1.5])
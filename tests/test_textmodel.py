@@ -0,0 +1,78 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Golden-file tests of the .e2k and .$2k writers: a synthetic building of 2 stories and 1 by 1 bay is written with both
+self weight multipliers and both wall crack modes, and compared byte for byte to the files at tests/golden
+2- After an intended change of the writers, the golden files are written again by: python tests/test_textmodel.py
+3- A triangle [a 3dface with a repeated corner] is written with its 3 joints
+"""
+
+import io
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conftest import writeSynth
+from extract import extractDxf
+from textmodel import writeE2k, writeS2k
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),'golden')
+MODIFIERS = 'As Per ACI M318 11' #the modifiers of walls depend on their crack mode
+CASES = [(program,swm,wallcrk) for program in ['ETABS','SAP2000'] for swm in ['0','1'] for wallcrk in ['cracked','uncracked']]
+
+#A utility function that returns the golden file of a case
+def goldenPath(program,swm,wallcrk):
+    ext = '.e2k' if program == "ETABS" else '.$2k'
+    return os.path.join(GOLDEN_DIR,'synth_swm%s_%s%s' % (swm,wallcrk,ext))
+
+#A utility function that returns the model file of the synthetic building as bytes [utf-8, lines end by "\n"]
+def render(directory,program,swm,wallcrk):
+    model = extractDxf(writeSynth(directory,stories=2,baysx=1,baysy=1))
+    f = io.StringIO()
+    if program == "ETABS":
+        writeE2k(model,f,swm,MODIFIERS,wallcrk,'2D')
+    else:
+        writeS2k(model,f,swm,MODIFIERS,wallcrk,'2D')
+    return f.getvalue().encode('utf-8')
+
+@pytest.mark.parametrize('program,swm,wallcrk',CASES)
+def test_golden(tmp_path,program,swm,wallcrk):
+    f = open(goldenPath(program,swm,wallcrk),'rb')
+    try:
+        golden = f.read()
+    finally:
+        f.close()
+    assert render(tmp_path,program,swm,wallcrk) == golden
+
+#The 1st 3dface is cut to the triangle of its first 3 corners
+@pytest.mark.parametrize('program',['ETABS','SAP2000'])
+def test_triangle(tmp_path,program):
+    model = extractDxf(writeSynth(tmp_path,stories=2,baysx=1,baysy=1))
+    model.areaxyz = model.areaxyz.copy()
+    model.areaxyz[0,3] = model.areaxyz[0,2]
+    f = io.StringIO()
+    if program == "ETABS":
+        writeE2k(model,f,'0',MODIFIERS,'cracked','2D')
+        areas = [line.split('"  ',1)[1].split() for line in f.getvalue().splitlines() if line.startswith('  AREA "')]
+        assert sorted(int(fields[1]) for fields in areas) == [3] + [4]*(model.nareas()-1)
+        assert all(len(fields) == 2 + 2*int(fields[1]) for fields in areas) #the joints and their stories
+    else:
+        writeS2k(model,f,'0',MODIFIERS,'cracked','2D')
+        table = f.getvalue().split('TABLE:  "CONNECTIVITY - AREA"\n')[1].split('\n\n')[0]
+        rows = [line.split('"   ',1)[1].split() for line in table.splitlines()]
+        assert sorted(row[0] for row in rows) == ['NumJoints=3'] + ['NumJoints=4']*(model.nareas()-1)
+        assert [row[1:] for row in rows if row[0] == 'NumJoints=3'] == [['Joint1=2','Joint2=8','Joint3=11']] #no Joint4
+
+if __name__ == '__main__':
+    directory = tempfile.mkdtemp()
+    for case in CASES:
+        f = open(goldenPath(*case),'wb')
+        try:
+            f.write(render(directory,*case))
+        finally:
+            f.close()
+        print(goldenPath(*case))
@@ -0,0 +1,114 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the pre-flight validation [validate.py]: a synthetic building has no problems, and every kind of problem put in
+it is reported with the handle and layer of its element
+"""
+
+import csv
+import io
+
+import numpy as np
+import pytest
+
+from model import NOREF, NOTYPE, BADRESTRAINT
+from xrecords import BadXRecord
+import validate
+from validate import validateModel, formatIssues, writeIssues, Issue
+
+#A utility function that returns the kinds of the problems of a model, by their number
+def kinds(issues):
+    counts = {}
+    for issue in issues:
+        counts[issue.kind] = counts.get(issue.kind,0) + 1
+    return counts
+
+def test_synthetic_building_is_valid(synthModel):
+    assert validateModel(synthModel(stories=2,baysx=2,baysy=1),'Columns') == []
+    assert validateModel(synthModel(stories=2,baysx=2,baysy=1,stifflines=True),'Columns') == []
+
+def test_missing_section(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    model.framesec[3] = NOREF
+    model.areatype[1] = NOTYPE
+    issues = validateModel(model)
+    assert kinds(issues) == {validate.MISSING_SECTION:2}
+    assert issues[0].handle == model.framehandles[3] and issues[0].layer == model.layers[model.framelayer[3]]
+    assert issues[1].handle == model.areahandles[1]
+
+def test_undefined_section(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    model.definitions['FrSecProp'] = []
+    assert kinds(validateModel(model)) == {validate.UNDEFINED_SECTION:model.nframes()}
+
+def test_undefined_wall_section(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1,stifflines=True)
+    model.definitions['WallSecProps'] = []
+    issues = validateModel(model)
+    assert kinds(issues) == {validate.UNDEFINED_SECTION:model.nwalls()}
+    assert set(issue.handle for issue in issues) == set(model.wallhandles)
+
+def test_undefined_material(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    nsections = sum(len(model.definitions[name]) for name in validate.SECTION_DICTS)
+    model.definitions['ConcMaterial'] = []
+    issues = validateModel(model)
+    assert kinds(issues) == {validate.UNDEFINED_MATERIAL:nsections}
+    assert all(issue.handle == '' for issue in issues)
+
+#The loads of pattern SDL aren't known without the drawing's patterns, Dead and Live are always known
+def test_unknown_pattern(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    model.definitions['LoadPatterns'] = []
+    sdl = model.patterns.get('SDL')
+    nsdl = sum(int(np.count_nonzero(loads.pattern == sdl)) for loads in [model.frameloads,model.arealoads,model.wallloads])
+    issues = validateModel(model)
+    assert nsdl and kinds(issues) == {validate.UNKNOWN_PATTERN:nsdl}
+    assert all('SDL' in issue.message for issue in issues)
+
+def test_bad_restraint(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    model.pointrestraint[2] = BADRESTRAINT
+    issues = validateModel(model)
+    assert kinds(issues) == {validate.BAD_RESTRAINT:1}
+    assert issues[0].handle == model.pointhandles[2]
+
+#A malformed record of a dictionary, and one of an element's extension dictionary
+def test_bad_xrecord(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    model.definitions['PierIDs'].append(BadXRecord('Label',(1,),(),"0 value(s) of 1"))
+    model.issues.append((model.framehandles[0],'Beams','DistLoads',"values 'x' don't fit DistLoads"))
+    issues = validateModel(model)
+    assert kinds(issues) == {validate.BAD_XRECORD:2}
+    assert issues[1].handle == model.framehandles[0]
+
+@pytest.mark.parametrize('mesh',[(np.nan,0.75),(3.0,np.nan),(3.0,0.0),(0.5,0.75)])
+def test_bad_wall(synthModel,mesh):
+    model = synthModel(stories=2,baysx=2,baysy=1,stifflines=True)
+    model.wallmesh[1] = mesh
+    issues = validateModel(model)
+    assert kinds(issues) == {validate.BAD_WALL:1}
+    assert issues[0].handle == model.wallhandles[1]
+
+def test_missing_layer(synthModel):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    assert kinds(validateModel(model,'Piers')) == {validate.MISSING_LAYER:1}
+    assert validateModel(model,'None') == []
+
+def test_report(synthModel,tmp_path):
+    model = synthModel(stories=2,baysx=2,baysy=1)
+    model.framesec[:] = NOREF
+    issues = validateModel(model)
+    assert formatIssues(issues,limit=3).splitlines()[-1] == "... and %d more" % (len(issues) - 3)
+    path = writeIssues(issues,str(tmp_path / ('synth' + validate.ISSUES_EXT)))
+    assert len(open(path).read().splitlines()) == len(issues) + 1
+
+#Layers' names of any language are written to the report [the csv module of Python 2 can't write unicode]
+def test_report_unicode(tmp_path):
+    issues = [Issue(validate.MISSING_SECTION,'1A2',u'\u0623\u0639\u0645\u062f\u0629','line without a section property'),
+              Issue(validate.MISSING_LAYER,'',u'Poutres \xe9tage 1',u'columns\' layer "Poutres \xe9tage 1", 2nd floor')]
+    path = writeIssues(issues,str(tmp_path / ('synth' + validate.ISSUES_EXT)))
+    f = io.open(path,encoding='utf-8-sig',newline='')
+    rows = list(csv.reader(f))
+    f.close()
+    assert rows == [validate.REPORT_FIELDS] + [list(issue) for issue in issues]
@@ -0,0 +1,116 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Tests of the typed records [xrecords.py]: the XRecords of every kind are decoded, malformed ones are BadXRecords, and
+the rows of the "dumpxrecords" macro are decoded by their parent keys and owners
+2- The batched read through a fake Excel, and the read one by one [XRecordReader]
+"""
+
+from xrecords import (decodeXRecord, decodeDump, readAllXRecords, XRecordReader, recordKind, ConcMaterial, FrameSection,
+                      Label, FrameLoad, AreaLoad, WallMesh, RawXRecord, BadXRecord, DUMP_FIRSTCOL, DUMP_LASTCOL)
+
+XLVALUE = 10
+
+def test_decode_kinds():
+    assert decodeXRecord('ConcMaterial',[1,2,3,4,6,7,8,9],['C30',30000,2.5e7,0.002,0.003,0.2,1e-5,25]) == \
+        ConcMaterial('C30',30000.0,2.5e7,0.002,0.003,0.2,1e-5,25.0)
+    assert decodeXRecord('FrSecProp',[1,6,2,3,7,8,9],['B250X600','Rectangular','C30','Beam','0.6','0.25','25']) == \
+        FrameSection('B250X600','Rectangular','C30','Beam',0.6,0.25,25.0)
+    assert decodeXRecord('SecProp',[1],['S150']) == Label('S150')
+    assert decodeXRecord('FrameLoad',[1,2,3,4],['2','12','6.0','Dead']) == FrameLoad(2.0,12.0,6,'Dead')
+    assert decodeXRecord('AreaLoad',[1,3,4],[1.5,6,'SDL']) == AreaLoad(1.5,6,'SDL')
+    assert decodeXRecord('WallMesh',[1,2],['3.0','0.75']) == WallMesh(3.0,0.75)
+
+#Excel gives whole numbers as floats, a label that is a number keeps its text
+def test_numeric_labels():
+    assert decodeXRecord('PierID',[1],[1.0]) == Label('1')
+    assert decodeXRecord('PierID',[1],[None]) == Label('')
+
+def test_malformed():
+    rec = decodeXRecord('FrameLoad',[1,2],['2','12'])
+    assert isinstance(rec,BadXRecord) and rec.error == "2 value(s) of 4"
+    rec = decodeXRecord('AreaLoad',[1,3,4],['heavy',6,'SDL'])
+    assert isinstance(rec,BadXRecord) and rec.kind == 'AreaLoad' and 'heavy' in rec.error
+    assert decodeXRecord('Unknown',[1],['x']) == RawXRecord('Unknown',(1,),('x',))
+
+def test_record_kind():
+    assert recordKind('DistLoads','AcDbLine') == 'FrameLoad'
+    assert recordKind('DistLoads','AcDbFace') == 'AreaLoad'
+    assert recordKind('WallDistLoads','AcDbFace') == 'AreaLoad'
+    assert recordKind('SecProp','AcDbLine') == 'SecProp'
+
+#Rows of the macro: ObjectID, parent key, owner's ObjectName, size, then pairs of dxf group code and value [to column U]
+def row(objid,key,owner,pairs):
+    cells = [objid,key,owner,len(pairs)]
+    for code, value in pairs:
+        cells.extend([code,value])
+    return tuple(cells + [None]*(20 - len(cells)))
+
+ROWS = [row(11.0,'LoadPatterns','',[(1,'SDL'),(2,'Other')]),
+        row(12.0,'SecProp','AcDbLine',[(1,'B250X600')]),
+        row(13.0,'DistLoads','AcDbLine',[(1,2.0),(2,12.0),(3,6.0),(4,'Dead')]),
+        row(14.0,'DistLoads','AcDbFace',[(1,1.5),(3,6.0),(4,'SDL')]),
+        row(15.0,'DistLoads','AcDbLine',[(1,2.0),(2,'x'),(3,6.0),(4,'Dead')]),
+        row(16.0,'WallMesh','AcDbLine',[(1,3.0)]),
+        (None,)*20]
+
+def test_decode_dump():
+    records = decodeDump(ROWS)
+    assert sorted(records) == [11,12,13,14,15,16]
+    assert records[11].label == 'SDL' and records[11].type == 'Other'
+    assert records[12] == Label('B250X600')
+    assert records[13] == FrameLoad(2.0,12.0,6,'Dead')
+    assert records[14] == AreaLoad(1.5,6,'SDL')
+    assert isinstance(records[15],BadXRecord) and records[15].kind == 'FrameLoad'
+    assert isinstance(records[16],BadXRecord) and records[16].error == "1 value(s) of 2"
+
+#A fake Excel: its cells are set by the application and by the macro
+class FakeRange(object):
+    def __init__(self,xl,ref):
+        self.xl = xl
+        self.ref = ref
+        self.Value = self
+
+    def __getitem__(self,xlvalue):
+        return self.xl.cells.get(self.ref)
+
+    def __setitem__(self,xlvalue,value):
+        self.xl.cells[self.ref] = value
+
+class FakeExcel(object):
+    def __init__(self,rows):
+        self.rows = rows
+        self.cells = {}
+        self.runs = []
+        self.Application = self
+
+    @property
+    def Range(self):
+        return dict((ref,FakeRange(self,ref)) for ref in ['A1','A3','%s1:%s%d' % (DUMP_FIRSTCOL,DUMP_LASTCOL,len(self.rows))])
+
+    def Run(self,macro):
+        self.runs.append((macro,self.cells['A1']))
+        self.cells['A3'] = len(self.rows)
+        self.cells['%s1:%s%d' % (DUMP_FIRSTCOL,DUMP_LASTCOL,len(self.rows))] = tuple(self.rows)
+
+def test_read_all():
+    xl = FakeExcel(ROWS)
+    records = readAllXRecords(xl,XLVALUE,'C:\\drawings\\tower.dwg')
+    assert xl.runs == [('facilitate.xlsm!import_sap_etabs.dumpxrecords','C:\\drawings\\tower.dwg')]
+    assert records == decodeDump(ROWS)
+    assert readAllXRecords(FakeExcel([]),XLVALUE,'empty.dwg') == {}
+
+#Every XRecord is read once, with the number of values of its kind
+def test_reader():
+    reads = []
+    data = {21:([1],['C30']),22:([1,2,3,4],[2.0,12.0,6.0,'Dead']),23:([1,2],[3.0,None])}
+    def readone(objid,size):
+        reads.append((objid,size))
+        return data[objid]
+    reader = XRecordReader(readone)
+    assert reader.record(21,'SecProp') == Label('C30')
+    assert reader.record(22,'FrameLoad') == FrameLoad(2.0,12.0,6,'Dead')
+    assert reader.record(21,'SecProp') == Label('C30')
+    assert isinstance(reader.record(23,'WallMesh'),BadXRecord)
+    assert reads == [(21,1),(22,4),(23,2)]
+    assert sorted(reader.records) == [21,22,23]
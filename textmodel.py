@@ -0,0 +1,395 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- A writer of the import model as an ETABS text model file (.e2k)
+2- A writer of the import model as a SAP2000 text model file (.$2k)
+Both write the whole model in one streaming pass, so ETABS or SAP2000 opens it in one step instead of element by element API calls
+The text is unicode [layers, sections and labels may have any characters], the file is written in the system's encoding
+"""
+
+from __future__ import unicode_literals
+
+import io
+import locale
+
+import numpy as np
+
+from model import WALL, FIXED, NORESTRAINT, NOREF
+from joints import modelJoints, faceJoints
+from stories import assignStories, storyAbove, storyNames
+from emit import getModifiers, slabThickness, translateLoad, PATTERN_TYPES
+
+ETABS_VERSION = "16.1.0"
+SAP_VERSION = "18.0.1"
+
+#Names of load directions [after translateLoad]
+E2K_DIRS = {1:'1',2:'2',3:'3',4:'X',5:'Y',6:'GRAV',7:'XPROJ',8:'YPROJ',9:'GRAVPROJ'}
+S2K_DIRS = {1:'1',2:'2',3:'3',4:'X',5:'Y',6:'Z',7:'XProj',8:'YProj',9:'ZProj',10:'Gravity',11:'GravityProj'}
+ETABS_DIRS = {1:'1',2:'2',3:'3',4:'X',5:'Y',6:'Gravity',7:'X Projected',8:'Y Projected',9:'Gravity Projected'} #database tables of ETABS
+PATTERN_NAMES = {'Dead':'Dead','Live':'Live','Other':'Other'}
+
+#Keywords of frame modifiers [8 values] and area modifiers [10 values]
+E2K_FRMODS = ['AMOD','A2MOD','A3MOD','JMOD','I2MOD','I3MOD','MMOD','WMOD']
+E2K_SHMODS = ['F11MOD','F22MOD','F12MOD','M11MOD','M22MOD','M12MOD','V13MOD','V23MOD','MMOD','WMOD']
+S2K_FRMODS = ['AMod','A2Mod','A3Mod','JMod','I2Mod','I3Mod','MMod','WMod']
+S2K_SHMODS = ['F11Mod','F22Mod','F12Mod','M11Mod','M22Mod','M12Mod','V13Mod','V23Mod','MMod','WMod']
+
+#A utility function that formats a number compactly and exactly enough for the model file
+def num(x):
+    return '%.12g' % x
+
+#A utility function that quotes a value of a .$2k table if it contains spaces
+def s2kval(x):
+    if isinstance(x,float):
+        return num(x)
+    x = '%s' % x
+    if ' ' in x or x == '':
+        return '"' + x + '"'
+    return x
+
+#A utility function that returns the model file's path of a drawing for ETABS (.e2k) or SAP2000 (.$2k)
+def modelFilePath(drawingpath,program):
+    base = drawingpath.rsplit('.',1)[0]
+    if program == "ETABS":
+        return base + '.e2k'
+    return base + '.$2k'
+
+#A utility function that returns the translated loads of an element as (pattern, direction, coordinate system, row)
+def _elemLoads(model,loads,lstart,lend,e,program,swm,elemtype):
+    result = []
+    for j in range(lstart[e],lend[e]):
+        load = translateLoad(program,swm,model.patterns[loads.pattern[j]],int(loads.direction[j]),elemtype)
+        if load is not None:
+            result.append(load + (j,))
+    return result
+
+#A utility function that returns the (group name, object type, indices of elements) of every layer's lines, shells and restrained points
+def _groups(model):
+    frbylayer = model.byLayer(model.framelayer)
+    shbylayer = model.byLayer(model.arealayer)
+    pobylayer = model.byLayer(model.pointlayer)
+    groups = []
+    for li in range(0,len(model.layers)):
+        layer = model.layers[li]
+        groups.append((layer + '_LINES','Frame',frbylayer[li]))
+        groups.append((layer + '_Shells','Area',shbylayer[li]))
+        groups.append((layer + '_POINTS','Joint',[e for e in pobylayer[li] if model.pointrestraint[e] != NORESTRAINT]))
+    return groups
+
+#Write the import model as an ETABS .e2k file to an open text file
+def writeE2k(model,f,swm,modtypes,wallcrk,slabmode):
+    program = "ETABS"
+    w = f.write
+    beammod, colmod, slabmod, wallmod = getModifiers(modtypes,wallcrk,slabmode)
+    xyz, frj, arj, restrained, poj = modelJoints(model)
+    pointjoint = dict(zip(restrained,poj))
+    frnames = model.elementNames('frame')
+    shnames = model.elementNames('area')
+
+    #stories from the levels of the model, points are labeled by their plan location and their distance below their story
+    #[joints between stories are at the story above them, as ETABS places them]
+    if model.levels is None:
+        assignStories(model)
+    levels = model.levels
+    jstory, jbelow = storyAbove(model,xyz[:,2])
+    plans, jplan = np.unique(np.column_stack([xyz[:,0:2],jbelow]),axis=0,return_inverse=True)
+    jplan = jplan.ravel()
+    storynames = storyNames(model)
+
+    w('$ PROGRAM INFORMATION\n')
+    w('  PROGRAM  "ETABS"  VERSION "%s"\n\n' % ETABS_VERSION)
+    w('$ CONTROLS\n')
+    w('  UNITS  "KN"  "M"  "C"\n\n')
+
+    w('$ STORIES - IN SEQUENCE FROM TOP\n')
+    for k in range(len(levels)-1,0,-1):
+        w('  STORY "%s"  HEIGHT %s\n' % (storynames[k],num(levels[k]-levels[k-1])))
+    w('  STORY "Base"  ELEV %s\n\n' % num(levels[0] if len(levels) else 0.0))
+
+    w('$ MATERIAL PROPERTIES\n')
+    for val in model.definitions.get('ConcMaterial',[]):
+        w('  MATERIAL  "%s"  TYPE "Concrete"  WEIGHTPERVOLUME %s\n' % (val.label,num(val.unitweight)))
+        w('  MATERIAL  "%s"  SYMTYPE "Isotropic"  E %s  U %s  A %s\n' % (val.label,num(val.E),num(val.poisson),num(val.thermal)))
+        w('  MATERIAL  "%s"  FC %s  STRAINATFC %s  ULTSTRAIN %s\n' % (val.label,num(val.fc),num(val.strainatfc),num(val.ultstrain)))
+    w('\n')
+
+    w('$ FRAME SECTIONS\n')
+    frsecs = [val for val in model.definitions.get('FrSecProp',[]) if val.shape in ["Rec","Circular"]]
+    for val in frsecs:
+        if val.shape == "Rec":
+            w('  FRAMESECTION  "%s"  MATERIAL "%s"  SHAPE "Concrete Rectangular"  D %s  B %s\n' % (val.label,val.material,num(val.dim1),num(val.dim2)))
+        else:
+            w('  FRAMESECTION  "%s"  MATERIAL "%s"  SHAPE "Concrete Circle"  D %s\n' % (val.label,val.material,num(val.dim1)))
+        mods = colmod if val.sectype == "Column" else beammod
+        w('  FRAMESECTION  "%s"  %s\n' % (val.label,'  '.join('%s %s' % (k,num(m)) for k, m in zip(E2K_FRMODS,mods))))
+    w('\n')
+
+    w('$ CONCRETE SECTIONS\n')
+    for val in frsecs:
+        if val.sectype == "Beam":
+            w('  CONCRETESECTION  "%s"  LONGBARMATERIAL "A615Gr60"  CONFINEBARMATERIAL "A615Gr60"  TYPE "BEAM"  COVERTOP 0.06  COVERBOTTOM 0.06  ATI 0  ABI 0  ATJ 0  ABJ 0\n' % val.label)
+        elif val.sectype == "Column":
+            w('  CONCRETESECTION  "%s"  LONGBARMATERIAL "A615Gr60"  CONFINEBARMATERIAL "A615Gr60"  TYPE "COLUMN"  PATTERN "RECTANGLE"  CONFINEMENT "TIES"  COVER 0.04  NUMBARS3DIR 3  NUMBARS2DIR 5  BARSIZE "#20"  TIESIZE "#10"  TIESPACING 0.015  NUMTIES2 0  NUMTIES3 0  DESIGNTYPE "DESIGN"\n' % val.label)
+    w('\n')
+
+    w('$ SLAB PROPERTIES\n')
+    for val in model.definitions.get('SlabSecProp',[]):
+        thk = slabThickness(val,program,swm,modtypes)
+        w('  SHELLPROP  "%s"  PROPTYPE  "Slab"  MATERIAL "%s"  MODELINGTYPE "ShellThin"  SLABTYPE "Slab"  SLABTHICKNESS %s\n' % (val.label,val.material,num(thk)))
+        w('  SHELLPROP  "%s"  %s\n' % (val.label,'  '.join('%s %s' % (k,num(m)) for k, m in zip(E2K_SHMODS,slabmod))))
+    w('\n')
+
+    w('$ WALL PROPERTIES\n')
+    for val in model.definitions.get('WallSecProps',[]):
+        w('  SHELLPROP  "%s"  PROPTYPE  "Wall"  MATERIAL "%s"  MODELINGTYPE "ShellThin"  WALLTHICKNESS %s\n' % (val.label,val.material,num(val.thickness)))
+        w('  SHELLPROP  "%s"  %s\n' % (val.label,'  '.join('%s %s' % (k,num(m)) for k, m in zip(E2K_SHMODS,wallmod))))
+    w('\n')
+
+    w('$ PIER/SPANDREL NAMES\n')
+    for val in model.definitions.get('PierIDs',[]):
+        w('  PIERNAME  "%s"\n' % val.label)
+    for val in model.definitions.get('SpandralIDs',[]):
+        w('  SPANDRELNAME  "%s"\n' % val.label)
+    w('\n')
+
+    w('$ POINT COORDINATES\n')
+    for k in range(0,len(plans)):
+        if plans[k,2] == 0:
+            w('  POINT "%d"  %s  %s\n' % (k+1,num(plans[k,0]),num(plans[k,1])))
+        else:
+            w('  POINT "%d"  %s  %s  %s\n' % (k+1,num(plans[k,0]),num(plans[k,1]),num(plans[k,2])))
+    w('\n')
+
+    #every line or area is assigned to its top story, and its vertices are given as stories below it
+    w('$ LINE CONNECTIVITIES\n')
+    frtop = []
+    for e in range(0,model.nframes()):
+        ji, jj = frj[e]
+        if jstory[ji] < jstory[jj]:
+            ji, jj = jj, ji
+        span = jstory[ji] - jstory[jj]
+        if span == 0:
+            kind = 'BEAM'
+        elif jplan[ji] == jplan[jj]:
+            kind = 'COLUMN'
+        else:
+            kind = 'BRACE'
+        frtop.append(storynames[jstory[ji]])
+        w('  LINE  "%s"  %s  "%d"  "%d"  %d\n' % (frnames[e],kind,jplan[ji]+1,jplan[jj]+1,span))
+    w('\n')
+
+    w('$ AREA CONNECTIVITIES\n')
+    shtop = []
+    fj, nj = faceJoints(arj)
+    for e in range(0,model.nareas()):
+        js = fj[e,:nj[e]] #a triangle has 3 joints
+        top = jstory[js].max()
+        kind = 'PANEL' if model.areatype[e] == WALL else 'FLOOR'
+        shtop.append(storynames[top])
+        w('  AREA "%s"  %s  %d  %s  %s\n' % (shnames[e],kind,len(js),'  '.join('"%d"' % (jplan[j]+1) for j in js),'  '.join('%d' % (top-jstory[j]) for j in js)))
+    w('\n')
+
+    w('$ GROUPS\n')
+    groups = _groups(model)
+    for grname, objtype, members in groups:
+        w('  GROUP  "%s"\n' % grname)
+    for grname, objtype, members in groups:
+        for e in members:
+            if objtype == 'Frame':
+                w('  GROUP  "%s"  LINE "%s"  "%s"\n' % (grname,frnames[e],frtop[e]))
+            elif objtype == 'Area':
+                w('  GROUP  "%s"  AREA "%s"  "%s"\n' % (grname,shnames[e],shtop[e]))
+            else:
+                j = pointjoint[e]
+                w('  GROUP  "%s"  POINT "%d"  "%s"\n' % (grname,jplan[j]+1,storynames[jstory[j]]))
+    w('\n')
+
+    w('$ POINT ASSIGNS\n')
+    for k in range(0,len(restrained)):
+        j = poj[k]
+        dofs = 'UX UY UZ RX RY RZ' if model.pointrestraint[restrained[k]] == FIXED else 'UX UY UZ'
+        w('  POINTASSIGN  "%d"  "%s"  RESTRAINT "%s"\n' % (jplan[j]+1,storynames[jstory[j]],dofs))
+    w('\n')
+
+    w('$ LINE ASSIGNS\n')
+    for e in range(0,model.nframes()):
+        w('  LINEASSIGN  "%s"  "%s"  SECTION "%s"\n' % (frnames[e],frtop[e],model.sections[model.framesec[e]]))
+    w('\n')
+
+    w('$ AREA ASSIGNS\n')
+    for e in range(0,model.nareas()):
+        line = '  AREAASSIGN  "%s"  "%s"  SECTION "%s"' % (shnames[e],shtop[e],model.sections[model.areasec[e]])
+        if model.areapier[e] != NOREF:
+            line += '  PIER "%s"' % model.labels[model.areapier[e]]
+        if model.areaspand[e] != NOREF:
+            line += '  SPANDREL "%s"' % model.labels[model.areaspand[e]]
+        w(line + '\n')
+    w('\n')
+
+    w('$ LOAD PATTERNS\n')
+    w('  LOADPATTERN "Dead"  TYPE  "Dead"  SELFWEIGHT  %s\n' % swm)
+    w('  LOADPATTERN "Live"  TYPE  "Live"  SELFWEIGHT  0\n')
+    for val in model.definitions.get('LoadPatterns',[]):
+        if val.label not in ["Dead","Live"] and val.type in PATTERN_TYPES:
+            w('  LOADPATTERN "%s"  TYPE  "%s"  SELFWEIGHT  0\n' % (val.label,PATTERN_NAMES[val.type]))
+    w('\n')
+
+    w('$ FRAME OBJECT LOADS\n')
+    loads = model.frameloads
+    lstart, lend = loads.ranges(model.nframes())
+    for e in range(0,model.nframes()):
+        for pattern, direction, cs, j in _elemLoads(model,loads,lstart,lend,e,program,swm,"frame"):
+            w('  LINELOAD  "%s"  "%s"  TYPE "TRAPF"  DIR "%s"  LC "%s"  FSTART %s  FEND %s  RDSTART 0  RDEND 1\n' % (frnames[e],frtop[e],E2K_DIRS[direction],pattern,num(loads.start[j]),num(loads.end[j])))
+    w('\n')
+
+    w('$ SHELL OBJECT LOADS\n')
+    loads = model.arealoads
+    lstart, lend = loads.ranges(model.nareas())
+    for e in range(0,model.nareas()):
+        elemtype = "wall" if model.areatype[e] == WALL else "slab"
+        for pattern, direction, cs, j in _elemLoads(model,loads,lstart,lend,e,program,swm,elemtype):
+            w('  AREALOAD  "%s"  "%s"  TYPE "UNIFF"  DIR "%s"  LC "%s"  FVAL %s\n' % (shnames[e],shtop[e],E2K_DIRS[direction],pattern,num(loads.value[j])))
+    w('\n')
+
+    w('$ END OF MODEL FILE\n')
+
+#Get the tables of the model's objects: joints, connectivity, restraints, section assignments, groups and loads [SAP2000's table names]
+#Returns a list of (table name, fields, rows), rows are generated lazily as lists of values in the order of fields
+#Joints are named jointprefix + their number, a value that isn't given is None [the 4th joint of a triangle]
+def objectTables(model,program,swm,jointprefix=''):
+    xyz, frj, arj, restrained, poj = modelJoints(model)
+    fj, nj = faceJoints(arj)
+    pointjoint = dict(zip(restrained,poj))
+    frnames = model.elementNames('frame')
+    shnames = model.elementNames('area')
+    jname = lambda j: jointprefix + str(j+1)
+    groups = _groups(model)
+    frloads = model.frameloads
+    arloads = model.arealoads
+    dirs = ETABS_DIRS if program == "ETABS" else S2K_DIRS
+
+    def jointRows():
+        for k in range(0,len(xyz)):
+            yield [jname(k),'GLOBAL','Cartesian',float(xyz[k,0]),float(xyz[k,1]),float(xyz[k,2])]
+
+    def restraintRows():
+        for k in range(0,len(restrained)):
+            fixed = model.pointrestraint[restrained[k]] == FIXED
+            yield [jname(poj[k])] + ['Yes']*3 + (['Yes']*3 if fixed else ['No']*3)
+
+    def groupRows():
+        for grname, objtype, members in groups:
+            for e in members:
+                if objtype == 'Frame':
+                    yield [grname,objtype,frnames[e]]
+                elif objtype == 'Area':
+                    yield [grname,objtype,shnames[e]]
+                else:
+                    yield [grname,objtype,jname(pointjoint[e])]
+
+    def frameLoadRows():
+        lstart, lend = frloads.ranges(model.nframes())
+        for e in range(0,model.nframes()):
+            for pattern, direction, cs, j in _elemLoads(model,frloads,lstart,lend,e,program,swm,"frame"):
+                yield [frnames[e],pattern,cs.upper() if cs == "Global" else cs,'Force',dirs[direction],'RelDist',0.0,1.0,
+                       float(frloads.start[j]),float(frloads.end[j])]
+
+    def areaLoadRows():
+        lstart, lend = arloads.ranges(model.nareas())
+        for e in range(0,model.nareas()):
+            elemtype = "wall" if model.areatype[e] == WALL else "slab"
+            for pattern, direction, cs, j in _elemLoads(model,arloads,lstart,lend,e,program,swm,elemtype):
+                yield [shnames[e],pattern,cs.upper() if cs == "Global" else cs,dirs[direction],float(arloads.value[j])]
+
+    tables = [
+        ('Joint Coordinates',['Joint','CoordSys','CoordType','XorR','Y','Z'],jointRows()),
+        ('Connectivity - Frame',['Frame','JointI','JointJ'],
+         ([frnames[e],jname(frj[e,0]),jname(frj[e,1])] for e in range(0,model.nframes()))),
+        ('Connectivity - Area',['Area','NumJoints','Joint1','Joint2','Joint3','Joint4'],
+         ([shnames[e],int(nj[e])] + [jname(j) for j in fj[e,:nj[e]]] + [None]*(4-nj[e]) for e in range(0,model.nareas()))),
+        ('Joint Restraint Assignments',['Joint','U1','U2','U3','R1','R2','R3'],restraintRows()),
+        ('Frame Section Assignments',['Frame','AnalSect'],
+         ([frnames[e],model.sections[model.framesec[e]]] for e in range(0,model.nframes()))),
+        ('Area Section Assignments',['Area','Section'],
+         ([shnames[e],model.sections[model.areasec[e]]] for e in range(0,model.nareas()))),
+        ('Groups 1 - Definitions',['GroupName'],([g] for g, t, m in groups)),
+        ('Groups 2 - Assignments',['GroupName','ObjectType','ObjectLabel'],groupRows()),
+        ('Frame Loads - Distributed',['Frame','LoadPat','CoordSys','Type','Dir','DistType','RelDistA','RelDistB','FOverLA','FOverLB'],
+         frameLoadRows()),
+        ('Area Loads - Uniform',['Area','LoadPat','CoordSys','Dir','UnifLoad'],areaLoadRows()),
+    ]
+    return tables
+
+#A utility function that writes a .$2k table, rows are lists of (field, value)
+def _s2kTable(w,name,rows):
+    w('TABLE:  "%s"\n' % name)
+    for row in rows:
+        w('   ' + '   '.join('%s=%s' % (k,s2kval(v)) for k, v in row if v is not None) + '\n') #None: not given [a triangle's Joint4]
+    w('\n')
+
+#Write the import model as a SAP2000 .$2k file to an open text file
+def writeS2k(model,f,swm,modtypes,wallcrk,slabmode):
+    program = "SAP2000"
+    w = f.write
+    beammod, colmod, slabmod, wallmod = getModifiers(modtypes,wallcrk,slabmode)
+    defs = model.definitions
+
+    _s2kTable(w,'PROGRAM CONTROL',[[('ProgramName','SAP2000'),('Version',SAP_VERSION),('CurrUnits','KN, m, C')]])
+
+    mats = defs.get('ConcMaterial',[])
+    _s2kTable(w,'MATERIAL PROPERTIES 01 - GENERAL',[[('Material',v.label),('Type','Concrete'),('SymType','Isotropic')] for v in mats])
+    _s2kTable(w,'MATERIAL PROPERTIES 02 - BASIC MECHANICAL PROPERTIES',
+              [[('Material',v.label),('UnitWeight',v.unitweight),('E1',v.E),('U12',v.poisson),('A1',v.thermal)] for v in mats])
+    _s2kTable(w,'MATERIAL PROPERTIES 03B - CONCRETE DATA',
+              [[('Material',v.label),('Fc',v.fc),('StrainAtFc',v.strainatfc),('UltStrain',v.ultstrain)] for v in mats])
+
+    patterns = [[('LoadPat','DEAD'),('DesignType','DEAD'),('SelfWtMult',float(swm))],[('LoadPat','LIVE'),('DesignType','LIVE'),('SelfWtMult',0.0)]]
+    for v in defs.get('LoadPatterns',[]):
+        if v.label not in ["Dead","Live"] and v.type in PATTERN_TYPES:
+            patterns.append([('LoadPat',v.label),('DesignType',PATTERN_NAMES[v.type].upper()),('SelfWtMult',0.0)])
+    _s2kTable(w,'LOAD PATTERN DEFINITIONS',patterns)
+
+    frsecs = [v for v in defs.get('FrSecProp',[]) if v.shape in ["Rec","Circular"]]
+    rows = []
+    for v in frsecs:
+        mods = colmod if v.sectype == "Column" else beammod
+        if v.shape == "Rec":
+            row = [('SectionName',v.label),('Material',v.material),('Shape','Rectangular'),('t3',v.dim1),('t2',v.dim2)]
+        else:
+            row = [('SectionName',v.label),('Material',v.material),('Shape','Circle'),('t3',v.dim1)]
+        rows.append(row + [(k,float(m)) for k, m in zip(S2K_FRMODS,mods)])
+    _s2kTable(w,'FRAME SECTION PROPERTIES 01 - GENERAL',rows)
+    _s2kTable(w,'FRAME SECTION PROPERTIES 02 - CONCRETE COLUMN',
+              [[('SectionName',v.label),('RebarMatL','A615Gr60'),('RebarMatC','A615Gr60'),('ReinfConfig','Rectangular'),('LatReinf','Ties'),
+                ('Cover',0.04),('NumBars3Dir',3),('NumBars2Dir',5),('BarSizeL','#20'),('BarSizeC','#10'),('SpacingC',0.015),
+                ('NumCBars2',0),('NumCBars3',0),('ReinfType','Design')] for v in frsecs if v.sectype == "Column"])
+    _s2kTable(w,'FRAME SECTION PROPERTIES 03 - CONCRETE BEAM',
+              [[('SectionName',v.label),('RebarMatL','A615Gr60'),('RebarMatC','A615Gr60'),('TopCover',0.06),('BotCover',0.06),
+                ('TopLeftArea',0),('TopRghtArea',0),('BotLeftArea',0),('BotRghtArea',0)] for v in frsecs if v.sectype == "Beam"])
+
+    rows = []
+    for v in defs.get('SlabSecProp',[]):
+        thk = slabThickness(v,program,swm,modtypes)
+        rows.append([('Section',v.label),('Material',v.material),('MatAngle',0),('AreaType','Shell'),('Type','Shell-Thin'),
+                     ('Thickness',thk),('BendThick',thk)] + [(k,float(m)) for k, m in zip(S2K_SHMODS,slabmod)])
+    for v in defs.get('WallSecProps',[]):
+        rows.append([('Section',v.label),('Material',v.material),('MatAngle',0),('AreaType','Shell'),('Type','Membrane'),
+                     ('Thickness',v.thickness),('BendThick',v.thickness)] + [(k,float(m)) for k, m in zip(S2K_SHMODS,wallmod)])
+    _s2kTable(w,'AREA SECTION PROPERTIES',rows)
+
+    for key, fields, rows in objectTables(model,program,swm):
+        _s2kTable(w,key.upper(),(list(zip(fields,row)) for row in rows))
+
+    w('END TABLE DATA\n')
+
+#Write the import model to a model file for ETABS (.e2k) or SAP2000 (.$2k), and return its path
+def writeModelFile(model,path,program,swm,modtypes,wallcrk,slabmode):
+    f = io.open(path,'w',encoding=locale.getpreferredencoding())
+    try:
+        if program == "ETABS":
+            writeE2k(model,f,swm,modtypes,wallcrk,slabmode)
+        else:
+            writeS2k(model,f,swm,modtypes,wallcrk,slabmode)
+    finally:
+        f.close()
+    return path
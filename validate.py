@@ -0,0 +1,168 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- The pre-flight validation of the import model: every problem of the drawing is collected before anything is written to
+ETABS/SAP2000, with the handle and layer of its element [missing or undefined section properties, undefined materials,
+unknown load patterns, invalid restraints, walls that can't be divided into panels and malformed XRecords]
+2- The report of the problems: a short message, and a .csv file of all of them [UTF-8 with a BOM, so Excel opens the
+unicode layers' names, handles and messages of any drawing]
+"""
+
+import io
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from model import NOREF, NOTYPE, SLAB, WALL, BADRESTRAINT
+from xrecords import BadXRecord
+
+#A problem of the drawing, handle and layer are empty for the definitions [the dictionaries of the drawing]
+Issue = namedtuple('Issue','kind handle layer message')
+
+#Kinds of problems
+MISSING_SECTION = 'missing section'
+UNDEFINED_SECTION = 'undefined section'
+UNDEFINED_MATERIAL = 'undefined material'
+UNKNOWN_PATTERN = 'unknown load pattern'
+BAD_RESTRAINT = 'invalid restraint'
+BAD_XRECORD = 'malformed XRecord'
+MISSING_LAYER = 'missing layer'
+BAD_WALL = 'invalid wall'
+
+DEFAULT_PATTERNS = ['Dead','Live'] #ETABS and SAP2000 create them
+SECTION_DICTS = ['FrSecProp','SlabSecProp','WallSecProps']
+REPORT_FIELDS = ['kind','handle','layer','message']
+ISSUES_EXT = '.issues.csv'
+ISSUES_ENCODING = 'utf-8-sig'
+
+#A utility function that returns the labels of the well-formed records of a named dictionary
+def _labels(model,name):
+    return set(rec.label for rec in model.definitions.get(name,[]) if not isinstance(rec,BadXRecord))
+
+#A utility function that returns for every name of a table whether it's in a set of names [indexed by the table's indices]
+def _known(table,names):
+    return np.array([name in names for name in table] + [True],dtype=bool) #the last one is for NOREF [-1]
+
+#Check the definitions: malformed records, and materials of sections that aren't defined
+def checkDefinitions(model):
+    issues = []
+    for name in sorted(model.definitions):
+        for rec in model.definitions[name]:
+            if isinstance(rec,BadXRecord):
+                issues.append(Issue(BAD_XRECORD,'','',"malformed %s XRecord of %s: %s" % (rec.kind,name,rec.error)))
+    materials = _labels(model,'ConcMaterial')
+    for name in SECTION_DICTS:
+        for rec in model.definitions.get(name,[]):
+            if not isinstance(rec,BadXRecord) and rec.material not in materials:
+                issues.append(Issue(UNDEFINED_MATERIAL,'','',"section %s of %s uses material %s, which isn't defined" % (rec.label,name,rec.material)))
+    return issues
+
+#Check the lines and 3dfaces: missing section properties, and sections that aren't defined by the drawing
+def checkSections(model):
+    issues = []
+    for e in np.nonzero(model.framesec == NOREF)[0]:
+        issues.append(Issue(MISSING_SECTION,model.framehandles[e],model.layers[model.framelayer[e]],"line without a section property"))
+    for e in np.nonzero(model.areatype == NOTYPE)[0]:
+        issues.append(Issue(MISSING_SECTION,model.areahandles[e],model.layers[model.arealayer[e]],"shell without a section property"))
+
+    frknown = _known(model.sections,_labels(model,'FrSecProp'))
+    for e in np.nonzero(~frknown[model.framesec])[0]:
+        issues.append(Issue(UNDEFINED_SECTION,model.framehandles[e],model.layers[model.framelayer[e]],
+                            "line's section %s isn't defined" % model.sections[model.framesec[e]]))
+    for areatype, name, what in [(SLAB,'SlabSecProp','slab'),(WALL,'WallSecProps','wall')]:
+        known = _known(model.sections,_labels(model,name))
+        for e in np.nonzero((model.areatype == areatype) & ~known[model.areasec])[0]:
+            issues.append(Issue(UNDEFINED_SECTION,model.areahandles[e],model.layers[model.arealayer[e]],
+                                "%s's section %s isn't defined" % (what,model.sections[model.areasec[e]])))
+    known = _known(model.sections,_labels(model,'WallSecProps'))
+    for e in np.nonzero(~known[model.wallsec])[0]:
+        issues.append(Issue(UNDEFINED_SECTION,model.wallhandles[e],model.layers[model.walllayer[e]],
+                            "wall's section %s isn't defined" % model.sections[model.wallsec[e]]))
+    return issues
+
+#Check the loads of lines and 3dfaces: their load patterns must be defined by the drawing
+def checkLoads(model):
+    issues = []
+    known = _known(model.patterns,_labels(model,'LoadPatterns') | set(DEFAULT_PATTERNS))
+    for loads, handles, layer, what in [(model.frameloads,model.framehandles,model.framelayer,'line'),
+                                        (model.arealoads,model.areahandles,model.arealayer,'shell'),
+                                        (model.wallloads,model.wallhandles,model.walllayer,'wall')]:
+        for j in np.nonzero(~known[loads.pattern])[0]:
+            e = loads.elem[j]
+            issues.append(Issue(UNKNOWN_PATTERN,handles[e],model.layers[layer[e]],
+                                "%s's load of pattern %s, which isn't defined" % (what,model.patterns[loads.pattern[j]])))
+    return issues
+
+#Check the points: their restraints must be "Hinged" or "Fixed"
+def checkRestraints(model):
+    issues = []
+    for e in np.nonzero(model.pointrestraint == BADRESTRAINT)[0]:
+        issues.append(Issue(BAD_RESTRAINT,model.pointhandles[e],model.layers[model.pointlayer[e]],"point's restraint isn't Hinged or Fixed"))
+    return issues
+
+#Check the walls' stiff lines: every wall needs its depth and the size of its panels [WallMesh], the depth isn't smaller
+def checkWalls(model):
+    issues = []
+    depth = model.wallmesh[:,0]
+    size = model.wallmesh[:,1]
+    for e in range(0,model.nwalls()):
+        where = model.wallhandles[e], model.layers[model.walllayer[e]]
+        if np.isnan(depth[e]) or np.isnan(size[e]):
+            issues.append(Issue(BAD_WALL,where[0],where[1],"wall's stiff line without its depth and panels' size [WallMesh]"))
+        elif size[e] <= 0:
+            issues.append(Issue(BAD_WALL,where[0],where[1],"wall's panels' size %g isn't positive" % size[e]))
+        elif depth[e] < size[e]:
+            issues.append(Issue(BAD_WALL,where[0],where[1],"wall's depth %g is smaller than its panels' size %g" % (depth[e],size[e])))
+    return issues
+
+#Validate the import model, returns all its problems [an empty list if it can be imported]
+#colyr is the columns' layer chosen at the window ['None' or empty if it isn't chosen]
+def validateModel(model,colyr='None'):
+    issues = checkDefinitions(model)
+    for handle, layer, key, message in model.issues:
+        issues.append(Issue(BAD_XRECORD,handle,layer,"%s: %s" % (key,message)))
+    issues.extend(checkSections(model))
+    issues.extend(checkLoads(model))
+    issues.extend(checkRestraints(model))
+    issues.extend(checkWalls(model))
+    if colyr and colyr != 'None' and colyr not in model.layers:
+        issues.append(Issue(MISSING_LAYER,'',colyr,"columns' layer %s doesn't exist" % colyr))
+    return issues
+
+#A utility function that returns the report file of the problems of a drawing, next to it
+def issuesPath(drawingpath):
+    return os.path.splitext(drawingpath)[0] + ISSUES_EXT
+
+#A utility function that returns a value as a field of a .csv row, as unicode [quoted if it has a comma, quote or newline]
+def _csvField(value):
+    if isinstance(value,bytes):
+        value = value.decode('utf-8','replace')
+    elif not isinstance(value,type(u'')):
+        value = u'%s' % value
+    if any(c in value for c in u',"\r\n'):
+        value = u'"%s"' % value.replace(u'"',u'""')
+    return value
+
+#Write all problems to a .csv file, the text is written as unicode [the csv module of Python 2 only writes bytes]
+def writeIssues(issues,path):
+    f = io.open(path,'w',encoding=ISSUES_ENCODING,newline='')
+    try:
+        for row in [REPORT_FIELDS] + [list(issue) for issue in issues]:
+            f.write(u','.join(_csvField(value) for value in row) + u'\n')
+    finally:
+        f.close()
+    return path
+
+#A short message of the problems: their number by kind, then the first ones
+def formatIssues(issues,limit=10):
+    counts = {}
+    for issue in issues:
+        counts[issue.kind] = counts.get(issue.kind,0) + 1
+    lines = ["%d problem(s) found: %s" % (len(issues),', '.join('%d %s' % (n,kind) for kind, n in sorted(counts.items())))]
+    for issue in issues[:limit]:
+        where = ' '.join(part for part in [issue.handle and 'handle ' + issue.handle,issue.layer and 'at layer ' + issue.layer] if part)
+        lines.append("%s%s" % (where + ': ' if where else '',issue.message))
+    if len(issues) > limit:
+        lines.append("... and %d more" % (len(issues) - limit))
+    return '\n'.join(lines)
@@ -0,0 +1,141 @@
+#Author: Serag Hassouna
+"""
+This module contains of:-
+1- Typed records for the XRecords written by insert_struct_prop.lsp
+2- A batched XRecord reader that gets all the structural XRecords of a drawing in one Excel/VBA round trip
+3- A reader of XRecords one by one, for a facilitate.xlsm without the "dumpxrecords" macro
+"""
+
+from collections import namedtuple
+
+#Typed records, their fields follow the order of values inside the XRecord (they are still indexable as val[0], val[1], ...)
+ConcMaterial = namedtuple('ConcMaterial','label fc E strainatfc ultstrain poisson thermal unitweight')
+LoadPattern = namedtuple('LoadPattern','label type')
+FrameSection = namedtuple('FrameSection','label shape material sectype dim1 dim2 unitweight')
+SlabSection = namedtuple('SlabSection','label material etabsthk sapthk unitweight')
+WallSection = namedtuple('WallSection','label thickness material')
+Label = namedtuple('Label','label')
+FrameLoad = namedtuple('FrameLoad','start end direction pattern')
+AreaLoad = namedtuple('AreaLoad','value direction pattern')
+WallMesh = namedtuple('WallMesh','depth size') #of a wall's stiff line: the wall's depth below it, and the best size of its panels
+RawXRecord = namedtuple('RawXRecord','kind dxfgrcd vals')
+BadXRecord = namedtuple('BadXRecord','kind dxfgrcd vals error') #its values don't fit its kind, it's reported by validate.py
+
+#The named dictionaries of the drawing that hold definitions
+NAMED_DICTS = ['ConcMaterial','LoadPatterns','FrSecProp','SlabSecProp','WallSecProps','PierIDs','SpandralIDs']
+
+#The keys of the XRecords (or dictionaries of XRecords) inside the extension dictionary of a drawing element
+XDICT_KEYS = ['SecProp','WallProp','DistLoads','WallDistLoads','PierID','SpandralID','Restrain','WallMesh']
+
+'''
+How every value of a record is converted, respectively
+s=string, f=float, i=integer
+'''
+_SCHEMA = {
+    'ConcMaterial': (ConcMaterial,'sfffffff'),
+    'LoadPatterns': (LoadPattern,'ss'),
+    'FrSecProp': (FrameSection,'ssssfff'),
+    'SlabSecProp': (SlabSection,'ssfff'),
+    'WallSecProps': (WallSection,'sfs'),
+    'PierIDs': (Label,'s'),
+    'SpandralIDs': (Label,'s'),
+    'SecProp': (Label,'s'),
+    'WallProp': (Label,'s'),
+    'PierID': (Label,'s'),
+    'SpandralID': (Label,'s'),
+    'Restrain': (Label,'s'),
+    'FrameLoad': (FrameLoad,'ffis'),
+    'AreaLoad': (AreaLoad,'fis'),
+    'WallMesh': (WallMesh,'ff'),
+    }
+
+#The ObjectName of the line entity, used to tell frame loads from area loads inside "DistLoads"
+LINE_OBJECTNAME = 'AcDbLine'
+
+#Columns of the dump written by the "dumpxrecords" macro of facilitate.xlsm [B:U]
+DUMP_FIRSTCOL = 'B'
+DUMP_LASTCOL = 'U'
+DUMP_MAXPAIRS = 8
+
+#A utility function that converts a single XRecord value
+def _convert(value,code):
+    if code == 's':
+        if value is None:
+            return ''
+        if isinstance(value,float) and value == int(value):
+            return str(int(value))
+        return str(value)
+    elif code == 'f':
+        return float(value)
+    elif code == 'i':
+        return int(float(value))
+    return value
+
+#A utility function that returns the schema key of an XRecord from its parent key and its owner's type
+def recordKind(key,owner=''):
+    if key == 'DistLoads':
+        if owner == LINE_OBJECTNAME or owner == 'LINE':
+            return 'FrameLoad'
+        return 'AreaLoad'
+    elif key == 'WallDistLoads':
+        return 'AreaLoad'
+    return key
+
+#A utility function that takes the kind of an XRecord with its dxf group codes and values, and returns its typed record
+#A malformed XRecord [too few values, or a value that isn't a number] is returned as BadXRecord
+def decodeXRecord(kind,dxfgrcd,vals):
+    try:
+        rectype, codes = _SCHEMA[kind]
+    except KeyError:
+        return RawXRecord(kind,tuple(dxfgrcd),tuple(vals))
+    if len(vals) < len(codes):
+        return BadXRecord(kind,tuple(dxfgrcd),tuple(vals),"%d value(s) of %d" % (len(vals),len(codes)))
+    try:
+        return rectype(*[_convert(vals[i],codes[i]) for i in range(0,len(codes))])
+    except (TypeError, ValueError):
+        return BadXRecord(kind,tuple(dxfgrcd),tuple(vals),"values %s don't fit %s" % (', '.join(repr(v) for v in vals),kind))
+
+#A utility function that decodes the rows of the "dumpxrecords" macro into typed records keyed by Object ID
+def decodeDump(rows):
+    '''
+    Typical values of a row:-
+    row[0]=ObjectID, row[1]=parent key, row[2]=owner's ObjectName, row[3]=size,
+    row[4], row[5], ... = dxf group code, value, dxf group code, value, ...
+    '''
+    records = {}
+    for row in rows:
+        if row[0] is None:
+            continue
+        objid = int(row[0])
+        size = int(row[3])
+        dxfgrcd = [row[4+2*k] for k in range(0,size)]
+        vals = [row[5+2*k] for k in range(0,size)]
+        records[objid] = decodeXRecord(recordKind(str(row[1]),str(row[2] or '')),dxfgrcd,vals)
+    return records
+
+#A utility function that reads every structural XRecord of a drawing with one macro run and one range read
+#xl is the Excel instance that has facilitate.xlsm opened, and xlvalue is Excel's xlRangeValueDefault
+def readAllXRecords(xl,xlvalue,namefile):
+    xl.Range["A1"].Value[xlvalue] = namefile
+    xl.Application.Run("facilitate.xlsm!import_sap_etabs.dumpxrecords")
+
+    nrows = int(xl.Range["A3"].Value[xlvalue] or 0)
+    if nrows == 0:
+        return {}
+    rows = xl.Range["%s1:%s%d" % (DUMP_FIRSTCOL,DUMP_LASTCOL,nrows)].Value[xlvalue]
+    return decodeDump(rows)
+
+#The XRecords of a drawing read one by one when they're needed, and kept [for a facilitate.xlsm without "dumpxrecords"]
+#readone(objid,size) returns the dxf group codes and values of an XRecord, size is the number of values of its kind
+class XRecordReader(object):
+    def __init__(self,readone):
+        self.readone = readone
+        self.records = {} #Object ID -> typed record
+
+    def record(self,objid,kind):
+        rec = self.records.get(objid)
+        if rec is None:
+            codes = _SCHEMA[kind][1] if kind in _SCHEMA else 'x'*DUMP_MAXPAIRS
+            dxfgrcd, vals = self.readone(objid,len(codes))
+            rec = self.records[objid] = decodeXRecord(kind,dxfgrcd,vals)
+        return rec